@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Maslow Analysis Pool
+Runs heavy G-code file analysis in worker processes so the event loop and serial reader stay responsive
+"""
+
+import asyncio
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import logging
+
+from kinematics import ReachabilityChecker
+from preflight import PreflightValidator
+from report_cache import ReportCache, read_and_hash
+
+logger = logging.getLogger(__name__)
+
+# Lower number runs first
+PRIORITY_JOB = 0         # the file about to be run
+PRIORITY_INTERACTIVE = 5  # a user waiting on a report
+PRIORITY_BACKGROUND = 10  # pre-warming after upload
+
+MAX_QUEUED_TASKS = 32
+WORKER_NICENESS = 5
+PROGRESS_INTERVAL = 0.25  # seconds between progress broadcasts per task
+
+ANALYSES: Dict[str, Callable[[], ReportCache]] = {
+    "preflight": PreflightValidator,
+    "reachability": ReachabilityChecker,
+}
+
+
+class AnalysisQueueFull(Exception):
+    """Raised when the bounded task queue has no room"""
+
+
+class AnalysisCancelled(Exception):
+    """Raised when a task is cancelled before or while it runs"""
+
+
+# Worker-process state, set by _init_worker
+_progress_queue = None
+_cancel_flags = None
+_worker_analyses: Dict[str, ReportCache] = {}
+
+
+def _init_worker(progress_queue, cancel_flags):
+    """Worker process setup: lower priority and keep the shared channels"""
+    global _progress_queue, _cancel_flags
+    _progress_queue = progress_queue
+    _cancel_flags = cancel_flags
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def _run_analysis(kind: str, path: str, settings: Hashable, task_id: int, slot: int) -> Tuple[str, Dict[str, Any]]:
+    """Worker entry point: read, hash and analyze one file, reporting progress along the way"""
+    def report(stage: str, fraction: float):
+        if _cancel_flags is not None and _cancel_flags[slot]:
+            raise AnalysisCancelled()
+        if _progress_queue is not None:
+            _progress_queue.put((task_id, stage, fraction))
+
+    report("reading", 0.0)
+    data, digest = read_and_hash(Path(path), progress=lambda f: report("reading", f))
+    report("analyzing", 0.0)
+    analysis = _worker_analyses.setdefault(kind, ANALYSES[kind]())
+    result = analysis.compute(data, settings, progress=lambda f: report("analyzing", f))
+    result["file_hash"] = digest
+    report("analyzing", 1.0)
+    return digest, result
+
+
+class AnalysisTask:
+    """One queued or running analysis"""
+
+    def __init__(self, task_id: int, kind: str, path: Path, settings: Hashable, priority: int):
+        self.id = task_id
+        self.kind = kind
+        self.path = path
+        self.settings = settings
+        self.priority = priority
+        self.state = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.slot: Optional[int] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+
+    @property
+    def key(self) -> Tuple[str, str, Hashable]:
+        return (self.kind, str(self.path), self.settings)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "filename": self.path.name,
+            "priority": self.priority,
+            "state": self.state,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+        }
+
+
+class AnalysisPool:
+    """Priority queue of analyses feeding a ProcessPoolExecutor"""
+
+    def __init__(self, caches: Dict[str, ReportCache], notify: Callable[[dict], None],
+                 max_workers: Optional[int] = None, max_queued: int = MAX_QUEUED_TASKS):
+        self.caches = caches
+        self.notify = notify
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_queued = max_queued
+
+        self._context = multiprocessing.get_context("spawn")
+        self._progress_queue = self._context.Queue()
+        self._cancel_flags = self._context.RawArray("b", self.max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._heap: List[Tuple[int, int, AnalysisTask]] = []
+        self._counter = itertools.count(1)
+        self._tasks: Dict[int, AnalysisTask] = {}
+        self._by_key: Dict[Tuple[str, str, Hashable], AnalysisTask] = {}
+        self._free_slots = list(range(self.max_workers))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._progress_thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_progress: Dict[int, float] = {}
+
+    def start(self):
+        """Create the worker pool and the progress listener"""
+        self._loop = asyncio.get_running_loop()
+        self._executor = self._create_executor()
+        self._running = True
+        self._progress_thread = threading.Thread(target=self._drain_progress, daemon=True)
+        self._progress_thread.start()
+        logger.info(f"🧮 Analysis pool started with {self.max_workers} workers")
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Build the process pool; workers are spawned lazily on first use"""
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue, self._cancel_flags),
+        )
+
+    def shutdown(self):
+        """Cancel queued work and stop the workers"""
+        self._running = False
+        for task in list(self._tasks.values()):
+            self.cancel(task.id)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def analyze(self, kind: str, path: Path, settings: Hashable,
+                      priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """Return an analysis report, from cache if the file is unchanged, else from a worker"""
+        cached = self.caches[kind].lookup_file(path, settings)
+        if cached is not None:
+            return cached
+        task = self.submit(kind, path, settings, priority)
+        return await asyncio.shield(task.future)
+
+    def submit(self, kind: str, path: Path, settings: Hashable, priority: int = PRIORITY_BACKGROUND) -> AnalysisTask:
+        """Queue an analysis; an identical queued or running task is reused and re-prioritized"""
+        if self._executor is None:
+            raise Exception("Analysis pool is not running")
+
+        existing = self._by_key.get((kind, str(path), settings))
+        if existing is not None:
+            if existing.state == "queued" and priority < existing.priority:
+                existing.priority = priority
+                heapq.heappush(self._heap, (priority, next(self._counter), existing))
+            return existing
+
+        queued = sum(1 for t in self._tasks.values() if t.state == "queued")
+        if queued >= self.max_queued:
+            raise AnalysisQueueFull(f"Analysis queue is full ({self.max_queued} tasks)")
+
+        task = AnalysisTask(next(self._counter), kind, path, settings, priority)
+        self._tasks[task.id] = task
+        self._by_key[task.key] = task
+        heapq.heappush(self._heap, (priority, task.id, task))
+        self._dispatch()
+        return task
+
+    def cancel(self, task_id: int) -> bool:
+        """Cancel a queued task, or ask a running worker to stop at its next progress check"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        if task.state == "running" and task.slot is not None:
+            self._cancel_flags[task.slot] = 1
+        elif task.state == "queued":
+            self._finish(task, "cancelled", error=AnalysisCancelled())
+        return True
+
+    def tasks(self) -> List[Dict[str, Any]]:
+        """All queued and running tasks, highest priority first"""
+        return [t.as_dict() for t in sorted(self._tasks.values(), key=lambda t: (t.priority, t.id))]
+
+    def _dispatch(self):
+        """Move queued tasks onto free workers, best priority first"""
+        while self._free_slots and self._heap:
+            priority, _, task = heapq.heappop(self._heap)
+            if task.state != "queued" or priority != task.priority:
+                continue  # stale heap entry left by re-prioritization or cancellation
+            task.slot = self._free_slots.pop()
+            self._cancel_flags[task.slot] = 0
+            task.state = "running"
+            task.started_at = time.time()
+            future = self._loop.run_in_executor(
+                self._executor, _run_analysis, task.kind, str(task.path), task.settings, task.id, task.slot
+            )
+            future.add_done_callback(lambda f, task=task: self._on_done(task, f))
+            self._broadcast(task)
+
+    def _on_done(self, task: AnalysisTask, future: "asyncio.Future"):
+        """Collect a worker result into the cache and wake waiters"""
+        try:
+            digest, report = future.result()
+        except AnalysisCancelled as e:
+            self._finish(task, "cancelled", error=e)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); replace the pool so later tasks still run
+            logger.error(f"💥 Analysis worker died while checking {task.path.name}; restarting pool")
+            self._finish(task, "failed", error=e)
+            if self._running:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+        except Exception as e:
+            logger.error(f"💥 {task.kind} analysis of {task.path.name} failed: {e}")
+            self._finish(task, "failed", error=e)
+        else:
+            cache = self.caches[task.kind]
+            cache.remember_digest(task.path, digest)
+            cache.store(digest, task.settings, report)
+            self._finish(task, "completed", result={**report, "cached": False})
+        self._dispatch()
+
+    def _finish(self, task: AnalysisTask, state: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[Exception] = None):
+        """Retire a task and resolve its future"""
+        task.state = state
+        task.stage = state
+        if task.slot is not None:
+            self._free_slots.append(task.slot)
+            task.slot = None
+        self._tasks.pop(task.id, None)
+        self._by_key.pop(task.key, None)
+        self._last_progress.pop(task.id, None)
+        if not task.future.done():
+            if error is not None:
+                task.future.set_exception(error)
+                task.future.exception()  # mark retrieved; waiters still see it
+            else:
+                task.future.set_result(result)
+        self._broadcast(task)
+
+    def _drain_progress(self):
+        """Forward worker progress to the event loop (runs in a thread)"""
+        while self._running:
+            try:
+                task_id, stage, fraction = self._progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._on_progress, task_id, stage, fraction)
+
+    def _on_progress(self, task_id: int, stage: str, fraction: float):
+        """Update a running task and broadcast, throttled per task"""
+        task = self._tasks.get(task_id)
+        if task is None or task.state != "running":
+            return
+        task.stage = stage
+        task.progress = fraction
+        now = time.time()
+        if now - self._last_progress.get(task_id, 0.0) >= PROGRESS_INTERVAL or fraction >= 1.0:
+            self._last_progress[task_id] = now
+            self._broadcast(task)
+
+    def _broadcast(self, task: AnalysisTask):
+        """Queue an analysis_progress message for WebSocket clients"""
+        self.notify({"type": "analysis_progress", "task": task.as_dict(), "timestamp": time.time()})
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Maslow Command Tracing
+Per-command timestamps from API receipt to the controller's ok/error, kept in a ring for latency reports
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACE_CAPACITY = 1000  # traces kept for /api/debug/traces
+PERCENTILES = (50, 95, 99)
+COMMAND_KINDS = ("jog", "home", "setting", "realtime", "gcode")
+
+# Stages reported per command: (name, from timestamp, to timestamp)
+STAGES = (
+    ("api", "received", "enqueued"),          # HTTP handling and the event loop
+    ("dispatch", "enqueued", "written"),      # waiting for a worker thread plus the serial write
+    ("first_byte", "written", "first_byte"),  # controller's time to start answering
+    ("response", "first_byte", "completed"),  # rest of the answer up to ok/error
+)
+
+# Set by RequestTimingMiddleware as soon as a request arrives, read when its command is traced
+request_received_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_received_at", default=None)
+
+
+def classify_command(command: str, realtime_commands=()) -> str:
+    """Command class used to group latency statistics"""
+    if command in realtime_commands or (len(command) == 1 and ord(command) >= 0x80):
+        return "realtime"
+    upper = command.upper()
+    if upper.startswith("$J="):
+        return "jog"
+    if upper.startswith("$H"):
+        return "home"
+    if upper.startswith("$"):
+        return "setting"
+    return "gcode"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil without floats
+    return sorted_values[int(rank) - 1]
+
+
+@dataclass
+class CommandTrace:
+    """Timestamps (time.monotonic) of one command on its way to the controller and back"""
+    id: int
+    machine_id: str
+    command: str
+    kind: str
+    received: float
+    enqueued: Optional[float] = None
+    written: Optional[float] = None
+    first_byte: Optional[float] = None
+    completed: Optional[float] = None
+    result: Optional[str] = None
+    started_at: float = 0.0  # wall clock, for display
+
+    @property
+    def total(self) -> Optional[float]:
+        """Receipt to ok/error (realtime commands have no ok, so their last timestamp counts)"""
+        end = self.completed
+        if end is None and self.kind == "realtime":
+            end = self.first_byte or self.written
+        return end - self.received if end is not None else None
+
+    def stages(self) -> Dict[str, Optional[float]]:
+        """Duration of each stage in seconds, None where a timestamp is missing"""
+        durations = {}
+        for name, start, end in STAGES:
+            a, b = getattr(self, start), getattr(self, end)
+            durations[name] = b - a if a is not None and b is not None else None
+        durations["total"] = self.total
+        return durations
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation, durations in milliseconds"""
+        return {
+            "id": self.id,
+            "machine_id": self.machine_id,
+            "command": self.command,
+            "kind": self.kind,
+            "result": self.result,
+            "started_at": self.started_at,
+            "stages_ms": {name: round(value * 1000, 3) if value is not None else None
+                          for name, value in self.stages().items()},
+        }
+
+
+class CommandTracer:
+    """Hands out trace ids and keeps the most recent finished traces"""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY, slow_threshold: Optional[float] = None):
+        self.slow_threshold = slow_threshold  # seconds; None disables the slow-command log
+        self._traces: Deque[CommandTrace] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, machine_id: str, command: str, kind: str) -> CommandTrace:
+        """Begin a trace at the request's arrival time (or now, outside a request)"""
+        now = time.monotonic()
+        received = request_received_at.get()
+        return CommandTrace(id=next(self._ids), machine_id=machine_id, command=command, kind=kind,
+                            received=received if received is not None else now, started_at=time.time())
+
+    def finish(self, trace: CommandTrace):
+        """Store a finished trace and log it if it was slow"""
+        with self._lock:
+            self._traces.append(trace)
+        total = trace.total
+        if self.slow_threshold is not None and (total is None or total >= self.slow_threshold):
+            stages = ", ".join(f"{name} {value * 1000:.1f}ms" if value is not None else f"{name} -"
+                               for name, value in trace.stages().items())
+            logger.warning(f"🐢 Slow command #{trace.id} on {trace.machine_id}: {trace.command!r} "
+                           f"({trace.result or 'no response'}): {stages}")
+
+    def traces(self, limit: int = 100, machine_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent traces, newest first"""
+        with self._lock:
+            traces = list(self._traces)
+        if machine_id is not None:
+            traces = [t for t in traces if t.machine_id == machine_id]
+        return [t.as_dict() for t in reversed(traces[-limit:])] if limit > 0 else []
+
+    def summary(self, machine_id: Optional[str] = None) -> Dict[str, Any]:
+        """p50/p95/p99 per command class and stage, in milliseconds"""
+        with self._lock:
+            traces = [t for t in self._traces if machine_id is None or t.machine_id == machine_id]
+
+        summary = {}
+        for kind in COMMAND_KINDS:
+            of_kind = [t for t in traces if t.kind == kind]
+            if not of_kind:
+                continue
+            stages: Dict[str, List[float]] = {}
+            for trace in of_kind:
+                for name, value in trace.stages().items():
+                    if value is not None:
+                        stages.setdefault(name, []).append(value)
+            summary[kind] = {
+                "count": len(of_kind),
+                "unanswered": sum(1 for t in of_kind if t.total is None),
+                "errors": sum(1 for t in of_kind if (t.result or "").startswith("error")),
+                "stages_ms": {
+                    name: {f"p{p}": round(percentile(values, p) * 1000, 3) for p in PERCENTILES}
+                    for name, values in ((n, sorted(v)) for n, v in stages.items())
+                },
+            }
+        return summary
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording when each HTTP request arrived, before routing and body parsing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = request_received_at.set(time.monotonic())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_received_at.reset(token)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Maslow Config Apply
+Diffs a new maslow.yaml against the applied one and decides how each change reaches the controller
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+# Sections only this backend reads; changing them never touches the controller
+LOCAL_SECTIONS = {"preflight", "kinematics", "serial"}
+
+# Leaves FluidNC accepts at runtime as `$/path=value`; anything else (pins, drivers, buses, planner
+# size, structural edits) is only picked up when the controller restarts
+RUNTIME_SETTINGS = [re.compile(pattern) for pattern in (
+    r"^Maslow_[A-Za-z0-9_]+$",
+    r"^axes/[xyzabc]/(steps_per_mm|max_rate_mm_per_min|acceleration_mm_per_sec2|max_travel_mm|soft_limits)$",
+    r"^axes/[xyzabc]/homing/(cycle|positive_direction|mpos_mm|feed_mm_per_min|seek_mm_per_min"
+    r"|settle_ms|seek_scaler|feed_scaler)$",
+    r"^(arc_tolerance_mm|junction_deviation_mm|report_inches|verbose_errors|use_line_numbers)$",
+    r"^start/(must_home|deactivate_parking|check_limits)$",
+)]
+
+APPLY_NONE = "none"        # nothing the controller cares about changed
+APPLY_RUNTIME = "runtime"  # pushed as individual settings
+APPLY_RESTART = "restart"  # controller restarted to load the file
+
+
+def flatten_config(config: Any, prefix: str = "") -> Dict[str, Any]:
+    """Leaf values keyed by slash-separated path (lists are treated as leaves)"""
+    if not isinstance(config, dict):
+        return {prefix: config} if prefix else {}
+    leaves = {}
+    for key, value in config.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            leaves.update(flatten_config(value, path))
+        else:
+            leaves[path] = value
+    return leaves
+
+
+def format_setting(value: Any) -> str:
+    """Render a YAML scalar the way FluidNC expects it after `=`"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return f"{value:.6f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def is_runtime_setting(path: str) -> bool:
+    return any(pattern.match(path) for pattern in RUNTIME_SETTINGS)
+
+
+@dataclass
+class ConfigDiff:
+    """What changed between two configs, grouped by how it has to be applied"""
+    local: List[str] = field(default_factory=list)
+    runtime: Dict[str, Any] = field(default_factory=dict)
+    restart: List[str] = field(default_factory=list)
+
+    @property
+    def plan(self) -> str:
+        if self.restart:
+            return APPLY_RESTART
+        return APPLY_RUNTIME if self.runtime else APPLY_NONE
+
+    def commands(self) -> List[str]:
+        """`$/path=value` lines for the runtime changes"""
+        return [f"$/{path}={format_setting(value)}" for path, value in self.runtime.items()]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"local": self.local, "runtime": list(self.runtime), "restart": self.restart}
+
+
+def diff_configs(old: Any, new: Any) -> ConfigDiff:
+    """Classify every added, removed or changed leaf"""
+    before, after = flatten_config(old or {}), flatten_config(new or {})
+    diff = ConfigDiff()
+    for path in sorted(set(before) | set(after)):
+        if path in before and path in after and before[path] == after[path]:
+            continue
+        if path.split("/", 1)[0] in LOCAL_SECTIONS:
+            diff.local.append(path)
+        elif path in before and path in after and is_runtime_setting(path) \
+                and not isinstance(after[path], (dict, list)):
+            diff.runtime[path] = after[path]
+        else:
+            diff.restart.append(path)
+    return diff
+
+
+def split_results(commands: List[str], acks: List[str]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Pair commands with their ok/error; returns (applied, failed)"""
+    applied, failed = [], []
+    for command, ack in zip(commands, acks):
+        (applied if ack == "ok" else failed).append({"command": command, "response": ack})
+    for command in commands[len(acks):]:
+        failed.append({"command": command, "response": "no response"})
+    return applied, failed
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Maslow Config Service
+Parsed config files cached until they change on disk, with ETags and atomic writes
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+# libyaml's C loader/dumper are many times faster; fall back to pure Python if PyYAML was built without them
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+StatKey = Tuple[int, int, int]  # (mtime_ns, size, inode)
+
+
+@dataclass(frozen=True)
+class ConfigEntry:
+    """One parsed file; `data` is shared between callers and must be treated as read-only"""
+    path: Path
+    data: Any
+    etag: str
+    stat_key: StatKey
+
+
+def parse_yaml(raw: bytes) -> Any:
+    return yaml.load(raw, Loader=YAML_LOADER)
+
+
+def parse_json(raw: bytes) -> Any:
+    return json.loads(raw)
+
+
+def dump_yaml(data: Any) -> bytes:
+    return yaml.dump(data, Dumper=YAML_DUMPER, default_flow_style=False, sort_keys=False).encode()
+
+
+def dump_json(data: Any) -> bytes:
+    return json.dumps(data, indent=2).encode()
+
+
+def _stat_key(path: Path) -> StatKey:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _etag(raw: bytes) -> str:
+    return '"' + hashlib.sha1(raw).hexdigest() + '"'
+
+
+def write_atomic(path: Path, raw: bytes):
+    """Replace a file so readers see either the old or the new content, never a partial write"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigService:
+    """Loads each config file once and re-parses it only when its mtime, size or inode changes"""
+
+    def __init__(self):
+        self._entries: Dict[Path, ConfigEntry] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, path: Path) -> Optional[ConfigEntry]:
+        """Cached entry if the file is unchanged (a single stat, safe to call from the event loop)"""
+        entry = self._entries.get(Path(path))
+        if entry is None:
+            return None
+        try:
+            return entry if _stat_key(entry.path) == entry.stat_key else None
+        except OSError:
+            return None
+
+    def load(self, path: Path, parser: Callable[[bytes], Any]) -> ConfigEntry:
+        """Parsed contents of a file, from cache when unchanged; raises FileNotFoundError if missing"""
+        path = Path(path)
+        entry = self.peek(path)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self.peek(path)
+            if entry is not None:
+                return entry
+            # Stat before reading: if the file changes mid-read, the next call sees a new key and reloads
+            stat_key = _stat_key(path)
+            raw = path.read_bytes()
+            entry = ConfigEntry(path, parser(raw), _etag(raw), stat_key)
+            self._entries[path] = entry
+            return entry
+
+    def load_yaml(self, path: Path) -> ConfigEntry:
+        return self.load(path, parse_yaml)
+
+    def load_json(self, path: Path) -> ConfigEntry:
+        return self.load(path, parse_json)
+
+    def write(self, path: Path, data: Any, dumper: Callable[[Any], bytes]) -> ConfigEntry:
+        """Atomically write `data` and cache it without re-reading the file"""
+        path = Path(path)
+        raw = dumper(data)
+        with self._lock:
+            write_atomic(path, raw)
+            entry = ConfigEntry(path, copy.deepcopy(data), _etag(raw), _stat_key(path))
+            self._entries[path] = entry
+            return entry
+
+    def write_yaml(self, path: Path, data: Any) -> ConfigEntry:
+        return self.write(path, data, dump_yaml)
+
+    def write_json(self, path: Path, data: Any) -> ConfigEntry:
+        return self.write(path, data, dump_json)
+
+
+# Shared by the server and the analysis helpers that read machine configs
+config_files = ConfigService()
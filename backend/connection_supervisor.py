@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Maslow Connection Supervisor
+Watches the serial link and reconnects with backoff after a dead reader, stalled port or USB unplug
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 0.05      # seconds between health checks
+STALL_TIMEOUT = 2.0        # seconds of RX silence before probing with '?'
+PROBE_TIMEOUT = 1.0        # seconds to wait for any reply to the probe
+INITIAL_BACKOFF = 0.1      # first reconnect delay
+MAX_BACKOFF = 5.0          # reconnect delay ceiling
+
+
+class ConnectionSupervisor:
+    """Keeps a SerialManager connected while auto-reconnect is enabled"""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.auto_reconnect = False
+        self.reconnect_count = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff = INITIAL_BACKOFF
+        self._next_attempt = 0.0
+        self._probe_sent_at: Optional[float] = None
+
+    def start(self):
+        """Start supervising; the first connection attempt happens immediately"""
+        self.auto_reconnect = True
+        if self._thread and self._thread.is_alive():
+            self.wake()
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info("🩺 Connection supervisor started")
+
+    def stop(self):
+        """Stop supervising (the connection itself is left alone)"""
+        self.auto_reconnect = False
+        self._stop.set()
+        self._wake.set()
+
+    def pause(self):
+        """Stop reconnecting after an operator-requested disconnect"""
+        self.auto_reconnect = False
+
+    def resume(self):
+        """Reconnect again after pause()"""
+        self.auto_reconnect = True
+        self._backoff = INITIAL_BACKOFF
+        self._next_attempt = 0.0
+        self.wake()
+
+    def retry_now(self):
+        """Skip the backoff, e.g. because a port was just plugged in"""
+        if self.auto_reconnect:
+            self._backoff = INITIAL_BACKOFF
+            self._next_attempt = 0.0
+            self.wake()
+
+    def wake(self):
+        """Run a check now instead of at the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.manager.is_connected:
+                    self._check_health()
+                elif self.auto_reconnect and time.monotonic() >= self._next_attempt:
+                    self._attempt_reconnect()
+            except Exception as e:
+                logger.error(f"💥 Connection supervisor error: {e}")
+                logger.exception("Connection supervisor exception details:")
+            self._wake.wait(CHECK_INTERVAL)
+            self._wake.clear()
+        logger.info("🛑 Connection supervisor stopped")
+
+    def _attempt_reconnect(self):
+        """One connection attempt; schedules the next with exponential backoff on failure"""
+        was_lost = self.manager.state == "lost"
+        self.manager.set_state("reconnecting" if was_lost else "connecting")
+        if self.manager.connect():
+            if was_lost:
+                self.reconnect_count += 1
+            self._backoff = INITIAL_BACKOFF
+            self._probe_sent_at = None
+            return
+
+        self.manager.set_state("lost" if was_lost else "disconnected",
+                               reason=f"retrying in {self._backoff:.1f}s")
+        self._next_attempt = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+
+    def _check_health(self):
+        """Detect a dead reader thread, a vanished device node or a silent controller"""
+        manager = self.manager
+        if manager.read_thread is None or not manager.read_thread.is_alive():
+            manager.connection_lost("Serial reader thread stopped")
+            return
+
+        port = manager.port_name
+        if port and port.startswith("/dev/") and not os.path.exists(port):
+            manager.connection_lost(f"Serial port {port} disappeared")
+            return
+
+        if not manager.ready:
+            return
+        now = time.monotonic()
+        if now - manager.last_rx_time < STALL_TIMEOUT:
+            self._probe_sent_at = None
+            return
+        if self._probe_sent_at is None:
+            self._probe_sent_at = now
+            try:
+                manager.write_realtime("?")
+            except Exception as e:
+                manager.connection_lost(f"Status probe failed: {e}")
+        elif now - self._probe_sent_at > PROBE_TIMEOUT:
+            self._probe_sent_at = None
+            manager.connection_lost("Controller stopped responding")
@@ -0,0 +1,675 @@
+#!/usr/bin/env python3
+"""
+FluidNC Simulator
+Emulates a Maslow's FluidNC controller on a pty, a TCP port or in-process, for load and latency testing
+"""
+
+import argparse
+import logging
+import math
+import os
+import re
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from gcode_tokens import COMMENT_PATTERN, WORD_PATTERN
+
+logger = logging.getLogger(__name__)
+
+BANNER = "Grbl 3.7 [FluidNC v3.7.8 (simulator) '$' for help]"
+VERSION = "[VER:3.7 FluidNC v3.7.8 (simulator):]"
+UNLOCK_HINT = "[MSG:'$H'|'$X' to unlock]"
+
+RX_BUFFER_SIZE = 127   # bytes the controller buffers before it starts dropping input
+PLANNER_BLOCKS = 16    # motion blocks queued ahead of the one executing
+TICK = 0.005           # seconds between motion updates
+HOMING_TIME = 2.0      # seconds `$H` takes (before speedup)
+
+# Realtime bytes, acted on as they arrive and never stored in the RX buffer
+STATUS_QUERY, FEED_HOLD, CYCLE_START, RESET, JOG_CANCEL = 0x3F, 0x21, 0x7E, 0x18, 0x85
+REALTIME_PATTERN = re.compile(rb"[?!~\x18\x85]")
+
+# Alarm and error codes, as FluidNC numbers them
+ALARM_SOFT_LIMIT = 2
+ALARM_ABORT_CYCLE = 3
+ERROR_EXPECTED_COMMAND_LETTER = 1
+ERROR_BAD_NUMBER_FORMAT = 2
+ERROR_INVALID_STATEMENT = 3
+ERROR_IDLE = 8
+ERROR_ALARM_LOCK = 9
+ERROR_TRAVEL_EXCEEDED = 15
+ERROR_INVALID_JOG_COMMAND = 16
+ERROR_UNSUPPORTED_COMMAND = 20
+ERROR_UNDEFINED_FEED_RATE = 22
+
+LINE_PATTERN = re.compile(r"^(?:[A-Z][-+]?(?:\d+\.?\d*|\.\d+))*$")
+SUPPORTED_G = {0, 1, 2, 3, 4, 17, 18, 19, 20, 21, 53, 54, 55, 56, 57, 58, 59, 80, 90, 91, 92, 93, 94}
+SUPPORTED_M = {0, 1, 2, 3, 4, 5, 7, 8, 9, 30}
+JOG_G = {20, 21, 53, 90, 91}
+
+# `$$` (GRBL numbers) and `$S` (FluidNC names); $20 turns soft limits on, $130-$132 are max travel
+NUMERIC_SETTINGS = {
+    "0": "10", "1": "25", "2": "0", "3": "0", "4": "0", "5": "0", "6": "0", "10": "1", "11": "0.010",
+    "12": "0.002", "13": "0", "20": "0", "21": "0", "22": "0", "23": "0", "24": "25.000", "25": "500.000",
+    "26": "250", "27": "1.000", "30": "1000", "31": "0", "32": "0",
+    "100": "100.000", "101": "100.000", "102": "100.000", "110": "3000.000", "111": "3000.000",
+    "112": "600.000", "120": "100.000", "121": "100.000", "122": "100.000",
+    "130": "2400.000", "131": "1200.000", "132": "100.000",
+}
+NAMED_SETTINGS = {
+    "Report/Interval": "0", "Config/Filename": "maslow.yaml", "Hostname": "maslow", "WiFi/Mode": "STA",
+    "Sta/SSID": "", "Firmware/Build": "simulator", "Message/Level": "Info",
+}
+
+
+@dataclass
+class Block:
+    """One planned move (or dwell); `elapsed` advances as the simulated machine executes it"""
+    start: Tuple[float, float, float]
+    target: Tuple[float, float, float]
+    duration: float  # seconds at 1x
+    feed: float
+    jog: bool = False
+    elapsed: float = 0.0
+
+    def position(self) -> Tuple[float, float, float]:
+        fraction = min(self.elapsed / self.duration, 1.0) if self.duration else 1.0
+        return tuple(s + (t - s) * fraction for s, t in zip(self.start, self.target))
+
+
+class SimChannel:
+    """One connection to the simulator (the pty, a telnet client, an in-process transport)
+
+    Each has its own RX buffer, like FluidNC's serial and telnet channels. With a baud rate set,
+    bytes in both directions take as long as they would on a UART.
+    """
+
+    def __init__(self, simulator: "FluidNCSimulator", write: Callable[[bytes], None], name: str):
+        self.simulator = simulator
+        self.write = write
+        self.name = name
+        self.rx = bytearray()
+        self._write_lock = threading.Lock()
+
+    def receive(self, data: bytes):
+        """Bytes from the host, in the order they were sent"""
+        self.simulator.throttle(len(data))
+        self.simulator.receive(self, data)
+
+    def send(self, lines: List[str]):
+        if not lines:
+            return
+        data = "".join(line + "\r\n" for line in lines).encode()
+        with self._write_lock:
+            try:
+                self.write(data)
+            except OSError as e:
+                logger.debug(f"Simulator output to {self.name} dropped: {e}")
+            self.simulator.throttle(len(data))
+
+
+class FluidNCSimulator:
+    """Enough of FluidNC to stream jobs against: RX buffer, planner timing, replies, reports and alarms
+
+    Lines are taken from each channel's RX buffer one at a time; a motion line is answered `ok` once
+    its block fits in the planner, so a host that floods the controller sees the same backpressure as
+    on hardware. `speedup` runs motion (and homing) faster than real time.
+    """
+
+    def __init__(self, rx_buffer: int = RX_BUFFER_SIZE, planner_blocks: int = PLANNER_BLOCKS,
+                 baud_rate: int = 0, speedup: float = 1.0, alarm_on_start: bool = False,
+                 soft_limits: bool = False, report_interval: int = 0):
+        self.rx_buffer = rx_buffer
+        self.planner_blocks = planner_blocks
+        self.baud_rate = baud_rate
+        self.speedup = speedup
+        self.alarm_on_start = alarm_on_start
+
+        self.settings = {**NUMERIC_SETTINGS, **NAMED_SETTINGS}
+        self.settings["20"] = "1" if soft_limits else "0"
+        self.settings["Report/Interval"] = str(report_interval)
+
+        self.channels: List[SimChannel] = []
+        self.state = "Idle"
+        self.position = (0.0, 0.0, 0.0)
+        self.planner: Deque[Block] = deque()
+        self.hold = False
+        self.stats = {"lines": 0, "ok": 0, "errors": 0, "alarms": 0, "blocks": 0, "underruns": 0,
+                      "rx_overflows": 0, "status_reports": 0}
+
+        self._reset_modal()
+        self._epoch = 0  # bumped by a reset, so a line caught mid-execution is dropped unanswered
+        self._next_channel = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for target, name in ((self._protocol_loop, "sim-protocol"), (self._motion_loop, "sim-motion")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._boot()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
+
+    def attach(self, write: Callable[[bytes], None], name: str) -> SimChannel:
+        channel = SimChannel(self, write, name)
+        with self._condition:
+            self.channels.append(channel)
+        return channel
+
+    def detach(self, channel: SimChannel):
+        with self._condition:
+            if channel in self.channels:
+                self.channels.remove(channel)
+
+    def throttle(self, size: int):
+        """Wait as long as `size` bytes take on the wire (8N1: ten bits a byte)"""
+        if self.baud_rate:
+            time.sleep(size * 10 / self.baud_rate)
+
+    def receive(self, channel: SimChannel, data: bytes):
+        """Realtime bytes act now; the rest fills the channel's RX buffer, overflowing like a UART"""
+        start = 0
+        for match in REALTIME_PATTERN.finditer(data):
+            self._buffer(channel, data[start:match.start()])
+            self._realtime(channel, data[match.start()])
+            start = match.end()
+        self._buffer(channel, data[start:])
+
+    def _buffer(self, channel: SimChannel, data: bytes):
+        if not data:
+            return
+        with self._condition:
+            room = max(self.rx_buffer - len(channel.rx), 0)
+            if len(data) > room:
+                self.stats["rx_overflows"] += len(data) - room  # bytes lost, as on a UART
+                data = data[:room]
+            channel.rx += data
+            if b"\n" in data:
+                self._condition.notify_all()
+
+    def alarm(self, code: int):
+        """Stop everything and lock out G-code until `$X` or `$H`"""
+        with self._condition:
+            self._enter_alarm()
+        self._broadcast([f"ALARM:{code}"])
+
+    def status_report(self, channel: Optional[SimChannel] = None) -> str:
+        with self._condition:
+            self.stats["status_reports"] += 1
+            x, y, z = self.position
+            moving = self.planner and not self.hold and self.state in ("Run", "Jog")
+            feed = self.planner[0].feed if moving else 0.0
+            rx_free = self.rx_buffer - len(channel.rx) if channel is not None else self.rx_buffer
+            return (f"<{self.state}|MPos:{x:.3f},{y:.3f},{z:.3f}|Bf:{self.planner_blocks - len(self.planner)},"
+                    f"{rx_free}|FS:{feed:.0f},{self.spindle:.0f}>")
+
+    def describe_stats(self) -> str:
+        return "[SIM:" + ",".join(f"{key}={value}" for key, value in self.stats.items()) + "]"
+
+    # Realtime commands
+
+    def _realtime(self, channel: SimChannel, value: int):
+        if value == STATUS_QUERY:
+            channel.send([self.status_report(channel)])
+        elif value == RESET:
+            self._reset()
+        with self._condition:
+            if value in (FEED_HOLD, JOG_CANCEL) and self.state == "Jog":
+                # A hold during a jog cancels it, as jog cancel does
+                self._flush_planner(jog_only=True)
+            elif value == FEED_HOLD and self.state == "Run":
+                self.hold = True
+                self.state = "Hold:0"
+            elif value == CYCLE_START and self.hold:
+                self.hold = False
+                self.state = "Run" if self.planner else "Idle"
+            self._condition.notify_all()
+
+    def _reset(self):
+        """Ctrl-X: drop buffered input and planned motion; a reset while moving leaves the machine in alarm"""
+        with self._condition:
+            moving = bool(self.planner) and self.state in ("Run", "Jog", "Hold:0")
+            self._epoch += 1
+            self.planner.clear()
+            self.hold = False
+            for channel in self.channels:
+                channel.rx.clear()
+            self._reset_modal()
+            if moving:
+                self._enter_alarm()
+            self._condition.notify_all()
+        if moving:
+            self._broadcast([f"ALARM:{ALARM_ABORT_CYCLE}"])
+        self._boot(alarm=moving)
+
+    def _boot(self, alarm: bool = False):
+        lines = [BANNER]
+        with self._condition:
+            if alarm or self.alarm_on_start and self.stats["lines"] == 0:
+                self.state = "Alarm"
+                lines.append(UNLOCK_HINT)
+        self._broadcast(lines)
+
+    # Line protocol
+
+    def _protocol_loop(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                taken = self._take_line()
+                if taken is None:
+                    self._condition.wait(0.05)
+                    continue
+                epoch = self._epoch
+            channel, line = taken
+            replies = self._execute(line, epoch)
+            if replies is None:
+                continue  # reset while it ran: no reply, like the controller
+            with self._condition:
+                self.stats["lines"] += 1
+                self.stats["ok" if replies[-1] == "ok" else "errors"] += 1
+            channel.send(replies)
+
+    def _take_line(self) -> Optional[Tuple[SimChannel, str]]:
+        """Next complete line from the channels, round robin"""
+        count = len(self.channels)
+        for offset in range(count):
+            channel = self.channels[(self._next_channel + offset) % count]
+            end = channel.rx.find(b"\n")
+            if end >= 0:
+                line = bytes(channel.rx[:end])
+                del channel.rx[:end + 1]
+                self._next_channel = (self._next_channel + offset + 1) % count
+                return channel, line.decode("utf-8", errors="ignore").strip()
+        return None
+
+    def _execute(self, line: str, epoch: int) -> Optional[List[str]]:
+        if not line:
+            return ["ok"]
+        if line.startswith("$"):
+            return self._system_command(line, epoch)
+        with self._condition:
+            if self.state == "Alarm":
+                return [f"error:{ERROR_ALARM_LOCK}"]
+        words = self._parse_words(line)
+        if isinstance(words, str):
+            return [words]
+        return self._gcode(words, epoch)
+
+    def _parse_words(self, line: str):
+        """[(letter, value)] for a G-code line, or the error to answer with"""
+        text = COMMENT_PATTERN.sub(b"", line.encode()).decode().upper().replace(" ", "")
+        if not LINE_PATTERN.match(text):
+            return f"error:{ERROR_EXPECTED_COMMAND_LETTER if text[:1].isdigit() else ERROR_BAD_NUMBER_FORMAT}"
+        return [(letter, float(value)) for letter, value in WORD_PATTERN.findall(text)]
+
+    def _gcode(self, words: List[Tuple[str, float]], epoch: int, jog: bool = False) -> Optional[List[str]]:
+        modal = dict(self.modal)
+        axes: Dict[int, float] = {}
+        dwell = None
+        pause = 0.0
+        motion_word = False
+        for letter, value in words:
+            if letter == "G":
+                code = int(value)
+                if code != value or code not in (JOG_G if jog else SUPPORTED_G):
+                    return [f"error:{ERROR_INVALID_JOG_COMMAND if jog else ERROR_UNSUPPORTED_COMMAND}"]
+                if code in (0, 1, 2, 3):
+                    modal["motion"] = code
+                    motion_word = True
+                elif code in (20, 21):
+                    modal["metric"] = code == 21
+                elif code in (90, 91):
+                    modal["absolute"] = code == 90
+                elif code == 4:
+                    dwell = 0.0
+            elif letter == "M":
+                if jog or int(value) not in SUPPORTED_M:
+                    return [f"error:{ERROR_INVALID_JOG_COMMAND if jog else ERROR_UNSUPPORTED_COMMAND}"]
+                if int(value) in (3, 4):
+                    modal["spindle_on"] = True
+                elif int(value) in (2, 5, 30):
+                    modal["spindle_on"] = False
+            elif letter in "XYZ":
+                axes["XYZ".index(letter)] = value
+            elif letter == "F":
+                modal["feed"] = value
+            elif letter == "S":
+                modal["spindle"] = value
+            elif letter == "P":
+                pause = value
+            elif letter not in "NTIJKRP":
+                return [f"error:{ERROR_UNSUPPORTED_COMMAND}"]
+
+        if jog:
+            if not axes:
+                return [f"error:{ERROR_INVALID_JOG_COMMAND}"]
+            if not any(letter == "F" for letter, _ in words):
+                return [f"error:{ERROR_UNDEFINED_FEED_RATE}"]
+            modal["motion"] = 1
+        elif axes and modal["motion"] != 0 and modal["feed"] <= 0:
+            return [f"error:{ERROR_UNDEFINED_FEED_RATE}"]
+
+        with self._condition:
+            scale = 1.0 if modal["metric"] else 25.4
+            start = self.planner[-1].target if self.planner else self.position
+            target = list(start)
+            for axis, value in axes.items():
+                target[axis] = value * scale + (0.0 if modal["absolute"] else start[axis])
+            target = tuple(target)
+            if axes and self._beyond_limits(target):
+                if jog:
+                    return [f"error:{ERROR_TRAVEL_EXCEEDED}"]
+                self._enter_alarm()
+                alarm = True
+            else:
+                alarm = False
+            if not jog:
+                self.modal = {**modal, "motion": modal["motion"] if motion_word or axes else self.modal["motion"]}
+                self.spindle = modal["spindle"] if modal["spindle_on"] else 0.0
+        if alarm:
+            self._broadcast([f"ALARM:{ALARM_SOFT_LIMIT}"])
+            return ["ok"]
+
+        if dwell is not None:
+            return self._plan(Block(start, start, pause, 0.0), epoch)
+        if not axes or target == start:
+            return ["ok"]  # zero-length moves never reach the planner
+        distance = math.dist(start, target)  # arcs are timed as straight moves
+        rate = float(self.settings["110"]) if modal["motion"] == 0 else modal["feed"] * (1.0 if modal["metric"] else 25.4)
+        return self._plan(Block(start, target, distance / rate * 60.0, rate, jog=jog), epoch)
+
+    def _plan(self, block: Block, epoch: int) -> Optional[List[str]]:
+        """Queue a block, waiting for room in the planner; the `ok` goes out once it is queued"""
+        with self._condition:
+            while len(self.planner) >= self.planner_blocks and self._running and self._epoch == epoch:
+                self._condition.wait(0.05)
+            if self._epoch != epoch:
+                return None
+            if self.state == "Alarm":
+                return [f"error:{ERROR_ALARM_LOCK}"]
+            if block.jog and self.state not in ("Idle", "Jog"):
+                return [f"error:{ERROR_IDLE}"]
+            self.planner.append(block)
+            if not self.hold:
+                self.state = "Jog" if block.jog else "Run"
+            self._condition.notify_all()
+        return ["ok"]
+
+    def _beyond_limits(self, target: Tuple[float, float, float]) -> bool:
+        if self.settings["20"] != "1":
+            return False
+        travel = [float(self.settings[key]) for key in ("130", "131", "132")]
+        return any(abs(value) > limit / 2 for value, limit in zip(target, travel))
+
+    def _system_command(self, line: str, epoch: int) -> Optional[List[str]]:
+        command = line[1:]
+        upper = command.upper()
+        if upper == "":
+            return ["[HLP:$$ $S $# $G $I $N $x=val $J=line $X $H ~ ! ? ctrl-x]", "ok"]
+        if upper == "$":
+            return [f"${key}={self.settings[key]}" for key in NUMERIC_SETTINGS] + ["ok"]
+        if upper == "S":
+            return [f"${key}={self.settings[key]}" for key in NAMED_SETTINGS] + ["ok"]
+        if upper == "I":
+            return [VERSION, "[OPT:PHSW]", "[MSG:INFO: Machine Maslow S3 Board (simulated)]", "ok"]
+        if upper == "G":
+            modal = self.modal
+            return [f"[GC:G{modal['motion']} G54 G17 G{21 if modal['metric'] else 20} "
+                    f"G{90 if modal['absolute'] else 91} G94 M{3 if modal['spindle_on'] else 5} M9 T0 "
+                    f"F{modal['feed']:g} S{modal['spindle']:g}]", "ok"]
+        if upper == "#":
+            return [f"[G{n}:0.000,0.000,0.000]" for n in range(54, 60)] + [
+                "[G28:0.000,0.000,0.000]", "[G30:0.000,0.000,0.000]", "[G92:0.000,0.000,0.000]",
+                "[TLO:0.000]", "ok"]
+        if upper == "X":
+            with self._condition:
+                was_alarm = self.state == "Alarm"
+                if was_alarm:
+                    self.state = "Idle"
+            return (["[MSG:Caution: Unlocked]"] if was_alarm else []) + ["ok"]
+        if upper == "H":
+            return self._home(epoch)
+        if upper.startswith("J="):
+            with self._condition:
+                if self.state == "Alarm":
+                    return [f"error:{ERROR_ALARM_LOCK}"]
+                if self.state not in ("Idle", "Jog"):
+                    return [f"error:{ERROR_IDLE}"]
+            words = self._parse_words(command[2:])
+            if isinstance(words, str):
+                return [words]
+            return self._gcode(words, epoch, jog=True)
+        if upper in ("BYE", "ESP444=RESTART"):
+            threading.Timer(0.05, self._reset).start()
+            return ["ok"]
+        if upper.startswith("ESP"):
+            return ["ok"]
+        if upper == "SIM/STATS":
+            return [self.describe_stats(), "ok"]
+        if upper.startswith("SIM/ALARM="):
+            try:
+                code = int(command.split("=", 1)[1])
+            except ValueError:
+                return [f"error:{ERROR_BAD_NUMBER_FORMAT}"]
+            self.alarm(code)
+            return ["ok"]
+        key, has_value, value = command.partition("=")
+        known = next((k for k in self.settings if k.lower() == key.lower().lstrip("/")), None)
+        if known is None:
+            return [f"error:{ERROR_INVALID_STATEMENT}"]
+        if not has_value:
+            return [f"${known}={self.settings[known]}", "ok"]
+        self.settings[known] = value
+        return ["ok"]
+
+    def _home(self, epoch: int) -> Optional[List[str]]:
+        """Homing answers once it has finished, like the real thing"""
+        with self._condition:
+            if self.state not in ("Idle", "Alarm"):
+                return [f"error:{ERROR_IDLE}"]
+            self.state = "Home"
+        time.sleep(HOMING_TIME / self.speedup)
+        with self._condition:
+            if self._epoch != epoch:
+                return None
+            self.position = (0.0, 0.0, 0.0)
+            self.state = "Idle"
+        return ["ok"]
+
+    # Motion
+
+    def _motion_loop(self):
+        last = time.monotonic()
+        next_report = last
+        while True:
+            time.sleep(TICK)
+            now = time.monotonic()
+            with self._condition:
+                if not self._running:
+                    return
+                self._advance((now - last) * self.speedup)
+                interval = int(self.settings.get("Report/Interval") or 0) / 1000.0
+            last = now
+            if interval > 0 and now >= next_report:
+                next_report = now + interval
+                for channel in list(self.channels):
+                    channel.send([self.status_report(channel)])
+
+    def _advance(self, dt: float):
+        """Run the planner for `dt` seconds of machine time (caller holds the lock)"""
+        if self.hold or self.state in ("Alarm", "Home"):
+            return
+        finished = False
+        while dt > 0 and self.planner:
+            block = self.planner[0]
+            step = min(dt, block.duration - block.elapsed)
+            block.elapsed += step
+            dt -= step
+            self.position = block.position()
+            if block.elapsed >= block.duration:
+                self.planner.popleft()
+                self.stats["blocks"] += 1
+                finished = True
+        if finished:
+            if not self.planner:
+                self.stats["underruns"] += 1  # ran dry: the end of a job, or a host that couldn't keep up
+                self.state = "Idle"
+            else:
+                self.state = "Jog" if self.planner[0].jog else "Run"
+            self._condition.notify_all()
+
+    # Helpers (callers hold the lock where noted)
+
+    def _reset_modal(self):
+        self.modal = {"motion": 0, "metric": True, "absolute": True, "feed": 0.0, "spindle": 0.0,
+                      "spindle_on": False}
+        self.spindle = 0.0
+
+    def _enter_alarm(self):
+        """(lock held)"""
+        self.planner.clear()
+        self.hold = False
+        self.state = "Alarm"
+        self.stats["alarms"] += 1
+        self._condition.notify_all()
+
+    def _flush_planner(self, jog_only: bool = False):
+        """(lock held)"""
+        if jog_only:
+            self.planner = deque(block for block in self.planner if not block.jog)
+        else:
+            self.planner.clear()
+        if not self.planner:
+            self.state = "Idle"
+
+    def _broadcast(self, lines: List[str]):
+        for channel in list(self.channels):
+            channel.send(lines)
+
+
+def options_from_query(query: str) -> Dict[str, object]:
+    """Simulator options from a `sim://?baud=115200&speedup=10` port URL"""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    options: Dict[str, object] = {}
+    for name, key, kind in (("baud", "baud_rate", int), ("rx", "rx_buffer", int), ("planner", "planner_blocks", int),
+                            ("speedup", "speedup", float), ("report", "report_interval", int)):
+        if name in params:
+            options[key] = kind(params[name])
+    for name, key in (("alarm", "alarm_on_start"), ("limits", "soft_limits")):
+        if name in params:
+            options[key] = params[name].lower() in ("1", "true", "yes", "on")
+    return options
+
+
+def serve_pty(simulator: FluidNCSimulator) -> str:
+    """Open a pty pair and serve the simulator on it; returns the device to point the backend at"""
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)  # no echo, no line discipline: bytes arrive exactly as sent
+    channel = simulator.attach(lambda data: os.write(master, data), "pty")
+
+    def read():
+        # Holding `slave` open keeps reads from failing while no host has the port open
+        while True:
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                return
+            channel.receive(data)
+
+    threading.Thread(target=read, name="sim-pty", daemon=True).start()
+    return os.ttyname(slave)
+
+
+def serve_tcp(simulator: FluidNCSimulator, host: str, port: int) -> socket.socket:
+    """Serve the simulator like FluidNC's telnet server; every client is its own channel"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen()
+
+    def client(sock: socket.socket, address):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        channel = simulator.attach(sock.sendall, f"tcp {address[0]}:{address[1]}")
+        logger.info(f"🔌 Simulator client {channel.name} connected")
+        try:
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                channel.receive(data)
+        except OSError:
+            pass
+        simulator.detach(channel)
+        sock.close()
+        logger.info(f"🔌 Simulator client {channel.name} disconnected")
+
+    def accept():
+        while True:
+            try:
+                sock, address = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=client, args=(sock, address), daemon=True).start()
+
+    threading.Thread(target=accept, name="sim-tcp", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated FluidNC controller for running the backend without a Maslow")
+    parser.add_argument("--no-pty", action="store_true", help="Don't open a pty")
+    parser.add_argument("--tcp", type=int, metavar="PORT", help="Also serve on this TCP port, like FluidNC's telnet")
+    parser.add_argument("--host", default="127.0.0.1", help="Address for --tcp")
+    parser.add_argument("--baud", type=int, default=0, help="Throttle to this baud rate (default: unthrottled)")
+    parser.add_argument("--rx-buffer", type=int, default=RX_BUFFER_SIZE, help="RX buffer size in bytes")
+    parser.add_argument("--planner-blocks", type=int, default=PLANNER_BLOCKS, help="Planner queue length")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Run motion this many times faster than real time")
+    parser.add_argument("--report-interval", type=int, default=0, help="Status auto-report interval in ms")
+    parser.add_argument("--alarm-on-start", action="store_true", help="Boot locked, as after a failed homing")
+    parser.add_argument("--soft-limits", action="store_true", help="Alarm on moves beyond $130-$132 travel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    simulator = FluidNCSimulator(rx_buffer=args.rx_buffer, planner_blocks=args.planner_blocks,
+                                 baud_rate=args.baud, speedup=args.speedup, alarm_on_start=args.alarm_on_start,
+                                 soft_limits=args.soft_limits, report_interval=args.report_interval)
+    if not args.no_pty:
+        device = serve_pty(simulator)
+        logger.info(f"🤖 FluidNC simulator on {device}")
+        logger.info(f"   MASLOW_SERIAL_PORT={device}")
+    if args.tcp:
+        serve_tcp(simulator, args.host, args.tcp)
+        logger.info(f"🤖 FluidNC simulator on tcp://{args.host}:{args.tcp}")
+    simulator.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    simulator.stop()
+    logger.info(f"📊 {simulator.describe_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Maslow Frontend Assets
+Serves the built UI (frontend/dist) with precompressed variants and cache headers, and precompresses a build
+"""
+
+import argparse
+import gzip
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli  # optional; without it only .gz variants are made
+except ImportError:
+    brotli = None
+
+DEFAULT_DIST = Path(__file__).parent.parent / "frontend" / "dist"
+
+# Vite names everything under assets/ by content hash, so those never change under the same URL
+HASHED_DIR = "assets"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # index.html and public/ files: always check, usually a 304
+
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".svg", ".json", ".map", ".txt", ".xml", ".ico", ".wasm"}
+MIN_COMPRESS_SIZE = 1024  # smaller files aren't worth a variant
+MAX_RATIO = 0.9           # keep a variant only if it saves at least 10%
+
+# Preference order when the client accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+ACCEPT_PATTERN = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+Variant = Tuple[str, os.stat_result]
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """`br;q=1.0, gzip;q=0.8, *;q=0.1` -> {"br": 1.0, "gzip": 0.8, "*": 0.1}"""
+    accepted = {}
+    for item in header.split(","):
+        match = ACCEPT_PATTERN.fullmatch(item)
+        if match:
+            try:
+                accepted[match.group(1).lower()] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    return accepted
+
+
+class FrontendFiles(StaticFiles):
+    """StaticFiles that picks a `.br`/`.gz` sibling by Accept-Encoding and sets Cache-Control
+
+    Bytes go out through FileResponse, which hands the path to the server (`http.response.pathsend`,
+    sendfile) where the server supports it and streams chunks otherwise.
+    """
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(directory=directory, html=True, **kwargs)
+        self.root = os.path.realpath(directory)
+        self._variants: Dict[str, Tuple[float, Dict[str, Variant]]] = {}  # path -> (mtime, encoding -> variant)
+        self._variants_lock = threading.Lock()
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path = str(full_path)
+        relative = os.path.relpath(os.path.realpath(path), self.root)
+        headers = {"Cache-Control": IMMUTABLE if relative.startswith(HASHED_DIR + os.sep) else REVALIDATE}
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        if os.path.splitext(path)[1].lower() in COMPRESSIBLE:
+            headers["Vary"] = "Accept-Encoding"
+            variant = self.choose_variant(path, stat_result, request_headers.get("accept-encoding", ""))
+            if variant:
+                encoding, (path, stat_result) = variant
+                headers["Content-Encoding"] = encoding
+
+        response = FileResponse(path, status_code=status_code, headers=headers, media_type=media_type,
+                                stat_result=stat_result)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def choose_variant(self, path: str, stat_result: os.stat_result,
+                       accept_encoding: str) -> Optional[Tuple[str, Variant]]:
+        """The most preferred precompressed sibling the client accepts, if one exists and is current"""
+        accepted = accepted_encodings(accept_encoding)
+        if not accepted:
+            return None
+        variants = self.variants(path, stat_result)
+        for encoding, _ in ENCODINGS:
+            if encoding in variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding, variants[encoding]
+        return None
+
+    def variants(self, path: str, stat_result: os.stat_result) -> Dict[str, Variant]:
+        """Precompressed siblings of `path` that are at least as new as it, cached until it changes"""
+        with self._variants_lock:
+            cached = self._variants.get(path)
+        if cached and cached[0] == stat_result.st_mtime:
+            return cached[1]
+        found = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if variant_stat.st_mtime >= stat_result.st_mtime:
+                found[encoding] = (path + suffix, variant_stat)
+        with self._variants_lock:
+            self._variants[path] = (stat_result.st_mtime, found)
+        return found
+
+
+def precompress(directory: Path, force: bool = False) -> Dict[str, int]:
+    """Write `.gz` (and `.br` when brotli is installed) next to every compressible file in a build
+
+    Variants newer than their file are kept unless `force`; returns counts of files written and skipped.
+    """
+    counts = {"written": 0, "current": 0, "skipped": 0}
+    encoders = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, (".br", lambda data: brotli.compress(data, quality=11)))
+    for path in sorted(Path(directory).rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE:
+            continue
+        size = path.stat().st_size
+        if size < MIN_COMPRESS_SIZE:
+            counts["skipped"] += 1
+            continue
+        data = None
+        for suffix, compress in encoders:
+            target = path.with_name(path.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                counts["current"] += 1
+                continue
+            data = data if data is not None else path.read_bytes()
+            compressed = compress(data)
+            if len(compressed) > size * MAX_RATIO:
+                target.unlink(missing_ok=True)
+                counts["skipped"] += 1
+                continue
+            target.write_bytes(compressed)
+            counts["written"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress a frontend build for the backend to serve")
+    parser.add_argument("directory", type=Path, nargs="?", default=DEFAULT_DIST, help=f"default {DEFAULT_DIST}")
+    parser.add_argument("--force", action="store_true", help="Rewrite variants that look current")
+    args = parser.parse_args()
+
+    if not (args.directory / "index.html").exists():
+        raise SystemExit(f"❌ No build in {args.directory}; run `npm run build` in frontend/ first")
+    counts = precompress(args.directory, args.force)
+    kinds = ".br and .gz" if brotli is not None else ".gz only; pip install brotli for .br"
+    print(f"🗜️ {counts['written']} variants written ({kinds}), {counts['current']} current, "
+          f"{counts['skipped']} too small or incompressible")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+G-code Tokenizer
+Vectorized word tokenizer shared by the file analysis passes
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+import warnings
+
+import numpy as np
+
+COMMENT_PATTERN = re.compile(rb"\([^)\n]*\)|;[^\n]*")
+WORD_PATTERN = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+# A letter followed by its whole run of number characters, valid or not
+WORD_RUN_PATTERN = re.compile(r"([A-Z])\s*([-+.\d]+)")
+
+
+@dataclass
+class TokenizedGCode:
+    """Every letter/number word in a file, as parallel arrays"""
+    letters: np.ndarray   # uint8 ASCII code of each word letter
+    values: np.ndarray    # float64 value of each word
+    lines: np.ndarray     # int64 1-based source line of each word
+    line_count: int
+    malformed: List[Tuple[int, str]] = field(default_factory=list)  # (line, word) whose number did not parse
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
+    def select(self, letter: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (values, lines) of all words with the given letter"""
+        mask = self.letters == ord(letter.upper())
+        return self.values[mask], self.lines[mask]
+
+
+def _tokenize_fast(data: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tokenize with whole-buffer NumPy passes; raises ValueError on malformed numbers"""
+    raw = data.upper()
+    if b"(" in raw or b";" in raw:
+        raw = COMMENT_PATTERN.sub(b"", raw)
+    arr = np.frombuffer(raw.translate(None, b" \t\r"), dtype=np.uint8)
+    if arr.size == 0:
+        return np.zeros(0, np.uint8), np.zeros(0), np.zeros(0, np.int64)
+
+    is_num = ((arr >= 48) & (arr <= 57)) | (arr == 46) | (arr == 45) | (arr == 43)
+    starts = np.flatnonzero(is_num[1:] & ~is_num[:-1]) + 1
+    if is_num[0]:
+        starts = np.concatenate(([0], starts))
+
+    # Parse every numeric run in one C-level pass, then keep the ones that follow a letter
+    text = np.where(is_num, arr, 32).astype(np.uint8).tobytes()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            values = np.fromstring(text, dtype=np.float64, sep=" ")
+        except (DeprecationWarning, ValueError) as e:
+            raise ValueError(f"malformed number: {e}")
+    if len(values) != len(starts):
+        raise ValueError("malformed number")
+
+    letters = arr[np.maximum(starts - 1, 0)]
+    is_word = (starts > 0) & (letters >= 65) & (letters <= 90)
+    starts, letters, values = starts[is_word], letters[is_word], values[is_word]
+
+    lines = np.searchsorted(np.flatnonzero(arr == 10), starts) + 1
+    return letters, values, lines.astype(np.int64)
+
+
+def _tokenize_slow(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Tuple[int, str]]]:
+    """Line-by-line regex tokenizer; words whose number does not parse in full are set aside"""
+    letters: List[int] = []
+    values: List[float] = []
+    lines: List[int] = []
+    malformed: List[Tuple[int, str]] = []
+    for number, line in enumerate(text.upper().split("\n"), start=1):
+        line = COMMENT_PATTERN.sub(b"", line.encode()).decode()
+        for letter, value in WORD_RUN_PATTERN.findall(line):
+            try:
+                parsed = float(value)
+            except ValueError:
+                malformed.append((number, letter + value))
+                continue
+            letters.append(ord(letter))
+            values.append(parsed)
+            lines.append(number)
+    return (np.asarray(letters, dtype=np.uint8),
+            np.asarray(values, dtype=np.float64),
+            np.asarray(lines, dtype=np.int64),
+            malformed)
+
+
+def tokenize(data: bytes) -> TokenizedGCode:
+    """Tokenize raw G-code bytes into letter/value/line arrays"""
+    malformed: List[Tuple[int, str]] = []
+    try:
+        letters, values, lines = _tokenize_fast(data)
+    except ValueError:
+        letters, values, lines, malformed = _tokenize_slow(data.decode("utf-8", errors="ignore"))
+
+    line_count = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    return TokenizedGCode(letters=letters, values=values, lines=lines, line_count=line_count,
+                          malformed=malformed)
+
+
+def line_ranges(mask: np.ndarray, lines: np.ndarray, **fields: Any) -> List[Dict[str, Any]]:
+    """Collapse runs of flagged entries into source line ranges"""
+    if not mask.any():
+        return []
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2] - 1
+    return [
+        {
+            "start_line": int(lines[s]),
+            "end_line": int(lines[e]),
+            "samples": int(e - s + 1),
+            **fields,
+        }
+        for s, e in zip(starts, ends)
+    ]
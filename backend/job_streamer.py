@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Maslow Job Streamer
+Streams G-code files to the controller using GRBL character-counting flow control
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# FluidNC's serial RX buffer; stay below it so the controller never drops bytes
+RX_BUFFER_SIZE = 127
+PROGRESS_INTERVAL = 0.5  # seconds between progress broadcasts
+
+COMMENT_PATTERN = re.compile(r"\([^)]*\)|;.*")
+
+
+def load_job_lines(gcode_file: Path) -> List[str]:
+    """Read a G-code file into the lines that will actually be sent"""
+    lines = []
+    with open(gcode_file, "r", errors="ignore") as f:
+        for raw in f:
+            line = COMMENT_PATTERN.sub("", raw).strip()
+            if line and line != "%":
+                lines.append(line)
+    return lines
+
+
+class JobStreamer:
+    """Keeps the controller's RX buffer full while a file is running"""
+
+    def __init__(self, write_line: Callable[[str], None], write_realtime: Callable[[str], None],
+                 notify: Callable[[dict], None], rx_buffer_size: int = RX_BUFFER_SIZE,
+                 on_roundtrip: Optional[Callable[[float], None]] = None):
+        self.write_line = write_line
+        self.write_realtime = write_realtime
+        self.notify = notify
+        self.rx_buffer_size = rx_buffer_size
+        self.on_roundtrip = on_roundtrip  # called with each line's write-to-ack time in seconds
+
+        self.state = "idle"
+        self.filename: Optional[str] = None
+        self.lines: List[str] = []
+        self.sent = 0
+        self.acknowledged = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._inflight: Deque[Tuple[int, float]] = deque()  # (bytes, monotonic send time) per unacked line
+        self._inflight_bytes = 0
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()  # keeps lines in order when start/resume and acks both send
+        self._last_progress = 0.0
+
+    @property
+    def is_active(self) -> bool:
+        """True while a job is running or paused"""
+        return self.state in ("running", "paused")
+
+    @property
+    def buffer_fill(self) -> float:
+        """Fraction of the controller's RX buffer taken by unacknowledged lines"""
+        return self._inflight_bytes / self.rx_buffer_size
+
+    def start(self, gcode_file: Path):
+        """Start streaming a file; later lines are sent as the controller acknowledges earlier ones"""
+        if self.is_active:
+            raise Exception("A job is already running")
+
+        lines = load_job_lines(gcode_file)
+        with self._condition:
+            self.filename = gcode_file.name
+            self.lines = lines
+            self.sent = 0
+            self.acknowledged = 0
+            self.errors = []
+            self.started_at = time.time()
+            self.finished_at = None
+            self._inflight.clear()
+            self._inflight_bytes = 0
+            self.state = "running"
+
+        logger.info(f"▶️ Starting job {self.filename} ({len(lines)} lines)")
+        self._report(force=True)
+        self._fill()
+
+    def pause(self):
+        """Feed hold; the controller decelerates and keeps its buffer"""
+        if self.state != "running":
+            raise Exception("No running job to pause")
+        self.write_realtime("!")
+        with self._condition:
+            self.state = "paused"
+        self._report(force=True)
+
+    def resume(self):
+        """Cycle start after a pause"""
+        if self.state != "paused":
+            raise Exception("No paused job to resume")
+        self.write_realtime("~")
+        with self._condition:
+            done = self.acknowledged == len(self.lines)
+            self.state = "completed" if done else "running"
+            self._condition.notify_all()
+        if done:
+            self._finish()
+            return
+        self._report(force=True)
+        self._fill()
+
+    def stop(self):
+        """Abort the job: stop feeding lines, hold and soft-reset the controller"""
+        if not self.is_active:
+            raise Exception("No job to stop")
+        with self._condition:
+            self.state = "stopped"
+            self._condition.notify_all()
+        self.write_realtime("!")
+        self.write_realtime("\x18")
+        self._finish()
+
+    def fail(self, reason: str):
+        """End the job without touching the port, e.g. after the connection dropped"""
+        if not self.is_active:
+            return
+        with self._condition:
+            self.state = "error"
+            self.errors.append({"line": self.acknowledged + 1, "response": reason})
+        self._finish()
+
+    def on_response(self, response: str) -> bool:
+        """Handle an `ok`/`error:` line from the reader thread; returns True if it belonged to the job"""
+        with self._condition:
+            if not self._inflight:
+                return False
+            size, sent_at = self._inflight.popleft()
+            self._inflight_bytes -= size
+            self.acknowledged += 1
+            if response.startswith("error"):
+                self.errors.append({"line": self.acknowledged, "gcode": self.lines[self.acknowledged - 1],
+                                    "response": response})
+                logger.error(f"💥 Job line {self.acknowledged} failed: {response}")
+                self.state = "error"
+            self._condition.notify_all()
+        if self.on_roundtrip:
+            self.on_roundtrip(time.monotonic() - sent_at)
+
+        if self.state == "error":
+            self.write_realtime("!")
+            self._finish()
+        elif self.acknowledged == len(self.lines) and self.state in ("running", "paused"):
+            # The last line was accepted; if paused, the hold only delays motion already planned
+            with self._condition:
+                self.state = "completed"
+            self._finish()
+        else:
+            # Refill from the reader thread itself: no hand-off to another thread per acknowledged line
+            self._fill()
+            self._report()
+        return True
+
+    def progress(self) -> Dict[str, Any]:
+        """Snapshot of the current job"""
+        total = len(self.lines)
+        elapsed = None
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "state": self.state,
+            "filename": self.filename,
+            "total_lines": total,
+            "sent_lines": self.sent,
+            "acknowledged_lines": self.acknowledged,
+            "percent": round(100.0 * self.acknowledged / total, 1) if total else 0.0,
+            "elapsed": elapsed,
+            "errors": self.errors,
+        }
+
+    def _fill(self):
+        """Write lines while the controller's RX buffer has room for them"""
+        try:
+            with self._send_lock:
+                while True:
+                    with self._condition:
+                        if self.state != "running" or self.sent >= len(self.lines):
+                            return
+                        line = self.lines[self.sent]
+                        size = len(line) + 1
+                        if self._inflight and self._inflight_bytes + size > self.rx_buffer_size:
+                            return
+                        self._inflight.append((size, time.monotonic()))
+                        self._inflight_bytes += size
+                        self.sent += 1
+                    self.write_line(line)
+        except Exception as e:
+            logger.error(f"💥 Job streaming failed: {e}")
+            with self._condition:
+                self.state = "error"
+                self.errors.append({"line": self.sent, "response": str(e)})
+            self._finish()
+
+    def _finish(self):
+        """Record the end of a job and broadcast the final state"""
+        with self._condition:
+            self.finished_at = time.time()
+            self._inflight.clear()
+            self._inflight_bytes = 0
+            self._condition.notify_all()
+        logger.info(f"⏹️ Job {self.filename} finished: {self.state}")
+        self._report(force=True)
+
+    def _report(self, force: bool = False):
+        """Queue a progress message, throttled to PROGRESS_INTERVAL"""
+        now = time.time()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self.notify({"type": "job_progress", "job": self.progress(), "timestamp": now})
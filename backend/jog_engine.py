@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Maslow Jog Engine
+Continuous and step jogging with `$J=` commands and the realtime jog-cancel byte
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+JOG_CANCEL = "\x85"  # realtime: decelerate and drop every jog motion already planned
+JOG_AXES = ("X", "Y", "Z")
+
+SEGMENT_TIME = 0.1        # seconds of motion per continuous-jog segment
+LOOKAHEAD = 3             # segments kept queued ahead of the machine while held
+KEEPALIVE_TIMEOUT = 0.6   # a held jog with no keepalive for this long is treated as released
+STEP_QUEUE_LIMIT = 1.0    # seconds of step-jog motion allowed to be queued before more are refused
+
+
+class JogBusy(Exception):
+    """A jog was refused because enough motion is already queued"""
+
+
+def jog_line(moves: Dict[str, float], feed_rate: float) -> str:
+    """`$J=` line for a relative move; jogs never change the modal state (G91/G90) left for jobs"""
+    words = " ".join(f"{axis}{distance:.3f}" for axis, distance in moves.items() if distance)
+    return f"$J=G91 G21 {words} F{feed_rate:g}"
+
+
+def normalize_direction(direction: Dict[str, float]) -> Dict[str, float]:
+    """Unit vector over X/Y/Z from e.g. {"X": 1, "Y": -1}; raises ValueError if empty"""
+    unknown = [axis for axis in direction if axis.upper() not in JOG_AXES]
+    if unknown:
+        raise ValueError(f"Unknown jog axis: {', '.join(unknown)}")
+    vector = {axis.upper(): float(value) for axis, value in direction.items() if value}
+    length = math.sqrt(sum(v * v for v in vector.values()))
+    if not length:
+        raise ValueError("Jog direction is empty")
+    return {axis: value / length for axis, value in vector.items()}
+
+
+class JogEngine:
+    """Keeps a few short jog segments in flight while a jog is held and cancels them on release
+
+    Segments are paced by time so the planner never holds more than LOOKAHEAD of them, and only
+    one line at a time waits for its `ok`: lines still in the RX buffer would run after a cancel.
+    """
+
+    def __init__(self, write_line: Callable[[str], None], write_realtime: Callable[[str], None],
+                 notify: Callable[[dict], None], segment_time: float = SEGMENT_TIME,
+                 lookahead: int = LOOKAHEAD, keepalive_timeout: float = KEEPALIVE_TIMEOUT):
+        self.write_line = write_line
+        self.write_realtime = write_realtime
+        self.notify = notify
+        self.segment_time = segment_time
+        self.lookahead = lookahead
+        self.keepalive_timeout = keepalive_timeout
+
+        self.state = "idle"  # idle, jogging (held), stopping (cancel sent, waiting for in-flight lines)
+        self.direction: Dict[str, float] = {}
+        self.feed_rate = 0.0
+        self.segments = 0
+        self.last_error: Optional[str] = None
+        self.hold = 0  # id of the current hold; keepalives carry it, and stop() moves it on so late ones lapse
+
+        self._inflight: Deque[str] = deque()  # jog lines waiting for ok/error, oldest first
+        self._queued_until = 0.0  # monotonic time the motion already sent should finish
+        self._deadline = 0.0      # keepalive expiry while held
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()  # keeps jog lines on the wire in the order they were queued
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.state != "idle" or bool(self._inflight)
+
+    def start(self, direction: Dict[str, float], feed_rate: float, hold: Optional[int] = None) -> bool:
+        """Begin (or keep alive) a held jog; returns True if this started a new motion
+
+        Repeats with the same direction and feed only push the keepalive out, so key-repeat floods
+        never add motion. A new direction cancels the old one first. A keepalive that names its `hold`
+        never starts anything: once that hold was released or replaced, it is ignored.
+        """
+        direction = normalize_direction(direction)
+        if feed_rate <= 0:
+            raise ValueError("Feed rate must be positive")
+        with self._condition:
+            now = time.monotonic()
+            if hold is not None and (hold != self.hold or self.state != "jogging"):
+                return False  # arrived after its release (or after a newer hold began)
+            if self.state == "jogging" and direction == self.direction and feed_rate == self.feed_rate:
+                self._deadline = now + self.keepalive_timeout
+                return False
+            if hold is not None:
+                return False  # a keepalive can't change what is held
+            restart = self.state == "jogging"
+            self.hold += 1
+            self.direction, self.feed_rate = direction, float(feed_rate)
+            self.segments = 0
+            self.last_error = None
+            self.state = "jogging"
+            self._deadline = now + self.keepalive_timeout
+            self._queued_until = now
+            self._ensure_thread()
+            self._condition.notify_all()
+        if restart:
+            # Drop what the old direction had planned; acks for its in-flight lines are still counted
+            self.write_realtime(JOG_CANCEL)
+        logger.info(f"🕹️ Jog started: {self.describe_direction()} at F{feed_rate:g}")
+        return True
+
+    def stop(self, reason: str = "released"):
+        """Release: cancel the planned motion now, and again once any in-flight line has been accepted"""
+        with self._condition:
+            self.hold += 1
+            if self.state == "idle" and not self._inflight:
+                return
+            self.state = "stopping" if self._inflight else "idle"
+            if self._inflight:
+                self._ensure_thread()
+            self._condition.notify_all()
+        self.write_realtime(JOG_CANCEL)
+        logger.info(f"🕹️ Jog {reason} after {self.segments} segments")
+        self._report()
+
+    def step(self, moves: Dict[str, float], feed_rate: float) -> str:
+        """Queue one relative jog; raises JogBusy if more than STEP_QUEUE_LIMIT of motion is waiting"""
+        moves = {axis.upper(): float(distance) for axis, distance in moves.items() if distance}
+        unknown = [axis for axis in moves if axis not in JOG_AXES]
+        if unknown:
+            raise ValueError(f"Unknown jog axis: {', '.join(unknown)}")
+        if not moves:
+            raise ValueError("Jog distance is zero")
+        if feed_rate <= 0:
+            raise ValueError("Feed rate must be positive")
+        line = jog_line(moves, feed_rate)
+        duration = math.sqrt(sum(d * d for d in moves.values())) / feed_rate * 60.0
+        with self._send_lock:
+            with self._condition:
+                now = time.monotonic()
+                if self.state != "idle":
+                    raise JogBusy("A continuous jog is running")
+                if self._queued_until - now > STEP_QUEUE_LIMIT:
+                    raise JogBusy("Jog queue is full")
+                self._queued_until = max(self._queued_until, now) + duration
+                self._inflight.append(line)
+            try:
+                self.write_line(line)
+            except Exception:
+                with self._condition:
+                    self._inflight.remove(line)
+                raise
+        return line
+
+    def on_response(self, response: str) -> bool:
+        """Handle the `ok`/`error:` answering the oldest jog line (the reader routes only those here)"""
+        with self._condition:
+            if not self._inflight:
+                return False
+            line = self._inflight.popleft()
+            failed = response.startswith("error")
+            if failed:
+                self.last_error = response
+                logger.warning(f"🕹️ Jog refused: {line} -> {response}")
+                if self.state == "jogging":
+                    self.state = "stopping"
+            self._condition.notify_all()
+        if failed:
+            self.notify({"type": "jog_error", "command": line, "response": response, "timestamp": time.time()})
+        return True
+
+    def reset(self):
+        """Forget everything without touching the port, e.g. after a soft reset or lost connection"""
+        with self._condition:
+            self.state = "idle"
+            self._inflight.clear()
+            self._queued_until = 0.0
+            self._condition.notify_all()
+
+    def describe_direction(self) -> str:
+        return " ".join(f"{axis}{value:+.2f}" for axis, value in self.direction.items())
+
+    def progress(self) -> Dict[str, object]:
+        """Snapshot for the API"""
+        return {
+            "state": self.state,
+            "hold": self.hold,
+            "direction": self.direction,
+            "feed_rate": self.feed_rate,
+            "segments": self.segments,
+            "inflight": len(self._inflight),
+            "last_error": self.last_error,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="maslow-jog", daemon=True)
+            self._thread.start()
+
+    def _next_segment(self) -> str:
+        distance = self.feed_rate / 60.0 * self.segment_time
+        return jog_line({axis: value * distance for axis, value in self.direction.items()}, self.feed_rate)
+
+    def _run(self):
+        """Feed segments while held; finish the cancel once the last in-flight line is accepted"""
+        while True:
+            line = None
+            cancel = None
+            with self._condition:
+                now = time.monotonic()
+                if self.state == "jogging" and now >= self._deadline:
+                    self.state = "stopping" if self._inflight else "idle"
+                    cancel = "keepalive lost"
+                elif self.state == "jogging":
+                    ahead = self._queued_until - now
+                    if not self._inflight and ahead < self.lookahead * self.segment_time:
+                        line = self._next_segment()
+                        self._inflight.append(line)
+                        self._queued_until = max(self._queued_until, now) + self.segment_time
+                        self.segments += 1
+                    else:
+                        # Wake when a segment has run off the front of the queue (or on an ack)
+                        wait = ahead - (self.lookahead - 1) * self.segment_time
+                        self._condition.wait(min(max(wait, 0.005), self._deadline - now))
+                        continue
+                elif self.state == "stopping" and not self._inflight:
+                    self.state = "idle"
+                    cancel = "in-flight segment accepted"
+                else:
+                    self._condition.wait(self.segment_time)
+                    if self.state == "idle" and not self._inflight:
+                        self._thread = None
+                        return
+                    continue
+            try:
+                if line is not None:
+                    with self._send_lock:
+                        self.write_line(line)
+                if cancel is not None:
+                    self.write_realtime(JOG_CANCEL)
+                    logger.info(f"🕹️ Jog cancelled: {cancel}")
+                    self._report()
+            except Exception as e:
+                logger.error(f"💥 Jogging failed: {e}")
+                self.last_error = str(e)
+                with self._condition:
+                    self.state = "idle"
+                    self._inflight.clear()
+                    self._thread = None
+                self._report()
+                return
+
+    def _report(self):
+        self.notify({"type": "jog_state", "jog": self.progress(), "timestamp": time.time()})
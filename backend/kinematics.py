@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Maslow Belt Kinematics
+Vectorized belt-length computation and reachability checks for G-code toolpaths
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+from config_service import config_files
+from gcode_tokens import TokenizedGCode, line_ranges, tokenize
+from report_cache import ReportCache
+
+logger = logging.getLogger(__name__)
+
+# Anchor order used for every (N, 4) array in this module
+ANCHORS = ("tl", "tr", "br", "bl")
+
+# Maslow 4 factory defaults (FluidNC maslow.yaml), used when a key is missing
+DEFAULT_FRAME = {
+    "Maslow_tlX": -27.6, "Maslow_tlY": 2064.9, "Maslow_tlZ": 100.0,
+    "Maslow_trX": 2924.3, "Maslow_trY": 2066.5, "Maslow_trZ": 56.0,
+    "Maslow_brX": 2896.9, "Maslow_brY": 0.0, "Maslow_brZ": 89.0,
+    "Maslow_blX": 0.0, "Maslow_blY": 0.0, "Maslow_blZ": 111.0,
+    "Maslow_beltEndExtension": 30.0,
+    "Maslow_armLength": 123.4,
+}
+
+# Reach check settings (overridable under `kinematics:` in maslow.yaml)
+DEFAULT_LIMITS = {
+    "min_belt_length": 300.0,      # mm, arms foul the anchor below this
+    "max_belt_length": 3900.0,     # mm, usable belt on the spool
+    "max_included_angle": 165.0,   # deg between two neighbouring belts
+    "sample_spacing": 25.0,        # mm between checked points along a move
+}
+
+# Motion modal group: G0-G3 and probing move, G80 cancels; the controller starts in G0
+MOTION_MODES = {0: 1.0, 1: 1.0, 2: 1.0, 3: 1.0, 38.2: 1.0, 38.3: 1.0, 38.4: 1.0, 38.5: 1.0, 80: 0.0}
+# Non-modal codes that take a line's axis words for themselves (offsets, predefined positions,
+# machine coordinates), so those words are not a move in work coordinates
+AXIS_WORD_CODES = (10, 28, 30, 53, 92)
+
+MAX_REPORTED_SEGMENTS = 100
+MAX_SAMPLES = 4_000_000
+CHECK_CHUNK = 250_000  # samples checked between progress (and cancellation) checks
+CACHE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class FrameGeometry:
+    """Anchor positions and reach limits for one Maslow frame (all values in mm)"""
+    anchors: Tuple[Tuple[float, float, float], ...]
+    belt_end_extension: float
+    arm_length: float
+    min_belt_length: float
+    max_belt_length: float
+    max_included_angle: float
+    sample_spacing: float
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        """Frame centre in anchor coordinates; G-code coordinates are relative to it"""
+        xs = [a[0] for a in self.anchors]
+        ys = [a[1] for a in self.anchors]
+        return (sum(xs) / len(xs), sum(ys) / len(ys))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "FrameGeometry":
+        """Build a frame from a maslow.yaml / FluidNC config mapping"""
+        config = config or {}
+        values = {key: float(config.get(key, default)) for key, default in DEFAULT_FRAME.items()}
+        limits = dict(DEFAULT_LIMITS)
+        limits.update({k: float(v) for k, v in (config.get("kinematics") or {}).items() if k in limits})
+
+        anchors = tuple(
+            (values[f"Maslow_{name}X"], values[f"Maslow_{name}Y"], values[f"Maslow_{name}Z"])
+            for name in ANCHORS
+        )
+        return cls(
+            anchors=anchors,
+            belt_end_extension=values["Maslow_beltEndExtension"],
+            arm_length=values["Maslow_armLength"],
+            **limits,
+        )
+
+    @classmethod
+    def from_file(cls, config_file: Path) -> "FrameGeometry":
+        """Build a frame from a YAML config file, falling back to defaults"""
+        config = config_files.load_yaml(config_file).data if config_file.exists() else None
+        if not isinstance(config, dict):
+            config = {}
+        return cls.from_config(config)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation"""
+        return {
+            "anchors": {name: list(a) for name, a in zip(ANCHORS, self.anchors)},
+            "center": list(self.center),
+            "belt_end_extension": self.belt_end_extension,
+            "arm_length": self.arm_length,
+            "min_belt_length": self.min_belt_length,
+            "max_belt_length": self.max_belt_length,
+            "max_included_angle": self.max_included_angle,
+            "sample_spacing": self.sample_spacing,
+        }
+
+
+def belt_lengths(frame: FrameGeometry, points: np.ndarray) -> np.ndarray:
+    """Compute all four belt lengths for an (N, 3) array of work coordinates.
+
+    Returns an (N, 4) array ordered like ANCHORS.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    cx, cy = frame.center
+    anchors = np.asarray(frame.anchors, dtype=np.float64)  # (4, 3)
+
+    dx = anchors[None, :, 0] - (points[:, 0:1] + cx)
+    dy = anchors[None, :, 1] - (points[:, 1:2] + cy)
+    dz = anchors[None, :, 2] - points[:, 2:3]
+    return np.sqrt(dx * dx + dy * dy + dz * dz) - (frame.belt_end_extension + frame.arm_length)
+
+
+def _belt_pair_checks(frame: FrameGeometry, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inside-frame and tension tests for each pair of neighbouring belts, shape (N, 4).
+
+    Column i compares belt i with belt i+1. The angle between them approaches
+    180 degrees as the sled nears the frame edge between those two anchors,
+    where the belts become collinear and can no longer hold the sled against
+    sideways forces. The angle is compared through its cosine to avoid arctan2.
+    """
+    cx, cy = frame.center
+    anchors = np.asarray(frame.anchors, dtype=np.float64)[:, :2]
+    vx = anchors[None, :, 0] - (points[:, 0:1] + cx)
+    vy = anchors[None, :, 1] - (points[:, 1:2] + cy)
+    nx = np.roll(vx, -1, axis=1)
+    ny = np.roll(vy, -1, axis=1)
+
+    # Anchors are ordered clockwise, so points inside the frame give a negative cross product
+    inside = (vx * ny - vy * nx) < 0.0
+    norms = np.hypot(vx, vy)
+    dot = vx * nx + vy * ny
+    limit = np.cos(np.radians(frame.max_included_angle))
+    tensioned = dot >= limit * norms * np.roll(norms, -1, axis=1)
+    return inside, tensioned
+
+
+def check_points(frame: FrameGeometry, points: np.ndarray) -> Dict[str, np.ndarray]:
+    """Classify every point as reachable and/or well-tensioned"""
+    lengths = belt_lengths(frame, points)
+    inside, pair_tensioned = _belt_pair_checks(frame, points)
+
+    length_ok = np.all((lengths >= frame.min_belt_length) & (lengths <= frame.max_belt_length), axis=1)
+    reachable = np.all(inside, axis=1) & length_ok
+    tensioned = reachable & np.all(pair_tensioned, axis=1)
+
+    return {
+        "lengths": lengths,
+        "reachable": reachable,
+        "tensioned": tensioned,
+    }
+
+
+def _modal_state(line_count: int, g_values: np.ndarray, g_lines: np.ndarray,
+                 mapping: Dict[float, float], default: float) -> np.ndarray:
+    """Forward-fill a modal G-code state (e.g. G90/G91) to every source line"""
+    state = np.full(line_count + 1, np.nan)
+    state[0] = default
+    for code, value in mapping.items():
+        state[g_lines[g_values == code]] = value
+    index = np.where(np.isnan(state), 0, np.arange(len(state)))
+    return state[np.maximum.accumulate(index)]
+
+
+def _resolve_axis(values: np.ndarray, absolute: np.ndarray) -> np.ndarray:
+    """Turn per-move axis words (NaN when absent) into absolute positions.
+
+    A move in G90 with the word present pins the position; G91 words add to
+    the last pinned position.
+    """
+    present = ~np.isnan(values)
+    anchor = absolute & present
+    increments = np.cumsum(np.where(~absolute & present, values, 0.0))
+    last = np.maximum.accumulate(np.where(anchor, np.arange(len(values)), -1))
+    safe = np.maximum(last, 0)
+    base = np.where(last >= 0, values[safe] - increments[safe], 0.0)
+    return base + increments
+
+
+def extract_toolpath(tokens: TokenizedGCode) -> Tuple[np.ndarray, np.ndarray]:
+    """Extract move endpoints from a tokenized G-code file.
+
+    Returns an (N, 3) array of absolute work coordinates (mm) and an (N,) array
+    of 1-based source line numbers. Arcs are treated as straight moves between
+    their endpoints. Axis words are only moves under a motion mode (G0-G3,
+    G38.x) and not on G10/G28/G30/G53/G92 lines.
+    """
+    g_values, g_lines = tokens.select("G")
+    absolute = _modal_state(tokens.line_count, g_values, g_lines, {90: 1.0, 91: 0.0}, 1.0) == 1.0
+    scale = _modal_state(tokens.line_count, g_values, g_lines, {20: 25.4, 21: 1.0}, 1.0)
+    moving = _modal_state(tokens.line_count, g_values, g_lines, MOTION_MODES, 1.0) == 1.0
+    moving[g_lines[np.isin(g_values, AXIS_WORD_CODES)]] = False
+
+    per_line = np.full((tokens.line_count + 1, 3), np.nan)
+    for column, letter in enumerate("XYZ"):
+        values, lines = tokens.select(letter)
+        per_line[lines, column] = values
+
+    rows = np.flatnonzero(~np.all(np.isnan(per_line), axis=1) & moving)
+    if len(rows) == 0:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64)
+
+    moves = per_line[rows] * scale[rows, None]
+    points = np.column_stack([_resolve_axis(moves[:, i], absolute[rows]) for i in range(3)])
+    return points, rows.astype(np.int64)
+
+
+def densify(points: np.ndarray, line_numbers: np.ndarray, spacing: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Insert samples along each move so no two checked points are more than `spacing` apart.
+
+    The well-tensioned region is not convex, so a move between two good
+    endpoints can still clip the frame edge. Samples inherit the line number
+    of the move they belong to. Spacing is widened if the path would need
+    more than MAX_SAMPLES points.
+    """
+    if len(points) < 2 or spacing <= 0:
+        return points, line_numbers
+
+    deltas = np.diff(points, axis=0)
+    steps = np.maximum(np.ceil(np.linalg.norm(deltas[:, :2], axis=1) / spacing), 1)
+    if steps.sum() > MAX_SAMPLES:
+        steps = np.maximum(np.floor(steps * (MAX_SAMPLES / steps.sum())), 1)
+    steps = steps.astype(np.int64)
+    segment = np.repeat(np.arange(len(deltas)), steps)
+    offsets = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+    fraction = (offsets + 1) / steps[segment]
+
+    samples = points[segment] + fraction[:, None] * deltas[segment]
+    return (np.vstack([points[:1], samples]),
+            np.concatenate([line_numbers[:1], line_numbers[segment + 1]]))
+
+
+def analyze_toolpath(frame: FrameGeometry, points: np.ndarray, line_numbers: np.ndarray,
+                     progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """Run the reach and tension checks over a whole toolpath, calling `progress` between chunks"""
+    step = progress or (lambda fraction: None)
+    if len(points) == 0:
+        return {
+            "points": 0,
+            "samples": 0,
+            "reachable": True,
+            "well_tensioned": True,
+            "belt_length_range": {},
+            "segments": [],
+            "segments_truncated": False,
+        }
+
+    moves = len(points)
+    points, line_numbers = densify(points, line_numbers, frame.sample_spacing)
+    step(0.5)
+    chunks = []
+    for start in range(0, len(points), CHECK_CHUNK):
+        chunks.append(check_points(frame, points[start:start + CHECK_CHUNK]))
+        step(0.5 + 0.45 * min(start + CHECK_CHUNK, len(points)) / len(points))
+    lengths = np.concatenate([chunk["lengths"] for chunk in chunks])
+    reachable = np.concatenate([chunk["reachable"] for chunk in chunks])
+    tensioned = np.concatenate([chunk["tensioned"] for chunk in chunks])
+    unreachable = ~reachable
+    slack = reachable & ~tensioned
+
+    segments = line_ranges(unreachable, line_numbers, reason="unreachable")
+    segments += line_ranges(slack, line_numbers, reason="poorly_tensioned")
+    segments.sort(key=lambda s: s["start_line"])
+
+    return {
+        "points": moves,
+        "samples": int(len(points)),
+        "reachable": not bool(unreachable.any()),
+        "well_tensioned": not bool(unreachable.any() or slack.any()),
+        "unreachable_points": int(unreachable.sum()),
+        "poorly_tensioned_points": int(slack.sum()),
+        "belt_length_range": {
+            name: [float(lengths[:, i].min()), float(lengths[:, i].max())]
+            for i, name in enumerate(ANCHORS)
+        },
+        "segments": segments[:MAX_REPORTED_SEGMENTS],
+        "segments_truncated": len(segments) > MAX_REPORTED_SEGMENTS,
+    }
+
+
+class ReachabilityChecker(ReportCache):
+    """Caches toolpath reach reports per (file hash, frame geometry)"""
+
+    max_entries = CACHE_SIZE
+
+    def compute(self, data: bytes, frame: FrameGeometry,
+                progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Build the reach report for raw G-code bytes"""
+        step = progress or (lambda fraction: None)
+        tokens = tokenize(data)
+        step(0.2)
+        points, line_numbers = extract_toolpath(tokens)
+        step(0.35)
+        report = analyze_toolpath(frame, points, line_numbers, step)
+        report["frame"] = frame.as_dict()
+        logger.info(f"📐 Reach check: {report['points']} points, {len(report['segments'])} flagged segments")
+        return report
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Maslow Log Pipeline
+Queue-based logging so serial threads never block on stderr, with per-category sampling and rate limits
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("MASLOW_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("MASLOW_LOG_FORMAT", "text")  # "json" for one JSON object per line
+SERIAL_LOG = os.getenv("MASLOW_SERIAL_LOG")          # optional file receiving all serial traffic as JSON lines
+
+# Traffic categories, passed as `extra=` so hot paths don't build a dict per call
+RX = {"category": "rx"}          # lines received from the controller
+TX = {"category": "tx"}          # commands written to the controller
+STATUS = {"category": "status"}  # status reports and their parsing
+
+# Console defaults: keep 1 in N records of a category, and at most N records per second
+DEFAULT_SAMPLE_EVERY = {"status": 20}
+DEFAULT_RATE_LIMITS = {"rx": 20.0, "tx": 20.0, "status": 5.0}
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_category_settings(value: Optional[str], defaults: Dict[str, float]) -> Dict[str, float]:
+    """Parse "rx=20,status=5" on top of the defaults (0 disables a category's limit)"""
+    settings = dict(defaults)
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, number = item.split("=", 1)
+            settings[name.strip()] = float(number)
+    return settings
+
+
+class TrafficFilter(logging.Filter):
+    """Samples and rate-limits records tagged with a category; warnings and untagged records always pass
+
+    Counters are updated without a lock: a race only nudges which record gets sampled.
+    """
+
+    def __init__(self, sample_every: Dict[str, float], rate_limits: Dict[str, float]):
+        super().__init__()
+        self.sample_every = {k: int(v) for k, v in sample_every.items() if v > 1}
+        self.rate_limits = {k: v for k, v in rate_limits.items() if v > 0}
+        self._seen: Dict[str, int] = {}
+        self._window: Dict[str, int] = {}
+        self._passed: Dict[str, int] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = getattr(record, "category", None)
+        if category is None or record.levelno >= logging.WARNING:
+            return True
+
+        every = self.sample_every.get(category)
+        if every:
+            seen = self._seen[category] = self._seen.get(category, 0) + 1
+            if seen % every:
+                return False
+
+        limit = self.rate_limits.get(category)
+        if limit:
+            window = int(time.monotonic())
+            if self._window.get(category) != window:
+                self._window[category] = window
+                self._passed[category] = 0
+            if self._passed[category] >= limit:
+                self._suppressed[category] = self._suppressed.get(category, 0) + 1
+                return False
+            self._passed[category] += 1
+            suppressed = self._suppressed.pop(category, 0)
+            if suppressed:
+                record.suppressed = suppressed
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """The usual one-line format, noting how many similar records the rate limit dropped"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} [+{suppressed} {record.category} suppressed]" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key in ("category", "suppressed"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener with only the message filled in; formatting happens on the listener thread
+
+    The %-args are merged here, so a mutable argument is logged as it was at the call, not as it is later.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)  # extra fields such as `category` come along
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT, serial_log: Optional[str] = SERIAL_LOG):
+    """Route all logging through a queue to a listener thread (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    traffic_filter = TrafficFilter(
+        parse_category_settings(os.getenv("MASLOW_LOG_SAMPLE"), DEFAULT_SAMPLE_EVERY),
+        parse_category_settings(os.getenv("MASLOW_LOG_RATE"), DEFAULT_RATE_LIMITS),
+    )
+
+    console = logging.StreamHandler()
+    console.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter(TEXT_FORMAT))
+    handlers = [console]
+
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    if serial_log:
+        # The traffic log sees every record, so sampling moves to the console side of the queue
+        traffic = logging.FileHandler(serial_log)
+        traffic.setFormatter(JsonFormatter())
+        traffic.addFilter(lambda record: hasattr(record, "category"))
+        handlers.append(traffic)
+        console.addFilter(traffic_filter)
+    else:
+        # Nothing else wants the dropped records, so drop them before they are queued
+        queue_handler.addFilter(traffic_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Maslow Macros
+Named command sequences stored in config/macros.yaml and run as one pipelined batch
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config_service import config_files
+
+MACRO_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class MacroStore:
+    """Macros keyed by name: {"description": ..., "commands": [...], "stop_on_error": bool}"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored macro (shared with the config cache; don't mutate)"""
+        if not self.path.exists():
+            return {}
+        data = config_files.load_yaml(self.path).data
+        return (data or {}).get("macros") or {}
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.all().get(name)
+
+    def save(self, name: str, commands: List[str], description: str = "", stop_on_error: bool = True) -> Dict[str, Any]:
+        """Create or replace a macro"""
+        if not MACRO_NAME.match(name):
+            raise ValueError("Macro names may only use letters, digits, '.', '_' and '-'")
+        commands = [c.strip() for c in commands if c.strip()]
+        if not commands:
+            raise ValueError("A macro needs at least one command")
+        macro = {"description": description, "commands": commands, "stop_on_error": stop_on_error}
+        with self._lock:
+            macros = dict(self.all())
+            macros[name] = macro
+            config_files.write_yaml(self.path, {"macros": macros})
+        return macro
+
+    def delete(self, name: str) -> bool:
+        """Remove a macro; returns False if there was none"""
+        with self._lock:
+            macros = dict(self.all())
+            if macros.pop(name, None) is None:
+                return False
+            config_files.write_yaml(self.path, {"macros": macros})
+        return True
@@ -7,30 +7,70 @@ FastAPI backend with WebSocket support for real-time communication
 import asyncio
 import json
 import os
+import tempfile
 import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Deque, Dict, List, Optional
 import logging
 
-import serial
-import serial.tools.list_ports
 import yaml
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, FastAPI, Request, Response, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from analysis_pool import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_JOB,
+    AnalysisCancelled, AnalysisPool, AnalysisQueueFull,
+)
+from command_trace import CommandTrace, CommandTracer, RequestTimingMiddleware, classify_command
+from config_apply import APPLY_NONE, APPLY_RESTART, APPLY_RUNTIME, ConfigDiff, diff_configs, split_results
+from config_service import ConfigEntry, config_files, parse_json, parse_yaml
+from connection_supervisor import ConnectionSupervisor
+from frontend_assets import DEFAULT_DIST, FrontendFiles
+from job_streamer import RX_BUFFER_SIZE, JobStreamer
+from jog_engine import JOG_CANCEL, JogBusy, JogEngine, jog_line
+from kinematics import FrameGeometry, ReachabilityChecker
+from log_pipeline import RX, STATUS, TX, setup_logging
+from macros import MacroStore
+from metrics import EVENT_LOOP_LAG, REGISTRY, WEBSOCKET_SEND, SerialMetrics
+from port_discovery import PortDiscovery, PortInfo
+from preflight import PreflightValidator, WorkArea
+from serial_mux import SerialMux
+from serial_worker import EVENT_LOST, EVENT_NOTIFY, EVENT_RX, SerialWorker, WorkerJobStreamer, WorkerPort
+from session_recording import SESSION_SUFFIX
+from settings_cache import DUMP_COMMANDS, SettingsCache, setting_queries
+from transport import LineAssembler, is_url, open_transport
+
+# Configure logging (queued, so serial threads never wait on stderr)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Configuration
-SERIAL_PORT = os.getenv("MASLOW_SERIAL_PORT", "/dev/cu.usbmodem12201")
+SERIAL_PORT = os.getenv("MASLOW_SERIAL_PORT")  # optional override (device, tcp://host:port, loop://, sim://, replay://); otherwise auto-detected
+DEFAULT_MACHINE_ID = "default"
+SERIAL_WORKER = os.getenv("MASLOW_SERIAL_WORKER", "thread")  # "process" runs serial I/O in a child process
 BAUD_RATE = 115200
+READ_TIMEOUT = 0.05   # seconds; keeps the worker event thread responsive to shutdown
+READY_TIMEOUT = 3.0   # seconds to wait for the FluidNC banner or a $I reply
+READY_RETRY = 0.5     # seconds between $I probes while waiting
+SETTINGS_TIMEOUT = 5.0  # seconds to wait for a settings dump
+BATCH_TIMEOUT = 30.0    # default seconds to wait for a batch or macro to finish
+HOMING_TIMEOUT = 120.0  # homing only answers once the machine has finished moving
+LOOP_LAG_INTERVAL = 0.25  # seconds between event-loop lag samples
+TRACE_BUFFER = int(os.getenv("MASLOW_TRACE_BUFFER", "1000"))  # command traces kept for /api/debug/traces
+SLOW_COMMAND_MS = os.getenv("MASLOW_SLOW_COMMAND_MS")  # log commands slower than this (off when unset)
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 GCODE_DIR = Path(__file__).parent.parent / "gcode_files"
+MUX_DIR = os.getenv("MASLOW_MUX_DIR", tempfile.gettempdir())  # where maslow-<machine>.sock is served; empty disables
+RECORD_DIR = os.getenv("MASLOW_RECORD_DIR")  # record every connection's serial traffic here (off when unset)
+FRONTEND_DIST = os.getenv("MASLOW_FRONTEND_DIST", str(DEFAULT_DIST))  # built UI served at /; empty disables
+
+# Single-byte commands the controller acts on immediately, without a newline or an `ok`
+REALTIME_COMMANDS = {"?", "!", "~", "\x18", JOG_CANCEL}
 
 # Ensure directories exist
 GCODE_DIR.mkdir(exist_ok=True)
@@ -45,6 +85,11 @@ class JogCommand(BaseModel):
     distance: float
     feed_rate: Optional[int] = 1000
 
+class JogStart(BaseModel):
+    axes: Dict[str, float]  # direction, e.g. {"X": 1, "Y": -1}
+    feed_rate: Optional[int] = 1000
+    hold: Optional[int] = None  # set on keepalives: the `hold` returned when this jog started
+
 class MachineStatus(BaseModel):
     connected: bool
     status: str
@@ -55,17 +100,41 @@ class MachineStatus(BaseModel):
 class ConfigUpdate(BaseModel):
     config: Dict[str, Any]
 
+class BatchRequest(BaseModel):
+    commands: List[str]
+    stop_on_error: Optional[bool] = True
+    timeout: Optional[float] = BATCH_TIMEOUT
+
+class MacroDefinition(BaseModel):
+    commands: List[str]
+    description: Optional[str] = ""
+    stop_on_error: Optional[bool] = True
+
+class MacroRun(BaseModel):
+    stop_on_error: Optional[bool] = None  # None: use the macro's own setting
+    timeout: Optional[float] = BATCH_TIMEOUT
+
+class JobStart(BaseModel):
+    filename: str
+    override_preflight: Optional[bool] = False
+
 # Global variables
 app = FastAPI(title="Maslow CNC Serial API", version="1.0.0")
-serial_connection: Optional[serial.Serial] = None
-connected_clients: List[WebSocket] = []
-machine_status = {
-    "connected": False,
-    "status": "Disconnected",
-    "position": {"x": 0.0, "y": 0.0, "z": 0.0},
-    "feed_rate": 0.0,
-    "spindle_speed": 0.0
+machine_router = APIRouter()
+machines: Dict[str, "SerialManager"] = {}
+connected_clients: Dict[str, List[WebSocket]] = {}  # WebSocket channels per machine id
+system_messages: List[dict] = []  # broadcast to every channel (analysis progress, hotplug)
+port_claim_lock = threading.Lock()
+analysis_caches = {
+    "preflight": PreflightValidator(),
+    "reachability": ReachabilityChecker(),
 }
+analysis_pool: Optional[AnalysisPool] = None
+macro_store = MacroStore(CONFIG_DIR / "macros.yaml")
+command_tracer = CommandTracer(TRACE_BUFFER, float(SLOW_COMMAND_MS) / 1000 if SLOW_COMMAND_MS else None)
+
+# Stamps each request's arrival for command traces
+app.add_middleware(RequestTimingMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -76,18 +145,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class SerialManager:
-    """Manages serial communication with the Maslow CNC"""
+def load_machine_configs() -> List[Dict[str, Any]]:
+    """Machines from config/machines.yaml, or a single default machine"""
+    machines_file = CONFIG_DIR / "machines.yaml"
+    if machines_file.exists():
+        with open(machines_file, 'r') as f:
+            entries = (yaml.safe_load(f) or {}).get("machines") or []
+        if entries:
+            return entries
+    return [{"id": DEFAULT_MACHINE_ID, "name": "Maslow", "port": SERIAL_PORT}]
+
+def get_autoreport_interval() -> int:
+    """Status auto-report interval (ms) from preferences.json, 0 to disable"""
+    try:
+        prefs = config_files.load_json(CONFIG_DIR / "preferences.json").data
+        if isinstance(prefs, list):
+            prefs = prefs[0] if prefs else {}
+        return int(prefs.get("autoreport_interval", 0))
+    except Exception:
+        return 0
+
+class ResponseCollector(list):
+    """Lines read while a command waits for its responses, and when they started and ended"""
     
     def __init__(self):
+        super().__init__()
+        self.sent_at = time.monotonic()
+        self.first_rx_at: Optional[float] = None  # first line of its own reply, not a status report
+        self.acked_at: Optional[float] = None
+        self.ack: Optional[str] = None
+        self.acknowledged = threading.Event()  # set on every ok/error for this collector's own lines
+
+class SerialManager:
+    """Manages serial communication with one Maslow CNC"""
+    
+    def __init__(self, machine_id: str = DEFAULT_MACHINE_ID, name: Optional[str] = None,
+                 port: Optional[str] = None, serial_number: Optional[str] = None,
+                 config_file: str = "maslow.yaml"):
+        self.machine_id = machine_id
+        self.name = name or machine_id
+        self.preferred_port = port
+        self.serial_number = serial_number
+        self.config_file = CONFIG_DIR / config_file
+        self.logger = logger.getChild(machine_id)
+        self.metrics = SerialMetrics(machine_id)
+        self.status = {
+            "connected": False,
+            "status": "Disconnected",
+            "position": {"x": 0.0, "y": 0.0, "z": 0.0},
+            "feed_rate": 0.0,
+            "spindle_speed": 0.0
+        }
         self.serial_port = None
+        self.port_name: Optional[str] = None
         self.is_connected = False
+        self.ready = False
+        self.ready_event = threading.Event()
+        self.state = "disconnected"
+        self.last_rx_time = 0.0
+        self.applied_config: Optional[Dict[str, Any]] = None  # last config pushed to the controller
+        self.config_pending = False  # saved while disconnected; applied once the controller is ready
+        self.settings = SettingsCache()
+        self.controller_buffer: Dict[str, int] = {}  # free planner blocks / RX bytes from `Bf:` reports
         self.read_thread = None
         self.stop_reading = False
         self.message_queue = []
+        self.write_lock = threading.Lock()
+        self.response_collectors: List[ResponseCollector] = []
+        self.collector_lock = threading.Lock()
+        # Who each line on the wire belongs to, oldest first: the controller answers lines in order, so
+        # every ok/error goes to exactly one owner (a collector, "job", "jog", "mux", or None for nobody)
+        self.pending_acks: Deque[Any] = deque()
+        self.ack_lock = threading.Lock()
+        self.job_streamer = JobStreamer(self.line_writer("job"), self.write_realtime, self.add_to_queue,
+                                        on_roundtrip=self.metrics.job_roundtrip.observe)
+        self.jog_engine = JogEngine(self.line_writer("jog"), self.write_realtime, self.add_to_queue)
+        self.mux = SerialMux(os.path.join(MUX_DIR, f"maslow-{machine_id}.sock") if MUX_DIR else None,
+                             self.line_writer("mux"), self.write_realtime, self.add_to_queue, self.mux_busy,
+                             REALTIME_COMMANDS)
+        self.ack_handlers: Dict[str, Callable[[str], Any]] = {
+            "job": lambda response: self.job_streamer.on_response(response),  # replaced in worker mode
+            "jog": self.jog_engine.on_response,
+            "mux": self.mux.on_ack,
+        }
+        self.supervisor = ConnectionSupervisor(self)
     
     def add_to_queue(self, message: dict):
         """Add message to queue for WebSocket broadcasting"""
+        message.setdefault("machine_id", self.machine_id)
         self.message_queue.append(message)
         
     def get_queued_messages(self) -> List[dict]:
@@ -97,96 +242,306 @@ class SerialManager:
         return messages
         
     def find_serial_port(self) -> Optional[str]:
-        """Find the Maslow serial port"""
-        # Try the known port first
-        if os.path.exists(SERIAL_PORT):
-            return SERIAL_PORT
-        
-        # Search for USB serial devices
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            if "usb" in port.device.lower() or "acm" in port.device.lower():
-                return port.device
-        
+        """Find this machine's serial port, skipping ports other machines have open"""
+        if self.preferred_port and is_url(self.preferred_port):
+            return self.preferred_port  # network and loopback ports aren't enumerated; just try them
+        claimed = {m.port_name for m in machines.values() if m is not self and m.serial_port is not None}
+        return port_discovery.find_maslow(self.preferred_port, self.serial_number, exclude=claimed)
+    
+    def describe(self) -> Dict[str, Any]:
+        """Summary for the machine list"""
+        return {
+            "id": self.machine_id,
+            "name": self.name,
+            "state": self.state,
+            "port": self.port_name,
+            "connected": self.is_connected,
+            "status": self.status,
+            "job": self.job_streamer.state,
+            "mux": self.mux.describe()
+        }
+    
+    def mux_busy(self) -> Optional[str]:
+        """Why lines from mux clients can't be written right now (realtime bytes always go through)"""
+        if not self.is_connected:
+            return "Not connected to Maslow"
+        if self.job_streamer.is_active:
+            return "A job is running; only realtime commands (?, !, ~, Ctrl-X) are accepted"
         return None
     
+    def set_state(self, state: str, reason: Optional[str] = None):
+        """Record a connection state transition and broadcast it"""
+        previous = self.state
+        if state == previous and reason is None:
+            return
+        self.state = state
+        if state in ("lost", "reconnecting", "connecting"):
+            self.status["status"] = state.capitalize()
+        self.logger.info(f"🔀 Connection state: {previous} → {state}" + (f" ({reason})" if reason else ""))
+        self.add_to_queue({
+            "type": "connection_state",
+            "state": state,
+            "previous": previous,
+            "reason": reason,
+            "timestamp": time.time()
+        })
+        if (previous in ("ready", "connected")) != (state in ("ready", "connected")):
+            self.add_to_queue({
+                "type": "connection_status",
+                "connected": self.is_connected
+            })
+    
     def connect(self) -> bool:
         """Connect to the serial port"""
         try:
-            logger.info("🔌 Starting serial connection process...")
-            port = self.find_serial_port()
-            if not port:
-                logger.error("❌ No serial port found during connection attempt")
-                return False
-            
-            logger.info(f"📡 Found serial port: {port}")
-            logger.info(f"⚙️ Connecting with baud rate: {BAUD_RATE}")
-            
-            self.serial_port = serial.Serial(port, BAUD_RATE, timeout=1)
-            logger.info("⏳ Waiting for connection to settle...")
-            time.sleep(2)  # Let connection settle
-            
-            # Clear buffers
-            logger.info("🧹 Clearing serial buffers...")
-            self.serial_port.flushInput()
-            self.serial_port.flushOutput()
+            self.logger.info("🔌 Starting serial connection process...")
+            # Choose and open under the claim lock so two machines never grab the same port
+            with port_claim_lock:
+                port = self.find_serial_port()
+                if not port:
+                    self.logger.error("❌ No serial port found during connection attempt")
+                    return False
+                
+                self.logger.info(f"📡 Found serial port: {port}")
+                self.logger.info(f"⚙️ Connecting with baud rate: {BAUD_RATE}")
+                
+                self.serial_port = self._open_port(port)
+                self.port_name = port
             
+            self.ready = False
+            self.ready_event.clear()
+            self.clear_pending_acks()
+            self.last_rx_time = time.monotonic()
             self.is_connected = True
-            machine_status["connected"] = True
-            machine_status["status"] = "Connected"
-            logger.info("✅ Serial connection flags updated")
+            self.status["connected"] = True
+            self.status["status"] = "Connected"
+            self.logger.info("✅ Serial connection flags updated")
             
             # Start reading thread
-            logger.info("🧵 Starting serial reading thread...")
+            self.logger.info("🧵 Starting serial reading thread...")
             self.stop_reading = False
             self.read_thread = threading.Thread(target=self._read_serial, daemon=True)
             self.read_thread.start()
-            logger.info("✅ Serial reading thread started successfully")
+            self.logger.info("✅ Serial reading thread started successfully")
             
-            logger.info(f"🎉 Connected to Maslow at {port}")
+            # Wait for the controller to answer instead of sleeping a fixed settle time
+            ready = self._wait_until_ready()
+            if not self.is_connected:
+                self.logger.error(f"❌ Lost {port} while waiting for the controller")
+                return False
+            if ready:
+                self.logger.info(f"🎉 Connected to Maslow at {port}")
+                port_discovery.mark_maslow(port)
+                self.restore_reporting()
+                self._drain_acks()
+                self.set_state("ready")
+                self.settings.clear()
+                self.refresh_settings_async()
+                self.apply_pending_config_async()
+            else:
+                self.logger.warning(f"⚠️ Connected to {port} but the controller has not identified itself yet")
+                self.set_state("connected")
             
             # Send initial status query
-            logger.info("❓ Sending initial status query...")
-            self.send_command("?")
+            self.logger.info("❓ Sending initial status query...")
+            self.write_realtime("?")
             
             return True
             
         except Exception as e:
-            logger.error(f"💥 Failed to connect to serial port: {e}")
-            logger.exception("Serial connection exception details:")
+            self.logger.error(f"💥 Failed to connect to serial port: {e}")
+            self.logger.exception("Serial connection exception details:")
+            self._close_port()
             self.is_connected = False
-            machine_status["connected"] = False
-            machine_status["status"] = f"Connection Error: {e}"
+            self.status["connected"] = False
+            self.status["status"] = f"Connection Error: {e}"
             return False
     
+    def recording_path(self) -> Optional[str]:
+        """Where to record the next connection's traffic, if MASLOW_RECORD_DIR is set"""
+        if not RECORD_DIR:
+            return None
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        return os.path.join(RECORD_DIR, f"{self.machine_id}-{stamp}{SESSION_SUFFIX}")
+    
+    def _open_port(self, port: str):
+        """Open the port (serial device, TCP or loopback) with empty buffers"""
+        serial_port = open_transport(port, BAUD_RATE, record_to=self.recording_path())
+        
+        # Clear buffers
+        self.logger.info("🧹 Clearing serial buffers...")
+        serial_port.reset_input_buffer()
+        serial_port.reset_output_buffer()
+        return serial_port
+    
+    def _wait_until_ready(self) -> bool:
+        """Probe with $I until the banner or build info arrives, up to READY_TIMEOUT"""
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline and self.is_connected:
+            self.write_line("$I")
+            if self.ready_event.wait(min(READY_RETRY, max(deadline - time.monotonic(), 0))):
+                return True
+        return self.ready
+    
+    def _drain_acks(self, timeout: float = READY_RETRY):
+        """Wait for the replies to lines nobody collects (the $I probes, the report interval) before going ready
+        
+        Left unanswered, they would take the acks of the first lines that do have an owner.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.is_connected:
+            with self.ack_lock:
+                if None not in self.pending_acks:
+                    return
+            time.sleep(0.01)
+        with self.ack_lock:
+            unanswered = sum(1 for owner in self.pending_acks if owner is None)
+            self.pending_acks = deque(owner for owner in self.pending_acks if owner is not None)
+        if unanswered:
+            self.logger.warning(f"⚠️ {unanswered} setup lines were never acknowledged; assuming they were lost")
+    
+    def restore_reporting(self):
+        """Re-enable FluidNC status auto-reporting after (re)connecting or a controller reset"""
+        interval = get_autoreport_interval()
+        if interval > 0:
+            self.logger.info(f"📊 Enabling status auto-report every {interval} ms")
+            self.write_line(f"$Report/Interval={interval}")
+    
+    def _close_port(self):
+        """Close the port, ignoring errors from a device that is already gone"""
+        port, self.serial_port = self.serial_port, None
+        if port:
+            try:
+                port.close()
+            except Exception:
+                pass
+    
+    def connection_lost(self, reason: str):
+        """Tear down a broken connection so the supervisor can reconnect"""
+        if not self.is_connected:
+            return
+        self.logger.error(f"🔌 Connection lost: {reason}")
+        self.stop_reading = True
+        self.is_connected = False
+        self.ready = False
+        self._close_port()
+        self.status["connected"] = False
+        if self.job_streamer.is_active:
+            self.job_streamer.fail(f"Connection lost: {reason}")
+        self.clear_pending_acks()
+        self.jog_engine.reset()
+        self.mux.reset("Connection lost")
+        self.set_state("lost", reason)
+        self.supervisor.wake()
+    
+    def shutdown(self):
+        """Stop reconnecting and close the port for good"""
+        self.supervisor.stop()
+        self.mux.stop()
+        self.disconnect()
+    
     def disconnect(self):
         """Disconnect from serial port"""
         self.stop_reading = True
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+        self.clear_pending_acks()
+        self.jog_engine.reset()
+        self.mux.reset("Disconnected")
+        self._close_port()
         self.is_connected = False
-        machine_status["connected"] = False
-        machine_status["status"] = "Disconnected"
-        logger.info("Disconnected from Maslow")
+        self.ready = False
+        self.status["connected"] = False
+        self.status["status"] = "Disconnected"
+        self.set_state("disconnected")
+        self.logger.info("Disconnected from Maslow")
+    
+    def write_line(self, line: str, owner: Any = None):
+        """Write one G-code line without waiting for a response; its ok/error will go to `owner`"""
+        if not self.is_connected or not self.serial_port:
+            raise Exception("Not connected to Maslow")
+        data = (line + "\n").encode()
+        with self.write_lock:
+            # Queued before writing: a fast controller can answer before write() returns
+            with self.ack_lock:
+                self.pending_acks.append(owner)
+            try:
+                self.serial_port.write(data)
+            except Exception:
+                with self.ack_lock:
+                    self.pending_acks.pop()
+                raise
+        self.metrics.tx_bytes.inc(len(data))
+        self.metrics.tx_lines.inc()
+    
+    def line_writer(self, owner: Any) -> Callable[[str], None]:
+        """write_line for one component, so the acks of its lines come back to it alone"""
+        return lambda line: self.write_line(line, owner)
+    
+    def clear_pending_acks(self):
+        """Forget every unanswered line, e.g. after a controller reset dropped them or the port went away"""
+        with self.ack_lock:
+            self.pending_acks.clear()
     
-    def send_command(self, command: str, wait_time: float = 2.0) -> List[str]:
-        """Send command to Maslow and return responses"""
+    def write_realtime(self, command: str):
+        """Write a realtime command byte; these bypass the controller's line buffer"""
         if not self.is_connected or not self.serial_port:
             raise Exception("Not connected to Maslow")
+        data = command.encode("latin-1")  # realtime bytes above 0x7f (jog cancel) go out as single bytes
+        with self.write_lock:
+            self.serial_port.write(data)
+        self.metrics.tx_bytes.inc(len(data))
+    
+    def send_command(self, command: str, wait_time: float = 2.0, trace: Optional[CommandTrace] = None) -> List[str]:
+        """Send command to Maslow and return responses (filling in `trace` timestamps if given)"""
+        if not self.is_connected or not self.serial_port:
+            raise Exception("Not connected to Maslow")
+        
+        realtime = command in REALTIME_COMMANDS
+        if self.job_streamer.is_active and not realtime:
+            raise Exception("A job is running; only realtime commands (?, !, ~, Ctrl-X) are accepted")
+        
+        # While the reader thread owns the port, collect what it reads instead of racing it
+        collector: Optional[ResponseCollector] = None
+        if self.read_thread and self.read_thread.is_alive():
+            collector = ResponseCollector()
+            with self.collector_lock:
+                self.response_collectors.append(collector)
         
         responses = []
         try:
             # Send command
-            self.serial_port.write((command + "\n").encode())
-            logger.info(f"Sent command: {command}")
+            if realtime:
+                self.write_realtime(command)
+            else:
+                self.write_line(command, collector)
+            written = time.monotonic()
+            if collector is not None:
+                collector.sent_at = written
+            if trace is not None:
+                trace.written = written
+            self.logger.info("Sent command: %s", command, extra=TX)
             
             # Add command to queue for WebSocket broadcasting
             self.add_to_queue({
                 "type": "command_sent",
                 "command": command,
+                "trace_id": trace.id if trace is not None else None,
                 "timestamp": time.time()
             })
             
+            if collector is not None:
+                time.sleep(wait_time)
+                # A fast reply can be stamped before sent_at moved to the end of the write
+                first_byte = None if collector.first_rx_at is None else max(collector.first_rx_at, collector.sent_at)
+                completed = None if collector.acked_at is None else max(collector.acked_at, first_byte or collector.sent_at)
+                if completed is not None:
+                    self.metrics.command_roundtrip.observe(completed - collector.sent_at)
+                if trace is not None:
+                    trace.first_byte, trace.completed, trace.result = first_byte, completed, collector.ack
+                if command.startswith("$"):
+                    self.settings.record_write(command, collector.ack)
+                return list(collector)
+            
             # Wait for responses
             start_time = time.time()
             while time.time() - start_time < wait_time:
@@ -194,7 +549,12 @@ class SerialManager:
                     response = self.serial_port.readline().decode('utf-8', errors='ignore').strip()
                     if response:
                         responses.append(response)
-                        logger.info(f"Response: {response}")
+                        if trace is not None:
+                            now = time.monotonic()
+                            trace.first_byte = trace.first_byte or now
+                            if trace.result is None and (response == "ok" or response.startswith("error")):
+                                trace.completed, trace.result = now, response
+                        self.logger.info("Response: %s", response, extra=RX)
                         # Add response to queue for WebSocket broadcasting
                         self.add_to_queue({
                             "type": "serial_response",
@@ -207,40 +567,246 @@ class SerialManager:
             return responses
             
         except Exception as e:
-            logger.error(f"Error sending command '{command}': {e}")
+            self.logger.error(f"Error sending command '{command}': {e}")
             raise
+        finally:
+            if collector is not None:
+                with self.collector_lock:
+                    self.response_collectors.remove(collector)
+    
+    def send_batch(self, commands: List[str], timeout: float = BATCH_TIMEOUT, stop_on_error: bool = False,
+                   traces: Optional[List[CommandTrace]] = None) -> List[Dict[str, Any]]:
+        """Pipeline commands under character-counting flow control; returns one result per command, in order
+        
+        Realtime bytes go out immediately. With stop_on_error each line waits for the previous one's ok, so
+        nothing after a failed line reaches the controller; the rest are reported as skipped.
+        """
+        if not self.is_connected or not self.serial_port:
+            raise Exception("Not connected to Maslow")
+        if self.job_streamer.is_active and any(c not in REALTIME_COMMANDS for c in commands):
+            raise Exception("A job is running; only realtime commands (?, !, ~, Ctrl-X) are accepted")
+        if not (self.read_thread and self.read_thread.is_alive()):
+            raise Exception("Serial reader is not running")
+        
+        collector = ResponseCollector()
+        with self.collector_lock:
+            self.response_collectors.append(collector)
+        results = [{"command": command, "response": "skipped", "output": [], "ms": None} for command in commands]
+        written_at: List[Optional[float]] = [None] * len(commands)
+        pending: Deque[int] = deque()  # commands waiting for ok/error, oldest first
+        inflight_bytes = 0
+        sent = scanned = 0
+        stopped = False
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                # Keep the controller's RX buffer as full as it can safely be
+                while not stopped and sent < len(commands):
+                    if pending and stop_on_error:
+                        break  # one line at a time, so nothing runs after a line that fails
+                    command = commands[sent]
+                    if command in REALTIME_COMMANDS:
+                        self.write_realtime(command)
+                        written_at[sent] = time.monotonic()
+                        results[sent].update(response="sent", ms=0.0)
+                        sent += 1
+                        continue
+                    size = len(command) + 1
+                    if pending and inflight_bytes + size > RX_BUFFER_SIZE:
+                        break
+                    self.write_line(command, collector)
+                    written_at[sent] = time.monotonic()
+                    pending.append(sent)
+                    inflight_bytes += size
+                    sent += 1
+                if not pending and (stopped or sent == len(commands)):
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not collector.acknowledged.wait(remaining):
+                    for index in pending:
+                        results[index]["response"] = "timeout"
+                    break
+                collector.acknowledged.clear()
+                new = collector[scanned:]
+                scanned += len(new)
+                now = time.monotonic()
+                for response in new:
+                    if not pending:
+                        break
+                    index = pending[0]
+                    if response == "ok" or response.startswith("error"):
+                        pending.popleft()
+                        inflight_bytes -= len(commands[index]) + 1
+                        results[index].update(response=response, ms=round((now - written_at[index]) * 1000, 3))
+                        if response != "ok" and stop_on_error:
+                            stopped = True
+                    elif not response.startswith("<"):
+                        results[index]["output"].append(response)
+            
+            self.logger.info(f"📦 Sent {sent} pipelined lines, {sent - len(pending)} answered")
+            for result in results:
+                if result["command"].startswith("$"):
+                    self.settings.record_write(result["command"], result["response"])
+            for trace, result, written in zip(traces or [], results, written_at):
+                trace.written = written
+                if result["ms"] is not None and result["response"] != "sent":
+                    trace.first_byte = trace.completed = written + result["ms"] / 1000
+                trace.result = result["response"]
+            return results
+        finally:
+            with self.collector_lock:
+                self.response_collectors.remove(collector)
+    
+    def send_pipelined(self, lines: List[str], timeout: float = 5.0) -> List[str]:
+        """Pipeline lines and return the ok/error of each one answered, in order"""
+        results = self.send_batch(lines, timeout)
+        return [r["response"] for r in results if r["response"] == "ok" or r["response"].startswith("error")]
+    
+    def refresh_settings(self, commands: Optional[List[str]] = None) -> int:
+        """Re-read settings (all of them, or the given queries); the reader parses the replies into the cache"""
+        acks = self.send_pipelined(commands or DUMP_COMMANDS, timeout=SETTINGS_TIMEOUT)
+        if commands is None and "ok" in acks:
+            self.settings.mark_loaded()
+        return len(self.settings.settings)
+    
+    def refresh_settings_async(self):
+        """Refresh settings off the calling thread (the reader can't wait for its own acks)"""
+        def refresh():
+            try:
+                count = self.refresh_settings()
+                self.logger.info(f"🗂️ Settings cache loaded: {count} settings")
+            except Exception as e:
+                self.logger.warning(f"⚠️ Failed to load settings: {e}")
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def apply_config(self, diff: ConfigDiff) -> Dict[str, Any]:
+        """Bring the controller in line with a config diff: push runtime settings, or restart when they won't do"""
+        result: Dict[str, Any] = {"applied": diff.plan, "failed": []}
+        if diff.plan == APPLY_RUNTIME:
+            # Push each changed setting; fall back to a restart if the controller refuses any of them
+            commands = diff.commands()
+            self.logger.info(f"⚙️ Applying {len(commands)} settings without restart...")
+            acks = self.send_pipelined(commands)
+            result["settings"], result["failed"] = split_results(commands, acks)
+            if result["failed"]:
+                self.logger.warning(f"⚠️ {len(result['failed'])} settings were refused; restarting instead")
+                result["applied"] = APPLY_RESTART
+        if result["applied"] == APPLY_RESTART:
+            # The supervisor reconnects once the controller is back, so don't wait for it
+            self.logger.info("🔄 Restarting Maslow to apply new configuration...")
+            self.send_command("$ESP444=RESTART", wait_time=0)
+        return result
+    
+    def apply_pending_config_async(self):
+        """Apply a config saved while disconnected, off the calling thread, once the controller is ready"""
+        if not self.config_pending:
+            return
+        def apply():
+            try:
+                config = config_files.load(self.config_file, parse_yaml).data
+                diff = diff_configs(self.applied_config, config)
+                self.config_pending = False
+                result = self.apply_config(diff)
+                self.applied_config = config
+                self.logger.info(f"⚙️ Configuration saved while disconnected applied ({result['applied']})")
+                self.add_to_queue({"type": "config_applied", "changes": diff.as_dict(), **result,
+                                   "timestamp": time.time()})
+            except Exception as e:
+                self.logger.warning(f"⚠️ Failed to apply the saved configuration: {e}")
+        threading.Thread(target=apply, daemon=True).start()
     
     def _read_serial(self):
         """Continuously read from serial port"""
-        logger.info("🔄 Serial reading thread started")
+        self.logger.info("🔄 Serial reading thread started")
         read_count = 0
+        port = self.serial_port
+        lines = LineAssembler()
         
-        while not self.stop_reading and self.is_connected:
+        # Bound to this connection's port so a reader from a previous connection can't linger
+        while not self.stop_reading and self.is_connected and self.serial_port is port:
             try:
-                if self.serial_port and self.serial_port.in_waiting > 0:
-                    data = self.serial_port.readline().decode('utf-8', errors='ignore').strip()
-                    if data:
-                        read_count += 1
-                        if read_count % 10 == 0:  # Log every 10th read to avoid spam
-                            logger.debug(f"📊 Serial reads processed: {read_count}")
-                        self._process_response(data)
-                else:
-                    time.sleep(0.1)
+                chunk = port.read(port.in_waiting or 1)
+                if not chunk:
+                    continue
+                self.last_rx_time = time.monotonic()
+                self.metrics.rx_bytes.inc(len(chunk))
+                for line in lines.feed(chunk):
+                    read_count += 1
+                    self.metrics.rx_lines.inc()
+                    if read_count % 10 == 0:  # Log every 10th read to avoid spam
+                        self.logger.debug(f"📊 Serial reads processed: {read_count}")
+                    self._process_response(line.decode('utf-8', errors='ignore'))
             except Exception as e:
-                logger.error(f"💥 Error reading serial: {e}")
-                logger.exception("Serial read exception details:")
+                if self.serial_port is not port:
+                    break  # closed on purpose (disconnect or shutdown)
+                self.logger.error(f"💥 Error reading serial: {e}")
+                self.connection_lost(f"Serial read failed: {e}")
                 break
         
-        logger.info(f"🛑 Serial reading thread stopped. Total reads: {read_count}")
-        logger.info(f"📊 Stop reading: {self.stop_reading}, Connected: {self.is_connected}")
+        self.logger.info(f"🛑 Serial reading thread stopped. Total reads: {read_count}")
+        self.logger.info(f"📊 Stop reading: {self.stop_reading}, Connected: {self.is_connected}")
     
     def _process_response(self, response: str):
         """Process responses from Maslow"""
-        logger.info(f"Received: {response}")
+        self.logger.info("Received: %s", response, extra=STATUS if response.startswith("<") else RX)
+        
+        # Banner or build info means the controller is up (again)
+        lowered = response.lower()
+        if response.startswith("[VER:") or "fluidnc" in lowered or lowered.startswith("grbl"):
+            if not response.startswith("[VER:"):
+                self.clear_pending_acks()  # a controller that just (re)booted never saw lines written before
+            if not self.ready:
+                self.ready = True
+                self.ready_event.set()
+            elif not response.startswith("[VER:"):
+                # Banner while connected: the controller reset, dropped unanswered lines and forgot its report interval
+                self.job_streamer.fail("Controller reset")
+                self.jog_engine.reset()
+                self.mux.reset("Controller reset")
+                self.restore_reporting()
+                self.refresh_settings_async()
+        
+        # Settings dumps and single-setting queries keep the settings cache current
+        if response.startswith("$"):
+            self.settings.update_from_line(response)
         
         # Parse status responses
         if response.startswith("<"):
             self._parse_status_response(response)
+        acknowledgement = response == "ok" or response.startswith("error")
+        with self.ack_lock:
+            claimed = bool(self.pending_acks)
+            owner = (self.pending_acks.popleft() if acknowledgement else self.pending_acks[0]) if claimed else None
+        if acknowledgement:
+            (self.metrics.ok if response == "ok" else self.metrics.error).inc()
+            if isinstance(owner, str):
+                self.ack_handlers[owner](response)
+            elif owner is None:
+                self.logger.debug(f"Acknowledgement nobody waits for: {response}")
+        else:
+            self.mux.publish(response)
+        
+        # Acks and a line's own output go to the collector that sent it; status reports and
+        # unsolicited messages to every collector
+        with self.collector_lock:
+            if isinstance(owner, ResponseCollector) and not response.startswith("<"):
+                targets = [owner] if owner in self.response_collectors else []
+            elif acknowledgement or (claimed and not response.startswith("<")):
+                targets = []  # another owner's line (or one nobody waits for any more)
+            else:
+                targets = self.response_collectors
+            for collector in targets:
+                collector.append(response)
+                if collector is not owner:
+                    continue  # status reports and unsolicited lines don't time this collector's reply
+                if collector.first_rx_at is None:
+                    collector.first_rx_at = max(self.last_rx_time, collector.sent_at)
+                if acknowledgement:
+                    if collector.acked_at is None:
+                        collector.acked_at = time.monotonic()
+                        collector.ack = response
+                    collector.acknowledged.set()
         
         # Add to queue for WebSocket broadcasting
         self.add_to_queue({
@@ -257,7 +823,7 @@ class SerialManager:
                 return
             
             # Store old status for comparison
-            old_status = machine_status.copy()
+            old_status = self.status.copy()
                 
             # Example: <Idle|MPos:0.000,0.000,0.000|FS:0,0>
             if "|MPos:" in response:
@@ -274,7 +840,7 @@ class SerialManager:
                     # Only parse if we have complete coordinate data
                     if len(coords) >= 3 and all(coord.strip() for coord in coords[:3]):
                         try:
-                            machine_status["position"] = {
+                            self.status["position"] = {
                                 "x": float(coords[0].strip()) if coords[0].strip() and coords[0].strip() != 'nan' else 0.0,
                                 "y": float(coords[1].strip()) if coords[1].strip() and coords[1].strip() != 'nan' else 0.0,
                                 "z": float(coords[2].strip()) if coords[2].strip() and coords[2].strip() != 'nan' else 0.0
@@ -289,8 +855,8 @@ class SerialManager:
                 if status_end > 1:
                     status = response[1:status_end].strip()
                     if status:  # Only update if we have a valid status
-                        machine_status["status"] = status
-                        logger.info(f"Status updated to: {status}")
+                        self.status["status"] = status
+                        self.logger.info("Status updated to: %s", status, extra=STATUS)
             
             # Extract feed rate and spindle speed
             if "|FS:" in response:
@@ -306,51 +872,207 @@ class SerialManager:
                     # Only parse if we have complete feed rate data
                     if len(fs_parts) >= 2 and all(part.strip() for part in fs_parts[:2]):
                         try:
-                            machine_status["feed_rate"] = float(fs_parts[0].strip())
-                            machine_status["spindle_speed"] = float(fs_parts[1].strip())
+                            self.status["feed_rate"] = float(fs_parts[0].strip())
+                            self.status["spindle_speed"] = float(fs_parts[1].strip())
                         except ValueError:
                             # Skip this update if feed rate parsing fails
                             pass
             
+            # Extract buffer state (planner blocks free, RX bytes free) when the controller reports it
+            if "|Bf:" in response:
+                bf_start = response.find("|Bf:") + 4
+                bf_end = response.find("|", bf_start)
+                if bf_end == -1:
+                    bf_end = response.find(">", bf_start)
+                bf_parts = response[bf_start:bf_end].split(",")
+                if len(bf_parts) >= 2:
+                    try:
+                        self.controller_buffer = {"planner_blocks_free": int(bf_parts[0]),
+                                                  "rx_bytes_free": int(bf_parts[1])}
+                    except ValueError:
+                        pass
+            
             # Check if status changed and log it
-            if old_status["status"] != machine_status["status"]:
-                logger.info(f"Machine status changed from '{old_status['status']}' to '{machine_status['status']}'")
+            if old_status["status"] != self.status["status"]:
+                self.logger.info(f"Machine status changed from '{old_status['status']}' to '{self.status['status']}'")
                 # Add to message queue for immediate broadcast
                 self.add_to_queue({
                     "type": "status_update",
-                    "status": machine_status
+                    "status": self.status
                 })
                     
         except Exception as e:
-            logger.error(f"Error parsing status response: {e}")
+            self.logger.error(f"Error parsing status response: {e}")
 
-# Global serial manager
-serial_manager = SerialManager()
 
-async def broadcast_message(message: Dict):
-    """Broadcast message to all connected WebSocket clients"""
-    if not connected_clients:
+class WorkerSerialManager(SerialManager):
+    """SerialManager whose port and job streamer live in a dedicated worker process"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.worker = SerialWorker(name=f"maslow-serial-{self.machine_id}")
+        self.job_streamer = WorkerJobStreamer(self.worker)
+    
+    def _open_port(self, port: str):
+        """Open the port inside the worker, starting the worker if needed"""
+        self.worker.start()
+        self.worker.discard_events()
+        self.worker.call("open", port, BAUD_RATE, self.recording_path())
+        return WorkerPort(self.worker)
+    
+    def _read_serial(self):
+        """Handle events from the worker: received lines, job messages and port failures"""
+        self.logger.info("🔄 Serial worker event thread started")
+        port = self.serial_port
+        
+        while not self.stop_reading and self.is_connected and self.serial_port is port:
+            try:
+                event = self.worker.next_event(READ_TIMEOUT)
+                if event is None:
+                    if not self.worker.is_alive():
+                        self.connection_lost("Serial worker process exited")
+                        break
+                    continue
+                kind, payload = event
+                if kind == EVENT_RX:
+                    self.last_rx_time = time.monotonic()
+                    self.metrics.rx_bytes.inc(len(payload) + 1)
+                    self.metrics.rx_lines.inc()
+                    self._process_response(payload.decode('utf-8', errors='ignore'))
+                elif kind == EVENT_NOTIFY:
+                    self.add_to_queue(json.loads(payload))
+                elif kind == EVENT_LOST:
+                    self.connection_lost(payload.decode('utf-8', errors='ignore'))
+                    break
+            except Exception as e:
+                self.logger.error(f"💥 Error handling serial worker event: {e}")
+                if self.serial_port is port:
+                    self.connection_lost(f"Serial worker event failed: {e}")
+                break
+        
+        self.logger.info("🛑 Serial worker event thread stopped")
+    
+    def shutdown(self):
+        """Stop reconnecting, close the port and stop the worker process"""
+        super().shutdown()
+        self.worker.shutdown()
+
+def ports_changed(added: List[PortInfo], removed: List[PortInfo]):
+    """Broadcast hotplug events and let disconnected machines try the new ports right away"""
+    system_messages.append({
+        "type": "ports_changed",
+        "added": [p.as_dict() for p in added],
+        "removed": [p.as_dict() for p in removed],
+        "timestamp": time.time()
+    })
+    if added:
+        for machine in machines.values():
+            if not machine.is_connected:
+                machine.supervisor.retry_now()
+
+# Shared port watcher and the machine registry
+port_discovery = PortDiscovery(baud_rate=BAUD_RATE, on_change=ports_changed)
+for machine_config in load_machine_configs():
+    manager_class = WorkerSerialManager if machine_config.get("serial_worker", SERIAL_WORKER) == "process" else SerialManager
+    machine = manager_class(
+        machine_id=str(machine_config["id"]),
+        name=machine_config.get("name"),
+        port=machine_config.get("port"),
+        serial_number=machine_config.get("serial_number"),
+        config_file=machine_config.get("config", "maslow.yaml")
+    )
+    machines[machine.machine_id] = machine
+    connected_clients[machine.machine_id] = []
+
+# Metrics read at scrape time, so they cost nothing between scrapes
+def per_machine(value) -> Any:
+    return lambda: [((m.machine_id,), value(m)) for m in machines.values()]
+
+def controller_buffer_free(key: str) -> Any:
+    return lambda: [((m.machine_id,), m.controller_buffer[key]) for m in machines.values() if key in m.controller_buffer]
+
+def analysis_task_counts() -> List[Any]:
+    tasks = analysis_pool.tasks() if analysis_pool else []
+    return [((state,), sum(1 for t in tasks if t["state"] == state)) for state in ("queued", "running")]
+
+REGISTRY.callback("maslow_connected", "1 while the machine's serial link is up", ["machine"],
+                  per_machine(lambda m: int(m.is_connected)))
+REGISTRY.callback("maslow_reconnects_total", "Automatic reconnects after a lost link", ["machine"],
+                  per_machine(lambda m: m.supervisor.reconnect_count), kind="counter")
+REGISTRY.callback("maslow_rx_buffer_fill_ratio", "Share of the controller RX buffer held by unacknowledged job lines",
+                  ["machine"], per_machine(lambda m: m.job_streamer.buffer_fill if m.is_connected else 0.0))
+REGISTRY.callback("maslow_planner_blocks_free", "Free planner blocks from the last status report with Bf:", ["machine"],
+                  controller_buffer_free("planner_blocks_free"))
+REGISTRY.callback("maslow_controller_rx_bytes_free", "Free controller RX bytes from the last status report with Bf:",
+                  ["machine"], controller_buffer_free("rx_bytes_free"))
+REGISTRY.callback("maslow_message_queue_depth", "Messages waiting to be broadcast to a machine's WebSocket clients",
+                  ["machine"], per_machine(lambda m: len(m.message_queue)))
+REGISTRY.callback("maslow_system_message_queue_depth", "System messages waiting to be broadcast", [],
+                  lambda: [((), len(system_messages))])
+REGISTRY.callback("maslow_analysis_tasks", "File analysis tasks by state", ["state"], analysis_task_counts)
+REGISTRY.callback("maslow_websocket_clients", "Connected WebSocket clients", ["machine"],
+                  lambda: [((machine_id,), len(clients)) for machine_id, clients in connected_clients.items()])
+REGISTRY.callback("maslow_serial_worker_dropped_events_total",
+                  "Worker events dropped because the web process fell behind", ["machine"],
+                  lambda: [((m.machine_id,), m.worker.dropped_events) for m in machines.values()
+                           if isinstance(m, WorkerSerialManager)], kind="counter")
+
+def get_machine(machine_id: Optional[str] = None) -> SerialManager:
+    """Resolve the machine for a request; the legacy /api routes use the first configured machine"""
+    if machine_id is None:
+        return next(iter(machines.values()))
+    machine = machines.get(machine_id)
+    if machine is None:
+        raise HTTPException(status_code=404, detail=f"Machine {machine_id} not found")
+    return machine
+
+async def analyze_file(kind: str, file_path: Path, settings: Any, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+    """Run a file analysis on the worker pool, or in a thread if the pool is not running"""
+    if analysis_pool is None:
+        return await asyncio.to_thread(analysis_caches[kind].check_file, file_path, settings)
+    try:
+        return await analysis_pool.analyze(kind, file_path, settings, priority)
+    except AnalysisQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AnalysisCancelled:
+        raise HTTPException(status_code=409, detail=f"Analysis of {file_path.name} was cancelled")
+
+def client_label(websocket: WebSocket) -> str:
+    """host:port of a WebSocket client, used to label its metrics"""
+    client = websocket.client
+    return f"{client.host}:{client.port}" if client else str(id(websocket))
+
+async def broadcast_message(message: Dict, machine_id: Optional[str] = None):
+    """Broadcast message to a machine's WebSocket clients, or to every channel if no machine is given"""
+    channels = [machine_id] if machine_id is not None else list(connected_clients)
+    clients = [(channel, client) for channel in channels for client in connected_clients.get(channel, [])]
+    if not clients:
         logger.debug("📡 No WebSocket clients connected for broadcast")
         return
         
-    logger.debug(f"📡 Broadcasting to {len(connected_clients)} clients: {message.get('type', 'unknown')}")
+    logger.debug(f"📡 Broadcasting to {len(clients)} clients: {message.get('type', 'unknown')}")
     
     disconnected = []
     successful_sends = 0
     
-    for client in connected_clients:
+    for channel, client in clients:
+        started = time.perf_counter()
         try:
             await client.send_json(message)
             successful_sends += 1
+            WEBSOCKET_SEND.labels(machine=channel, client=client_label(client)).observe(time.perf_counter() - started)
         except Exception as e:
             logger.warning(f"⚠️ Failed to send to WebSocket client: {e}")
-            disconnected.append(client)
+            disconnected.append((channel, client))
+            machines[channel].metrics.websocket_dropped.inc()
     
     # Remove disconnected clients
     if disconnected:
         logger.info(f"🔌 Removing {len(disconnected)} disconnected WebSocket clients")
-        for client in disconnected:
-            connected_clients.remove(client)
+        for channel, client in disconnected:
+            if client in connected_clients[channel]:
+                connected_clients[channel].remove(client)
+            WEBSOCKET_SEND.remove(machine=channel, client=client_label(client))
     
     logger.debug(f"📊 Broadcast complete: {successful_sends} successful, {len(disconnected)} failed")
 
@@ -361,30 +1083,39 @@ async def startup_event():
     """Initialize serial connection and start background tasks on startup"""
     try:
         logger.info("🚀 Starting Maslow Serial Server startup sequence...")
-        logger.info(f"📡 Attempting to connect to serial port: {SERIAL_PORT}")
+        logger.info(f"🏭 Machines: {', '.join(machines)}")
         
-        # Connect to serial
-        connection_result = serial_manager.connect()
-        if connection_result:
-            logger.info("✅ Serial connection established successfully")
-        else:
-            logger.error("❌ Failed to establish serial connection")
+        # Start the file analysis workers
+        global analysis_pool
+        analysis_pool = AnalysisPool(analysis_caches, notify=system_messages.append)
+        analysis_pool.start()
+        
+        # The supervisors connect in the background and keep reconnecting after USB hiccups
+        port_discovery.start()
+        for machine in machines.values():
+            machine.supervisor.start()
+            machine.mux.start()
         
-        # Start background tasks
+        # Start background tasks; each machine gets its own so a busy one never delays another
         logger.info("🔄 Starting background tasks...")
         
         try:
-            status_task = asyncio.create_task(status_monitor())
-            logger.info("✅ Status monitor task created")
+            for machine in machines.values():
+                asyncio.create_task(status_monitor(machine))
+            logger.info("✅ Status monitor tasks created")
         except Exception as e:
             logger.error(f"❌ Failed to create status monitor task: {e}")
             
         try:
-            queue_task = asyncio.create_task(message_queue_processor())
-            logger.info("✅ Message queue processor task created")
+            for machine in machines.values():
+                asyncio.create_task(message_queue_processor(machine))
+            asyncio.create_task(message_queue_processor())
+            logger.info("✅ Message queue processor tasks created")
         except Exception as e:
             logger.error(f"❌ Failed to create message queue processor task: {e}")
         
+        asyncio.create_task(event_loop_monitor())
+        
         logger.info("🎉 Startup sequence completed successfully")
         
     except Exception as e:
@@ -397,24 +1128,29 @@ async def shutdown_event():
     """Clean up on shutdown"""
     try:
         logger.info("🛑 Shutting down Maslow Serial Server...")
-        logger.info("📡 Disconnecting from serial port...")
-        serial_manager.disconnect()
+        logger.info("📡 Disconnecting from serial ports...")
+        port_discovery.stop()
+        for machine in machines.values():
+            machine.shutdown()
         logger.info("✅ Serial disconnection completed")
+        if analysis_pool:
+            analysis_pool.shutdown()
+            logger.info("✅ Analysis pool stopped")
         logger.info("🏁 Shutdown sequence completed")
     except Exception as e:
         logger.error(f"❌ Error during shutdown: {e}")
         logger.exception("Shutdown exception details:")
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time communication"""
+async def websocket_channel(websocket: WebSocket, machine: SerialManager):
+    """Serve one WebSocket client subscribed to a machine"""
     await websocket.accept()
-    connected_clients.append(websocket)
+    connected_clients[machine.machine_id].append(websocket)
     
     # Send initial status
     await websocket.send_json({
         "type": "status_update",
-        "status": machine_status
+        "machine_id": machine.machine_id,
+        "status": machine.status
     })
     
     try:
@@ -427,259 +1163,531 @@ async def websocket_endpoint(websocket: WebSocket):
             elif data.get("type") == "request_status":
                 await websocket.send_json({
                     "type": "status_update", 
-                    "status": machine_status
+                    "machine_id": machine.machine_id,
+                    "status": machine.status
                 })
                 
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
+        if websocket in connected_clients[machine.machine_id]:
+            connected_clients[machine.machine_id].remove(websocket)
+        WEBSOCKET_SEND.remove(machine=machine.machine_id, client=client_label(websocket))
 
-@app.get("/api/status")
-async def get_status():
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for real-time communication with the default machine"""
+    await websocket_channel(websocket, get_machine())
+
+@app.websocket("/ws/machines/{machine_id}")
+async def machine_websocket_endpoint(websocket: WebSocket, machine_id: str):
+    """WebSocket endpoint for real-time communication with one machine"""
+    if machine_id not in machines:
+        await websocket.close(code=4404)
+        return
+    await websocket_channel(websocket, machines[machine_id])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/debug/traces")
+async def get_command_traces(limit: int = 100, machine_id: Optional[str] = None):
+    """Recent command traces and p50/p95/p99 latency per command class and stage"""
+    try:
+        return {
+            "success": True,
+            "summary": command_tracer.summary(machine_id),
+            "traces": command_tracer.traces(limit, machine_id)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/machines")
+async def list_machines():
+    """List configured machines with their connection and job state"""
+    return {"success": True, "machines": [m.describe() for m in machines.values()]}
+
+@machine_router.get("/status")
+async def get_status(machine: SerialManager = Depends(get_machine)):
     """Get current machine status"""
-    return machine_status
+    return machine.status
+
+@app.get("/api/ports")
+async def get_ports(refresh: bool = False):
+    """List serial ports, marking the Maslow where it has been identified"""
+    try:
+        await asyncio.to_thread(port_discovery.refresh, refresh)
+        in_use = {m.port_name: m.machine_id for m in machines.values() if m.is_connected}
+        return {
+            "success": True,
+            "ports": [{**p, "machine_id": in_use.get(p["device"])} for p in port_discovery.list_ports()],
+            "connected_port": get_machine().port_name if get_machine().is_connected else None
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.get("/connection")
+async def get_connection(machine: SerialManager = Depends(get_machine)):
+    """Get serial connection state as tracked by the supervisor"""
+    return {
+        "success": True,
+        "state": machine.state,
+        "port": machine.port_name,
+        "ready": machine.ready,
+        "auto_reconnect": machine.supervisor.auto_reconnect,
+        "reconnects": machine.supervisor.reconnect_count
+    }
 
-@app.post("/api/connect")
-async def connect_serial():
+@machine_router.post("/connect")
+async def connect_serial(machine: SerialManager = Depends(get_machine)):
     """Connect to serial port"""
-    success = serial_manager.connect()
+    if machine.is_connected:
+        machine.supervisor.resume()
+        return {"success": True, "message": "Already connected to Maslow"}
+    success = await asyncio.to_thread(machine.connect)
+    machine.supervisor.resume()
     if success:
         await broadcast_message({
             "type": "connection_status",
+            "machine_id": machine.machine_id,
             "connected": True
-        })
+        }, machine.machine_id)
         return {"success": True, "message": "Connected to Maslow"}
     else:
         return {"success": False, "message": "Failed to connect"}
 
-@app.post("/api/disconnect")
-async def disconnect_serial():
+@machine_router.post("/disconnect")
+async def disconnect_serial(machine: SerialManager = Depends(get_machine)):
     """Disconnect from serial port"""
-    serial_manager.disconnect()
+    machine.supervisor.pause()
+    machine.disconnect()
     await broadcast_message({
         "type": "connection_status",
+        "machine_id": machine.machine_id,
         "connected": False
-    })
+    }, machine.machine_id)
     return {"success": True, "message": "Disconnected from Maslow"}
 
-@app.post("/api/command")
-async def send_command(cmd: SerialCommand):
+async def run_command(machine: SerialManager, command: str, wait_time: float = 2.0,
+                      kind: Optional[str] = None) -> List[str]:
+    """Send a traced command without blocking the event loop (and so every other machine) while waiting"""
+    trace = command_tracer.start(machine.machine_id, command, kind or classify_command(command, REALTIME_COMMANDS))
+    trace.enqueued = time.monotonic()
+    try:
+        return await asyncio.to_thread(machine.send_command, command, wait_time, trace)
+    except Exception as e:
+        trace.result = trace.result or f"failed: {e}"
+        raise
+    finally:
+        command_tracer.finish(trace)
+
+async def run_batch(machine: SerialManager, commands: List[str], stop_on_error: bool = True,
+                    timeout: float = BATCH_TIMEOUT) -> Dict[str, Any]:
+    """Pipeline commands off the event loop, tracing each one"""
+    traces = [command_tracer.start(machine.machine_id, c, classify_command(c, REALTIME_COMMANDS)) for c in commands]
+    started = time.monotonic()
+    for trace in traces:
+        trace.enqueued = started
+    try:
+        results = await asyncio.to_thread(machine.send_batch, commands, timeout, stop_on_error, traces)
+    except Exception as e:
+        for trace in traces:
+            trace.result = trace.result or f"failed: {e}"
+        raise
+    finally:
+        for trace in traces:
+            command_tracer.finish(trace)
+    failed = [i for i, r in enumerate(results) if r["response"] not in ("ok", "sent")]
+    return {
+        "success": not failed,
+        "results": results,
+        "stopped_at": failed[0] if failed else None,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 3)
+    }
+
+def write_traced_realtime(machine: SerialManager, command: str):
+    """Write a realtime byte from the event loop, recording it like any other command"""
+    write_traced(machine, command, "realtime", lambda: machine.write_realtime(command))
+
+def write_traced(machine: SerialManager, command: str, kind: str, write: Callable[[], Any]) -> Any:
+    """Run a non-blocking write from the event loop, recording it like any other command"""
+    trace = command_tracer.start(machine.machine_id, command, kind)
+    trace.enqueued = time.monotonic()
+    try:
+        result = write()
+        trace.written = time.monotonic()
+        return result
+    except Exception as e:
+        trace.result = f"failed: {e}"
+        raise
+    finally:
+        command_tracer.finish(trace)
+
+@machine_router.post("/command")
+async def send_command(cmd: SerialCommand, machine: SerialManager = Depends(get_machine)):
     """Send a command to the Maslow"""
     try:
-        responses = serial_manager.send_command(cmd.command, cmd.wait_time)
+        responses = await run_command(machine, cmd.command, cmd.wait_time)
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@machine_router.post("/batch")
+async def send_batch(batch: BatchRequest, machine: SerialManager = Depends(get_machine)):
+    """Send several commands pipelined within the controller's RX buffer (one at a time with stop_on_error)"""
+    try:
+        return await run_batch(machine, batch.commands, batch.stop_on_error, batch.timeout)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/macros")
+async def list_macros():
+    """Stored macros"""
+    try:
+        return {"success": True, "macros": await asyncio.to_thread(macro_store.all)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.put("/api/macros/{name}")
+async def save_macro(name: str, macro: MacroDefinition):
+    """Create or replace a macro"""
+    try:
+        saved = await asyncio.to_thread(macro_store.save, name, macro.commands, macro.description, macro.stop_on_error)
+        return {"success": True, "name": name, "macro": saved}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/api/macros/{name}")
+async def delete_macro(name: str):
+    """Delete a macro"""
+    if not await asyncio.to_thread(macro_store.delete, name):
+        raise HTTPException(status_code=404, detail=f"Macro {name} not found")
+    return {"success": True, "name": name}
+
+@machine_router.post("/macros/{name}/run")
+async def run_macro(name: str, run: Optional[MacroRun] = None, machine: SerialManager = Depends(get_machine)):
+    """Run a stored macro as one batch"""
+    macro = await asyncio.to_thread(macro_store.get, name)
+    if macro is None:
+        raise HTTPException(status_code=404, detail=f"Macro {name} not found")
+    run = run or MacroRun()
+    stop_on_error = macro.get("stop_on_error", True) if run.stop_on_error is None else run.stop_on_error
+    try:
+        return {"name": name, **await run_batch(machine, list(macro["commands"]), stop_on_error, run.timeout)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Maslow-specific commands
-@app.post("/api/maslow/retract_all")
-async def retract_all():
+@machine_router.post("/maslow/retract_all")
+async def retract_all(machine: SerialManager = Depends(get_machine)):
     """Retract all anchor chains"""
     try:
-        responses = serial_manager.send_command("G91 G0 Z-10")  # Adjust command as needed
+        responses = await run_command(machine, "G91 G0 Z-10")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/extend_all") 
-async def extend_all():
+@machine_router.post("/maslow/extend_all") 
+async def extend_all(machine: SerialManager = Depends(get_machine)):
     """Extend all anchor chains"""
     try:
-        responses = serial_manager.send_command("G91 G0 Z10")  # Adjust command as needed
+        responses = await run_command(machine, "G91 G0 Z10")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/apply_tension")
-async def apply_tension():
+@machine_router.post("/maslow/apply_tension")
+async def apply_tension(machine: SerialManager = Depends(get_machine)):
     """Apply tension to chains"""
     try:
-        responses = serial_manager.send_command("$Maslow/ApplyTension")  # Adjust command as needed
+        responses = await run_command(machine, "$Maslow/ApplyTension")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/release_tension")
-async def release_tension():
+@machine_router.post("/maslow/release_tension")
+async def release_tension(machine: SerialManager = Depends(get_machine)):
     """Release chain tension"""
     try:
-        responses = serial_manager.send_command("$Maslow/ReleaseTension")  # Adjust command as needed
+        responses = await run_command(machine, "$Maslow/ReleaseTension")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/find_anchors")
-async def find_anchor_locations():
+@machine_router.post("/maslow/find_anchors")
+async def find_anchor_locations(machine: SerialManager = Depends(get_machine)):
     """Find anchor locations (calibration)"""
     try:
-        responses = serial_manager.send_command("$Maslow/FindAnchors")  # Adjust command as needed
+        responses = await run_command(machine, "$Maslow/FindAnchors")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/test")
-async def test_maslow():
+@machine_router.post("/maslow/test")
+async def test_maslow(machine: SerialManager = Depends(get_machine)):
     """Run Maslow test routine"""
     try:
-        responses = serial_manager.send_command("$Maslow/Test")  # Adjust command as needed
+        responses = await run_command(machine, "$Maslow/Test")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/maslow/set_z_stop")
-async def set_z_stop():
+@machine_router.post("/maslow/set_z_stop")
+async def set_z_stop(machine: SerialManager = Depends(get_machine)):
     """Set Z-axis stop position"""
     try:
-        responses = serial_manager.send_command("$Maslow/SetZStop")  # Adjust command as needed
+        responses = await run_command(machine, "$Maslow/SetZStop")  # Adjust command as needed
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # Movement commands
-@app.post("/api/jog")
-async def jog_axis(jog: JogCommand):
-    """Jog an axis"""
+def check_can_jog(machine: SerialManager):
+    if not machine.is_connected:
+        raise Exception("Not connected to Maslow")
+    if machine.job_streamer.is_active:
+        raise Exception("A job is running; jogging is disabled")
+
+@machine_router.post("/jog")
+async def jog_axis(jog: JogCommand, machine: SerialManager = Depends(get_machine)):
+    """Jog an axis by a fixed distance with `$J=` (refused with 429 while enough jog motion is queued)"""
     try:
-        command = f"G91 G0 {jog.axis.upper()}{jog.distance} F{jog.feed_rate}"
-        responses = serial_manager.send_command(command)
-        return {"success": True, "responses": responses}
+        check_can_jog(machine)
+        command = write_traced(machine, jog_line({jog.axis.upper(): jog.distance}, jog.feed_rate), "jog",
+                               lambda: machine.jog_engine.step({jog.axis: jog.distance}, jog.feed_rate))
+        return {"success": True, "command": command}
+    except JogBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.get("/jog")
+async def get_jog(machine: SerialManager = Depends(get_machine)):
+    """Current continuous-jog state"""
+    return {"success": True, "jog": machine.jog_engine.progress()}
+
+@machine_router.post("/jog/start")
+async def start_jog(jog: JogStart, machine: SerialManager = Depends(get_machine)):
+    """Start a continuous jog, or keep the current one alive; it stops if not repeated within the keepalive
+    
+    Keepalives should send the `hold` from the start response, so one that arrives after /jog/stop is ignored.
+    """
+    try:
+        check_can_jog(machine)
+        started = machine.jog_engine.start(jog.axes, jog.feed_rate, jog.hold)
+        return {"success": True, "started": started, "jog": machine.jog_engine.progress()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.post("/jog/stop")
+async def stop_jog(machine: SerialManager = Depends(get_machine)):
+    """Release a continuous jog: jog-cancel stops the machine within the segment it is running"""
+    try:
+        machine.jog_engine.stop()
+        return {"success": True, "jog": machine.jog_engine.progress()}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/home")
-async def home_all():
+@machine_router.post("/home")
+async def home_all(machine: SerialManager = Depends(get_machine)):
     """Home all axes"""
     try:
-        responses = serial_manager.send_command("$H")
+        responses = await run_command(machine, "$H")
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/home/xy")
-async def home_xy():
+@machine_router.post("/home/xy")
+async def home_xy(machine: SerialManager = Depends(get_machine)):
     """Home X and Y axes only"""
     try:
-        responses = serial_manager.send_command("$HX$HY")
-        return {"success": True, "responses": responses}
+        batch = await run_batch(machine, ["$HX", "$HY"], timeout=HOMING_TIMEOUT)
+        return {**batch, "responses": [r["response"] for r in batch["results"]]}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/home/z")
-async def home_z():
+@machine_router.post("/home/z")
+async def home_z(machine: SerialManager = Depends(get_machine)):
     """Home Z axis only"""
     try:
-        responses = serial_manager.send_command("$HZ")
+        responses = await run_command(machine, "$HZ")
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/set_origin/xy")
-async def set_xy_origin():
+@machine_router.post("/set_origin/xy")
+async def set_xy_origin(machine: SerialManager = Depends(get_machine)):
     """Set current XY position as work origin (0,0)"""
     try:
-        responses = serial_manager.send_command("G10 L20 P1 X0 Y0")
+        responses = await run_command(machine, "G10 L20 P1 X0 Y0")
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/set_origin/z")
-async def set_z_origin():
+@machine_router.post("/set_origin/z")
+async def set_z_origin(machine: SerialManager = Depends(get_machine)):
     """Set current Z position as work origin (0)"""
     try:
-        responses = serial_manager.send_command("G10 L20 P1 Z0")
+        responses = await run_command(machine, "G10 L20 P1 Z0")
         return {"success": True, "responses": responses}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/unlock")
-async def unlock_maslow():
+@machine_router.post("/unlock")
+async def unlock_maslow(machine: SerialManager = Depends(get_machine)):
     """Send unlock command ($X) to clear alarm state"""
     try:
-        if not serial_manager.is_connected:
+        if not machine.is_connected:
             raise HTTPException(status_code=400, detail="Not connected to Maslow")
         
-        serial_manager.send_command("$X")
+        await run_command(machine, "$X")
         return {"success": True, "message": "Unlock command sent"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/restart")
-async def restart_maslow():
+@machine_router.post("/restart")
+async def restart_maslow(machine: SerialManager = Depends(get_machine)):
     """Restart the Maslow to reload configuration"""
     try:
-        if not serial_manager.is_connected:
+        if not machine.is_connected:
             raise HTTPException(status_code=400, detail="Not connected to Maslow")
         
-        logger.info("🔄 Manual restart requested via API")
-        serial_manager.send_command("$ESP444=RESTART")
+        machine.logger.info("🔄 Manual restart requested via API")
+        await run_command(machine, "$ESP444=RESTART")
         await asyncio.sleep(5)  # Give it more time to restart
         return {"success": True, "message": "Maslow restart command sent"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/stop")
-async def emergency_stop():
+@machine_router.post("/stop")
+async def emergency_stop(machine: SerialManager = Depends(get_machine)):
     """Emergency stop"""
     try:
-        # Send multiple stop commands for safety
-        serial_manager.send_command("!")  # Feed hold
-        serial_manager.send_command("~")  # Cycle start/resume
-        serial_manager.send_command("\x18")  # Soft reset
+        # End the job first so no more of its lines follow the reset
+        machine.job_streamer.fail("Emergency stop")
+        # Send multiple stop commands for safety; realtime bytes go straight out, no waiting
+        write_traced_realtime(machine, "!")  # Feed hold
+        write_traced_realtime(machine, "~")  # Cycle start/resume
+        write_traced_realtime(machine, "\x18")  # Soft reset
+        machine.jog_engine.reset()  # the reset discarded any jog lines still waiting for an ok
         return {"success": True, "message": "Emergency stop executed"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Controller settings, served from the cache
+@machine_router.get("/settings")
+async def get_settings(prefix: Optional[str] = None, machine: SerialManager = Depends(get_machine)):
+    """Cached controller settings from the last `$$`/`$S` dump and later writes"""
+    try:
+        settings = machine.settings.as_dict(prefix)
+        return {
+            "success": True,
+            "settings": settings,
+            "count": len(settings),
+            "loaded_at": machine.settings.loaded_at,
+            "updated_at": machine.settings.updated_at
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.post("/settings/refresh")
+async def refresh_settings(machine: SerialManager = Depends(get_machine)):
+    """Re-read every setting from the controller"""
+    try:
+        count = await asyncio.to_thread(machine.refresh_settings)
+        return {"success": True, "count": count, "loaded_at": machine.settings.loaded_at}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.get("/settings/{key:path}")
+async def get_setting(key: str, machine: SerialManager = Depends(get_machine)):
+    """One cached setting; a setting not seen yet is queried from the controller once"""
+    name, value = machine.settings.get(key)
+    if name is None and machine.is_connected:
+        try:
+            await asyncio.to_thread(machine.refresh_settings, setting_queries(key))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        name, value = machine.settings.get(key)
+    if name is None:
+        raise HTTPException(status_code=404, detail=f"Setting {key} not found")
+    return {"success": True, "key": name, "value": value}
+
 # Configuration management
-@app.get("/api/config/maslow")
-async def get_maslow_config():
+async def load_config(path: Path, parser) -> ConfigEntry:
+    """Cached config file; only a cache miss reads and parses, off the event loop"""
+    return config_files.peek(path) or await asyncio.to_thread(config_files.load, path, parser)
+
+def config_response(request: Request, entry: ConfigEntry, key: str) -> Response:
+    """JSON response for a config file, or 304 when the client's If-None-Match already has this version"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if entry.etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"success": True, key: entry.data}, headers=headers)
+
+@machine_router.get("/config/maslow")
+async def get_maslow_config(request: Request, machine: SerialManager = Depends(get_machine)):
     """Get Maslow configuration"""
     try:
-        config_file = CONFIG_DIR / "maslow.yaml"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                config = yaml.safe_load(f)
-            return {"success": True, "config": config}
-        else:
-            return {"success": False, "message": "Config file not found"}
+        entry = await load_config(machine.config_file, parse_yaml)
+        return config_response(request, entry, "config")
+    except FileNotFoundError:
+        return {"success": False, "message": "Config file not found"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/api/config/maslow")
-async def update_maslow_config(config_update: ConfigUpdate):
+@machine_router.post("/config/maslow")
+async def update_maslow_config(config_update: ConfigUpdate, machine: SerialManager = Depends(get_machine)):
     """Update Maslow configuration"""
     try:
-        config_file = CONFIG_DIR / "maslow.yaml"
+        config_file = machine.config_file
         
-        # Save to YAML file
-        logger.info("💾 Saving configuration to YAML file...")
-        with open(config_file, 'w') as f:
-            yaml.safe_dump(config_update.config, f, default_flow_style=False)
-        logger.info("✅ Configuration saved to file")
-        
-        # Restart Maslow to load new configuration
-        if serial_manager.is_connected:
+        # Diff against what the controller last received (or the file it booted with)
+        applied = machine.applied_config
+        if applied is None:
             try:
-                logger.info("🔄 Restarting Maslow to apply new configuration...")
-                serial_manager.send_command("$ESP444=RESTART", wait_time=1)
-                await asyncio.sleep(5)  # Give it time to restart
-                logger.info("✅ Maslow restarted - new configuration should be active")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to restart Maslow: {e}")
+                applied = (await load_config(config_file, parse_yaml)).data
+            except FileNotFoundError:
+                applied = {}
+        diff = diff_configs(applied, config_update.config)
         
-        return {"success": True, "message": "Configuration saved and Maslow restarted"}
+        # Save to YAML file (atomically, so concurrent readers never see a partial file)
+        machine.logger.info("💾 Saving configuration to YAML file...")
+        await asyncio.to_thread(config_files.write_yaml, config_file, config_update.config)
+        machine.logger.info("✅ Configuration saved to file")
+        
+        result = {"success": True, "changes": diff.as_dict(), "applied": APPLY_NONE, "failed": []}
+        if not machine.is_connected and diff.plan != APPLY_NONE:
+            # Keep diffing against what the controller has, and catch up once it is ready
+            machine.applied_config = applied
+            machine.config_pending = True
+            result["pending"] = True
+            result["message"] = "Configuration saved; it will be applied when the Maslow is connected"
+            return result
+        
+        machine.config_pending = False
+        result.update(await asyncio.to_thread(machine.apply_config, diff))
+        machine.applied_config = config_update.config
+        path = result["applied"]
+        result["message"] = {
+            APPLY_NONE: "Configuration saved; no controller settings changed",
+            APPLY_RUNTIME: f"Configuration saved and {len(diff.runtime)} settings applied live",
+            APPLY_RESTART: "Configuration saved and Maslow restarted",
+        }[path]
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/config/preferences")
-async def get_preferences():
+async def get_preferences(request: Request):
     """Get UI preferences"""
     try:
-        prefs_file = CONFIG_DIR / "preferences.json"
-        if prefs_file.exists():
-            with open(prefs_file, 'r') as f:
-                prefs = json.load(f)
-            return {"success": True, "preferences": prefs}
-        else:
-            return {"success": False, "message": "Preferences file not found"}
+        entry = await load_config(CONFIG_DIR / "preferences.json", parse_json)
+        return config_response(request, entry, "preferences")
+    except FileNotFoundError:
+        return {"success": False, "message": "Preferences file not found"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -712,75 +1720,198 @@ async def upload_gcode_file(file: UploadFile = File(...)):
             content = await file.read()
             f.write(content)
         
+        # Pre-warm the preflight cache for every machine's work area so starting the job later is instant
+        if analysis_pool:
+            for area in {WorkArea.from_file(m.config_file) for m in machines.values()}:
+                try:
+                    analysis_pool.submit("preflight", file_path, area, PRIORITY_BACKGROUND)
+                except AnalysisQueueFull:
+                    logger.warning(f"⚠️ Analysis queue full; {file.filename} will be checked on demand")
+        
         return {"success": True, "message": f"File {file.filename} uploaded successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@machine_router.get("/files/{filename}/reachability")
+async def check_file_reachability(filename: str, machine: SerialManager = Depends(get_machine)):
+    """Check that every point of a G-code file stays inside the reachable, well-tensioned frame area"""
+    file_path = GCODE_DIR / Path(filename).name
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File {filename} not found")
+
+    try:
+        frame = FrameGeometry.from_file(machine.config_file)
+        report = await analyze_file("reachability", file_path, frame)
+        return {"success": True, "report": report}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.get("/files/{filename}/preflight")
+async def preflight_file(filename: str, machine: SerialManager = Depends(get_machine)):
+    """Validate a G-code file: unsupported words, modal mistakes, missing feed and work-area bounds"""
+    file_path = GCODE_DIR / Path(filename).name
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File {filename} not found")
+
+    try:
+        area = WorkArea.from_file(machine.config_file)
+        report = await analyze_file("preflight", file_path, area)
+        return {"success": True, "report": report}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Job control
+@machine_router.post("/jobs/start")
+async def start_job(job: JobStart, machine: SerialManager = Depends(get_machine)):
+    """Run a G-code file; refused if it fails preflight unless the operator overrides"""
+    file_path = GCODE_DIR / Path(job.filename).name
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File {job.filename} not found")
+    if not machine.is_connected:
+        raise HTTPException(status_code=400, detail="Not connected to Maslow")
+    if machine.pending_acks:
+        # Job lines are acknowledged in order after these; in worker mode they'd be taken for the job's
+        raise HTTPException(status_code=409, detail="Commands are still waiting for their replies; try again")
+
+    area = WorkArea.from_file(machine.config_file)
+    report = await analyze_file("preflight", file_path, area, PRIORITY_JOB)
+    if not report["passed"] and not job.override_preflight:
+        raise HTTPException(status_code=409, detail={
+            "message": f"{job.filename} failed preflight with {report['error_count']} errors",
+            "preflight": report
+        })
+    if not report["passed"]:
+        machine.logger.warning(f"⚠️ Starting {job.filename} despite {report['error_count']} preflight errors (operator override)")
+
+    try:
+        machine.job_streamer.start(file_path)
+        return {"success": True, "job": machine.job_streamer.progress(), "preflight": report}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/analysis/tasks")
+async def list_analysis_tasks():
+    """List queued and running file analyses"""
+    tasks = analysis_pool.tasks() if analysis_pool else []
+    return {"success": True, "tasks": tasks}
+
+@app.delete("/api/analysis/tasks/{task_id}")
+async def cancel_analysis_task(task_id: int):
+    """Cancel a queued or running file analysis"""
+    if not analysis_pool or not analysis_pool.cancel(task_id):
+        raise HTTPException(status_code=404, detail=f"Analysis task {task_id} not found")
+    return {"success": True, "message": f"Analysis task {task_id} cancelled"}
+
+@machine_router.get("/jobs/status")
+async def job_status(machine: SerialManager = Depends(get_machine)):
+    """Get progress of the current or last job"""
+    return {"success": True, "job": machine.job_streamer.progress()}
+
+@machine_router.post("/jobs/pause")
+async def pause_job(machine: SerialManager = Depends(get_machine)):
+    """Feed-hold the running job"""
+    try:
+        machine.job_streamer.pause()
+        return {"success": True, "job": machine.job_streamer.progress()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.post("/jobs/resume")
+async def resume_job(machine: SerialManager = Depends(get_machine)):
+    """Resume a paused job"""
+    try:
+        machine.job_streamer.resume()
+        return {"success": True, "job": machine.job_streamer.progress()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@machine_router.post("/jobs/stop")
+async def stop_job(machine: SerialManager = Depends(get_machine)):
+    """Abort the running job"""
+    try:
+        machine.job_streamer.stop()
+        return {"success": True, "job": machine.job_streamer.progress()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Machine-scoped routes, plus the original single-machine paths which act on the default machine
+app.include_router(machine_router, prefix="/api/machines/{machine_id}")
+app.include_router(machine_router, prefix="/api")
+
 # Status monitoring task
-async def status_monitor():
+async def status_monitor(machine: SerialManager):
     """Periodically update machine status"""
-    logger.info("📊 Status monitor task started")
+    machine.logger.info("📊 Status monitor task started")
     update_count = 0
     
     try:
         while True:
             update_count += 1
             
-            if serial_manager.is_connected:
+            if machine.is_connected:
                 try:
-                    logger.debug(f"❓ Sending status query #{update_count}")
-                    serial_manager.send_command("?", wait_time=0.5)
+                    # Realtime query; the reader thread parses the reply, so don't block the loop waiting
+                    machine.logger.debug(f"❓ Sending status query #{update_count}")
+                    machine.write_realtime("?")
                 except Exception as e:
-                    logger.warning(f"⚠️ Failed to send status query: {e}")
+                    machine.logger.warning(f"⚠️ Failed to send status query: {e}")
             else:
-                logger.debug(f"📊 Status update #{update_count}: Not connected")
+                machine.logger.debug(f"📊 Status update #{update_count}: Not connected")
             
             # Broadcast status update
             try:
                 await broadcast_message({
                     "type": "status_update",
-                    "status": machine_status
-                })
+                    "machine_id": machine.machine_id,
+                    "status": machine.status
+                }, machine.machine_id)
                 if update_count % 20 == 0:  # Log every 20th update (every minute)
-                    logger.debug(f"📡 Status broadcast #{update_count} sent")
+                    machine.logger.debug(f"📡 Status broadcast #{update_count} sent")
             except Exception as e:
-                logger.error(f"💥 Failed to broadcast status update: {e}")
-                logger.exception("Status broadcast exception:")
+                machine.logger.error(f"💥 Failed to broadcast status update: {e}")
+                machine.logger.exception("Status broadcast exception:")
             
             await asyncio.sleep(3)  # Update every 3 seconds
             
     except asyncio.CancelledError:
-        logger.info("🛑 Status monitor task cancelled")
+        machine.logger.info("🛑 Status monitor task cancelled")
         raise
     except Exception as e:
-        logger.error(f"💥 Status monitor task crashed: {e}")
-        logger.exception("Status monitor exception details:")
+        machine.logger.error(f"💥 Status monitor task crashed: {e}")
+        machine.logger.exception("Status monitor exception details:")
         raise
 
 # Message queue processor task
-async def message_queue_processor():
-    """Process queued messages and broadcast to WebSocket clients"""
-    logger.info("📬 Message queue processor task started")
+async def message_queue_processor(machine: Optional[SerialManager] = None):
+    """Process queued messages and broadcast to WebSocket clients (system-wide messages if no machine)"""
+    logger.info(f"📬 Message queue processor task started for {machine.machine_id if machine else 'system messages'}")
     processed_count = 0
     
     try:
         while True:
-            if serial_manager:
-                messages = serial_manager.get_queued_messages()
-                if messages:
-                    logger.debug(f"📨 Processing {len(messages)} queued messages")
+            if machine:
+                messages = machine.get_queued_messages()
+            else:
+                messages = system_messages.copy()
+                del system_messages[:len(messages)]
+            if messages:
+                logger.debug(f"📨 Processing {len(messages)} queued messages")
+                
+            for message in messages:
+                try:
+                    await broadcast_message(message, machine.machine_id if machine else None)
+                    processed_count += 1
                     
-                for message in messages:
-                    try:
-                        await broadcast_message(message)
-                        processed_count += 1
+                    if processed_count % 50 == 0:  # Log every 50 messages
+                        logger.debug(f"📊 Messages processed: {processed_count}")
                         
-                        if processed_count % 50 == 0:  # Log every 50 messages
-                            logger.debug(f"📊 Messages processed: {processed_count}")
-                            
-                    except Exception as e:
-                        logger.error(f"💥 Failed to broadcast message: {e}")
-                        logger.exception("Message broadcast exception:")
+                except Exception as e:
+                    logger.error(f"💥 Failed to broadcast message: {e}")
+                    logger.exception("Message broadcast exception:")
             
             await asyncio.sleep(0.1)  # Process queue every 100ms
             
@@ -792,6 +1923,24 @@ async def message_queue_processor():
         logger.exception("Message queue processor exception details:")
         raise
 
+# Event loop lag task
+async def event_loop_monitor():
+    """Measure how late the event loop wakes up; blocking calls on the loop show up here"""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            scheduled = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
+    except asyncio.CancelledError:
+        logger.info("🛑 Event loop monitor task cancelled")
+        raise
+
+# The built UI, mounted last so the API, WebSocket and /metrics routes match first
+if FRONTEND_DIST and (Path(FRONTEND_DIST) / "index.html").exists():
+    app.mount("/", FrontendFiles(directory=FRONTEND_DIST), name="frontend")
+    logger.info(f"🎨 Serving the frontend from {FRONTEND_DIST}")
+
 # Start background tasks
 # @app.on_event("startup")  # REMOVED - combined with main startup handler
 # async def start_background_tasks():
@@ -799,4 +1948,4 @@ async def message_queue_processor():
 #     asyncio.create_task(message_queue_processor())
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8003) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8003) 
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Maslow Metrics
+Prometheus text-format counters, gauges and histograms that stay cheap on the serial and WebSocket hot paths
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Round-trip style latencies: 1 ms .. 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Event-loop lag: 100 µs .. 1 s
+LAG_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _PerThreadCells:
+    """One cell per writing thread; writes never contend, reads sum all cells"""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+
+    def cell(self) -> List[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0.0] * self._size
+            self._cells.append(cell)  # list.append is atomic under the GIL
+            return cell
+
+    def totals(self) -> List[float]:
+        totals = [0.0] * self._size
+        for cell in list(self._cells):
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    """A counter for one label combination"""
+
+    def __init__(self):
+        self._cells = _PerThreadCells(1)
+
+    def inc(self, amount: float = 1):
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class HistogramChild:
+    """A pre-bucketed histogram for one label combination"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = tuple(buckets)
+        # Layout: one count per bucket, then +Inf, then the running sum
+        self._cells = _PerThreadCells(len(self._buckets) + 2)
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[bisect_left(self._buckets, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self) -> Tuple[List[Tuple[float, float]], float, float]:
+        """Cumulative (upper bound, count) pairs, sum and count"""
+        totals = self._cells.totals()
+        cumulative, running = [], 0.0
+        for bound, count in zip(self._buckets + (float("inf"),), totals[:-1]):
+            running += count
+            cumulative.append((bound, running))
+        return cumulative, totals[-1], running
+
+
+class _Family:
+    """A named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """Child for one label combination, created on first use"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, **labels: str):
+        """Forget one label combination (e.g. a disconnected client)"""
+        self._children.pop(tuple(str(labels[name]) for name in self.labelnames), None)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, child in list(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, running in cumulative:
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(running)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(count)}")
+        return lines
+
+
+class CallbackMetric(_Family):
+    """Values computed at scrape time, so the hot path pays nothing (queue depths, connection state)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, value in self.callback():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """All metrics exposed on /metrics"""
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def register(self, family: _Family) -> _Family:
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, callback, kind))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            try:
+                lines += family.collect()
+            except Exception as e:
+                lines.append(f"# {family.name} collection failed: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SERIAL_RX_BYTES = REGISTRY.counter("maslow_serial_rx_bytes_total", "Bytes received from the controller", ["machine"])
+SERIAL_RX_LINES = REGISTRY.counter("maslow_serial_rx_lines_total", "Lines received from the controller", ["machine"])
+SERIAL_TX_BYTES = REGISTRY.counter("maslow_serial_tx_bytes_total", "Bytes written to the controller", ["machine"])
+SERIAL_TX_LINES = REGISTRY.counter("maslow_serial_tx_lines_total", "Lines written to the controller (realtime bytes excluded)", ["machine"])
+SERIAL_RESPONSES = REGISTRY.counter("maslow_serial_responses_total", "ok/error responses from the controller", ["machine", "result"])
+COMMAND_ROUNDTRIP = REGISTRY.histogram("maslow_command_roundtrip_seconds",
+                                       "Time from writing a line to its ok/error", ["machine", "source"])
+WEBSOCKET_SEND = REGISTRY.histogram("maslow_websocket_send_seconds", "Time to send one message to a WebSocket client",
+                                    ["machine", "client"])
+WEBSOCKET_DROPPED = REGISTRY.counter("maslow_websocket_dropped_messages_total",
+                                     "Messages that could not be delivered to a WebSocket client", ["machine"])
+EVENT_LOOP_LAG = REGISTRY.histogram("maslow_event_loop_lag_seconds", "How late the event loop runs a scheduled wakeup",
+                                    buckets=LAG_BUCKETS)
+
+
+class SerialMetrics:
+    """Per-machine children, resolved once so the hot path skips label lookups"""
+
+    def __init__(self, machine: str):
+        self.rx_bytes = SERIAL_RX_BYTES.labels(machine=machine)
+        self.rx_lines = SERIAL_RX_LINES.labels(machine=machine)
+        self.tx_bytes = SERIAL_TX_BYTES.labels(machine=machine)
+        self.tx_lines = SERIAL_TX_LINES.labels(machine=machine)
+        self.ok = SERIAL_RESPONSES.labels(machine=machine, result="ok")
+        self.error = SERIAL_RESPONSES.labels(machine=machine, result="error")
+        self.command_roundtrip = COMMAND_ROUNDTRIP.labels(machine=machine, source="command")
+        self.job_roundtrip = COMMAND_ROUNDTRIP.labels(machine=machine, source="job")
+        self.websocket_dropped = WEBSOCKET_DROPPED.labels(machine=machine)
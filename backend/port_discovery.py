@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Maslow Serial Port Discovery
+Finds the Maslow by USB identity and probe handshake, and watches for ports being plugged in or removed
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Collection, Dict, List, Optional
+import logging
+
+import serial
+import serial.tools.list_ports
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5        # seconds between hotplug checks
+PROBE_TIMEOUT = 1.0        # seconds to wait for a $I reply when probing
+NEGATIVE_PROBE_TTL = 30.0  # seconds before a port that failed the probe is tried again
+
+# Device node prefixes worth watching under /dev (Linux and macOS)
+DEV_PREFIXES = ("ttyACM", "ttyUSB", "cu.usb", "tty.usb", "cu.wchusbserial", "cu.SLAB")
+
+# USB bridges found on ESP32 boards, most likely first
+KNOWN_USB_IDS = [
+    (0x303A, None),    # Espressif native USB (ESP32-S3, Maslow 4)
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+    (0x1A86, None),    # WCH CH340/CH9102
+    (0x0403, 0x6001),  # FTDI FT232
+]
+
+
+@dataclass(frozen=True)
+class PortInfo:
+    """One serial port as reported by the OS"""
+    device: str
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+    manufacturer: Optional[str] = None
+
+    @classmethod
+    def from_list_port(cls, port) -> "PortInfo":
+        """Build from a serial.tools.list_ports entry"""
+        return cls(port.device, port.vid, port.pid, port.serial_number, port.location,
+                   port.description, port.manufacturer)
+
+    @property
+    def is_usb(self) -> bool:
+        return self.vid is not None
+
+    @property
+    def identity(self) -> str:
+        """Stable key for this physical device, even if the OS renumbers its device node"""
+        if not self.is_usb:
+            return self.device
+        return f"{self.vid:04X}:{self.pid:04X}:{self.serial_number or self.location or self.device}"
+
+    @property
+    def rank(self) -> int:
+        """Lower is more likely to be a Maslow"""
+        for i, (vid, pid) in enumerate(KNOWN_USB_IDS):
+            if self.vid == vid and pid in (None, self.pid):
+                return i
+        return len(KNOWN_USB_IDS) if self.is_usb else len(KNOWN_USB_IDS) + 1
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        """JSON-friendly representation"""
+        return {
+            "device": self.device,
+            "vid": f"{self.vid:04X}" if self.vid is not None else None,
+            "pid": f"{self.pid:04X}" if self.pid is not None else None,
+            "serial_number": self.serial_number,
+            "description": self.description,
+            "manufacturer": self.manufacturer,
+        }
+
+
+def probe_port(device: str, baud_rate: int, timeout: float = PROBE_TIMEOUT) -> bool:
+    """Ask a port for $I and return True if FluidNC/GRBL answers"""
+    port = serial.Serial()
+    port.port = device
+    port.baudrate = baud_rate
+    port.timeout = 0.05
+    # Keep DTR/RTS released so boards with an auto-reset circuit are not rebooted by the probe
+    port.dtr = False
+    port.rts = False
+    try:
+        port.open()
+        port.reset_input_buffer()
+        port.write(b"\n$I\n")
+        buffer = b""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            buffer += port.read(port.in_waiting or 1)
+            text = buffer.decode("utf-8", errors="ignore")
+            if "[VER:" in text or "FluidNC" in text or "Grbl" in text:
+                return True
+        return False
+    except (serial.SerialException, OSError) as e:
+        logger.debug(f"Probe of {device} failed: {e}")
+        return False
+    finally:
+        try:
+            port.close()
+        except Exception:
+            pass
+
+
+class PortDiscovery:
+    """Cached port list, Maslow identification and hotplug watching"""
+
+    def __init__(self, preferred_port: Optional[str] = None, baud_rate: int = 115200,
+                 on_change: Optional[Callable[[List[PortInfo], List[PortInfo]], None]] = None):
+        self.preferred_port = preferred_port
+        self.baud_rate = baud_rate
+        self.on_change = on_change
+        self.ports: Dict[str, PortInfo] = {}
+        self._maslow_identities: Dict[str, bool] = {}
+        self._probed_at: Dict[str, float] = {}
+        self._fingerprint: Optional[frozenset] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan_fingerprint(self) -> frozenset:
+        """Cheap summary of attached ports; only a change triggers a full rescan"""
+        if os.name == "posix" and os.path.isdir("/dev"):
+            with os.scandir("/dev") as entries:
+                return frozenset(e.name for e in entries if e.name.startswith(DEV_PREFIXES))
+        return frozenset(p.device for p in serial.tools.list_ports.comports())
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan ports if anything changed; returns True when the port list changed"""
+        with self._refresh_lock:
+            fingerprint = self._scan_fingerprint()
+            if not force and fingerprint == self._fingerprint:
+                return False
+            self._fingerprint = fingerprint
+
+            current = {p.device: PortInfo.from_list_port(p) for p in serial.tools.list_ports.comports()}
+            with self._lock:
+                added = [p for d, p in current.items() if self.ports.get(d) != p]
+                removed = [p for d, p in self.ports.items() if current.get(d) != p]
+                self.ports = current
+                for port in added:
+                    # A freshly plugged device deserves a new probe even if it failed before
+                    if not self._maslow_identities.get(port.identity):
+                        self._maslow_identities.pop(port.identity, None)
+                        self._probed_at.pop(port.identity, None)
+
+        if added or removed:
+            for port in added:
+                logger.info(f"🔌 Serial port added: {port.device} ({port.description})")
+            for port in removed:
+                logger.info(f"🔌 Serial port removed: {port.device}")
+            if self.on_change:
+                self.on_change(added, removed)
+        return bool(added or removed)
+
+    def _preferred_present(self, port: Optional[str] = None) -> bool:
+        """True if a configured port override is attached (device path or COM name)"""
+        port = port or self.preferred_port
+        return bool(port) and (port in self.ports or os.path.exists(port))
+
+    def find_maslow(self, preferred_port: Optional[str] = None, serial_number: Optional[str] = None,
+                    exclude: Collection[str] = ()) -> Optional[str]:
+        """Pick a Maslow's port: configured port or USB serial number, known identity, then probe by likelihood
+
+        Ports in `exclude` (e.g. already open for another machine) are never returned or probed.
+        """
+        self.refresh()
+        preferred_port = preferred_port or self.preferred_port
+        if preferred_port:
+            return preferred_port if self._preferred_present(preferred_port) else None
+
+        with self._lock:
+            candidates = sorted((p for p in self.ports.values() if p.device not in exclude),
+                                key=lambda p: (p.rank, p.device))
+        if serial_number:
+            return next((p.device for p in candidates if p.serial_number == serial_number), None)
+        for port in candidates:
+            if self._maslow_identities.get(port.identity):
+                return port.device
+
+        now = time.monotonic()
+        for port in candidates:
+            if not port.is_usb:
+                continue
+            known = self._maslow_identities.get(port.identity)
+            if known is False and now - self._probed_at.get(port.identity, 0.0) < NEGATIVE_PROBE_TTL:
+                continue
+            logger.info(f"🔎 Probing {port.device} ({port.description})...")
+            found = probe_port(port.device, self.baud_rate)
+            self._maslow_identities[port.identity] = found
+            self._probed_at[port.identity] = now
+            if found:
+                logger.info(f"✅ Maslow identified on {port.device}")
+                return port.device
+        return None
+
+    def best_candidate(self) -> Optional[str]:
+        """Most likely Maslow port without opening anything (for status displays and the launcher)"""
+        self.refresh()
+        if self._preferred_present():
+            return self.preferred_port
+        with self._lock:
+            candidates = sorted(self.ports.values(), key=lambda p: (not self._maslow_identities.get(p.identity), p.rank))
+        return candidates[0].device if candidates and candidates[0].is_usb else None
+
+    def mark_maslow(self, device: str):
+        """Remember that a port answered like a Maslow (e.g. after a successful connect)"""
+        with self._lock:
+            port = self.ports.get(device)
+        if port is not None:
+            self._maslow_identities[port.identity] = True
+
+    def list_ports(self) -> List[Dict[str, object]]:
+        """Known ports with what we know about each"""
+        with self._lock:
+            ports = sorted(self.ports.values(), key=lambda p: (p.rank, p.device))
+        return [{**p.as_dict(), "maslow": self._maslow_identities.get(p.identity)} for p in ports]
+
+    def start(self):
+        """Watch for ports being plugged in or removed"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        logger.info("👀 Serial port watcher started")
+
+    def stop(self):
+        """Stop the hotplug watcher"""
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"💥 Serial port scan failed: {e}")
+            self._stop.wait(POLL_INTERVAL)
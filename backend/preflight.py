@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+G-code Preflight Validator
+Checks a file for unsupported words, modal mistakes and out-of-bounds moves before it is run
+"""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from config_service import config_files
+from gcode_tokens import TokenizedGCode, line_ranges, tokenize
+from kinematics import extract_toolpath
+from report_cache import ReportCache
+
+logger = logging.getLogger(__name__)
+
+# Words FluidNC accepts in a G-code block
+SUPPORTED_LETTERS = set("ABCFGHIJKLMNPQRSTXYZ")
+SUPPORTED_G_CODES = {
+    0, 1, 2, 3, 4, 10, 17, 18, 19, 20, 21, 28, 28.1, 30, 30.1, 38.2, 38.3, 38.4, 38.5,
+    40, 43.1, 49, 53, 54, 55, 56, 57, 58, 59, 61, 80, 90, 90.1, 91, 91.1, 92, 92.1, 93, 94,
+}
+SUPPORTED_M_CODES = {0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 30, 56, 62, 63, 64, 65, 67, 68}
+
+# G-codes that may not share a line with another member of their group (GRBL error:21)
+MODAL_GROUPS = {
+    "motion": (0, 1, 2, 3, 38.2, 38.3, 38.4, 38.5, 80),
+    "plane": (17, 18, 19),
+    "units": (20, 21),
+    "distance": (90, 91),
+    "coordinate system": (54, 55, 56, 57, 58, 59),
+    "feed rate mode": (93, 94),
+}
+
+# Work area from SERIAL_UI_REBUILD_PLAN.md: 500 mm x 500 mm around the work origin
+DEFAULT_WORK_AREA = {
+    "x_min": -250.0, "x_max": 250.0,
+    "y_min": -250.0, "y_max": 250.0,
+    "z_min": None, "z_max": None,
+}
+
+MAX_ISSUES_PER_CODE = 100
+CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class WorkArea:
+    """Allowed travel in work coordinates (mm); None leaves an axis unbounded"""
+    x_min: Optional[float]
+    x_max: Optional[float]
+    y_min: Optional[float]
+    y_max: Optional[float]
+    z_min: Optional[float]
+    z_max: Optional[float]
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "WorkArea":
+        """Build the work area from the `preflight:` section of maslow.yaml"""
+        section = (config or {}).get("preflight") or {}
+        values = {}
+        for key, default in DEFAULT_WORK_AREA.items():
+            value = section.get(key, default)
+            values[key] = None if value is None else float(value)
+        return cls(**values)
+
+    @classmethod
+    def from_file(cls, config_file: Path) -> "WorkArea":
+        """Build the work area from a YAML config file, falling back to defaults"""
+        config = config_files.load_yaml(config_file).data if config_file.exists() else None
+        return cls.from_config(config if isinstance(config, dict) else {})
+
+
+def _issue(code: str, line: int, message: str, end_line: Optional[int] = None) -> Dict[str, Any]:
+    """Build one error/warning entry"""
+    issue = {"code": code, "line": int(line), "message": message}
+    if end_line is not None and end_line != line:
+        issue["end_line"] = int(end_line)
+    return issue
+
+
+def _format_word(letter: int, value: float) -> str:
+    """Render a word like G38.2 or M3 for messages"""
+    return f"{chr(letter)}{value:g}"
+
+
+def _check_words(tokens: TokenizedGCode) -> List[Dict[str, Any]]:
+    """Malformed numbers, unsupported letters and G/M codes"""
+    errors = [
+        _issue("malformed_number", line, f"{word} does not have a valid number")
+        for line, word in tokens.malformed
+    ]
+
+    supported = np.zeros(256, dtype=bool)
+    supported[[ord(c) for c in SUPPORTED_LETTERS]] = True
+    bad = np.flatnonzero(~supported[tokens.letters])
+    errors += [
+        _issue("unsupported_word", tokens.lines[i],
+               f"{_format_word(tokens.letters[i], tokens.values[i])} is not a supported word")
+        for i in bad
+    ]
+
+    for letter, codes in (("G", SUPPORTED_G_CODES), ("M", SUPPORTED_M_CODES)):
+        values, lines = tokens.select(letter)
+        unknown = ~np.isin(np.round(values, 1), list(codes))
+        errors += [
+            _issue(f"unsupported_{letter.lower()}_code", line, f"{letter}{value:g} is not supported by FluidNC")
+            for value, line in zip(values[unknown], lines[unknown])
+        ]
+    return errors
+
+
+def _check_modal_groups(tokens: TokenizedGCode) -> List[Dict[str, Any]]:
+    """Two G-codes from the same modal group on one line"""
+    errors = []
+    g_values, g_lines = tokens.select("G")
+    rounded = np.round(g_values, 1)
+    for group, codes in MODAL_GROUPS.items():
+        lines = g_lines[np.isin(rounded, codes)]
+        if len(lines) < 2:
+            continue
+        counts = np.bincount(lines)
+        errors += [
+            _issue("modal_conflict", line, f"More than one {group} command on one line")
+            for line in np.flatnonzero(counts > 1)
+        ]
+    return errors
+
+
+def _check_motion(tokens: TokenizedGCode) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Feed rate, arc and spindle sanity for cutting moves"""
+    errors: List[Dict[str, Any]] = []
+    warnings: List[Dict[str, Any]] = []
+
+    g_values, g_lines = tokens.select("G")
+    cutting_lines = g_lines[np.isin(g_values, (1, 2, 3))]
+    if len(cutting_lines) == 0:
+        return errors, warnings
+    first_cut = int(cutting_lines.min())
+
+    f_values, f_lines = tokens.select("F")
+    fed_lines = f_lines[f_values > 0]
+    if len(fed_lines) == 0 or fed_lines.min() > first_cut:
+        errors.append(_issue("missing_feed_rate", first_cut, "First feed move has no F word before it"))
+
+    m_values, m_lines = tokens.select("M")
+    spindle_lines = m_lines[np.isin(m_values, (3, 4))]
+    if len(spindle_lines) == 0 or spindle_lines.min() > first_cut:
+        warnings.append(_issue("spindle_not_started", first_cut, "Feed move before the spindle is started (M3/M4)"))
+
+    arc_lines = g_lines[np.isin(g_values, (2, 3))]
+    if len(arc_lines):
+        center_letters = [ord(c) for c in "IJKR"]
+        center_lines = np.unique(tokens.lines[np.isin(tokens.letters, center_letters)])
+        missing = arc_lines[~np.isin(arc_lines, center_lines)]
+        errors += [_issue("arc_without_center", line, "Arc has no I/J/K offset or R radius") for line in missing]
+
+    return errors, warnings
+
+
+def _check_modes(tokens: TokenizedGCode) -> List[Dict[str, Any]]:
+    """Missing unit/distance mode declarations and files that end incremental"""
+    warnings = []
+    g_values, g_lines = tokens.select("G")
+    if not np.isin(g_values, (20, 21)).any():
+        warnings.append(_issue("units_not_set", 1, "File never sets G20/G21; the controller's current units will be used"))
+
+    distance = np.isin(g_values, (90, 91))
+    if not distance.any():
+        warnings.append(_issue("distance_mode_not_set", 1, "File never sets G90/G91; the controller's current mode will be used"))
+    elif g_values[distance][-1] == 91:
+        warnings.append(_issue("ends_incremental", int(g_lines[distance][-1]),
+                               "File leaves the controller in incremental (G91) mode"))
+    return warnings
+
+
+def _check_bounds(tokens: TokenizedGCode, area: WorkArea) -> Tuple[List[Dict[str, Any]], Dict[str, List[float]]]:
+    """Moves that leave the work area, plus the overall toolpath extents"""
+    points, lines = extract_toolpath(tokens)
+    if len(points) == 0:
+        return [], {}
+
+    outside = np.zeros(len(points), dtype=bool)
+    limits = ((area.x_min, area.x_max), (area.y_min, area.y_max), (area.z_min, area.z_max))
+    for axis, (low, high) in enumerate(limits):
+        if low is not None:
+            outside |= points[:, axis] < low - 1e-6
+        if high is not None:
+            outside |= points[:, axis] > high + 1e-6
+
+    errors = [
+        _issue("out_of_bounds", r["start_line"], "Toolpath leaves the work area", end_line=r["end_line"])
+        for r in line_ranges(outside, lines)
+    ]
+    extents = {
+        axis: [float(points[:, i].min()), float(points[:, i].max())]
+        for i, axis in enumerate("xyz")
+    }
+    return errors, extents
+
+
+def _capped(issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep at most MAX_ISSUES_PER_CODE entries of each code, sorted by line"""
+    kept: List[Dict[str, Any]] = []
+    per_code: Dict[str, int] = {}
+    for issue in sorted(issues, key=lambda i: i["line"]):
+        count = per_code.get(issue["code"], 0)
+        if count < MAX_ISSUES_PER_CODE:
+            kept.append(issue)
+        per_code[issue["code"]] = count + 1
+    return kept
+
+
+def validate(tokens: TokenizedGCode, area: WorkArea,
+             progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """Run every preflight check over a tokenized file, calling `progress` between checks"""
+    step = progress or (lambda fraction: None)
+    errors = _check_words(tokens) + _check_modal_groups(tokens)
+    step(0.4)
+    motion_errors, warnings = _check_motion(tokens)
+    errors += motion_errors
+    warnings += _check_modes(tokens)
+    step(0.6)
+    bounds_errors, extents = _check_bounds(tokens, area)
+    errors += bounds_errors
+
+    return {
+        "passed": not errors,
+        "error_count": len(errors),
+        "warning_count": len(warnings),
+        "errors": _capped(errors),
+        "warnings": _capped(warnings),
+        "lines": tokens.line_count,
+        "words": len(tokens),
+        "extents": extents,
+        "work_area": asdict(area),
+    }
+
+
+class PreflightValidator(ReportCache):
+    """Caches preflight reports per (file hash, work area)"""
+
+    max_entries = CACHE_SIZE
+
+    def compute(self, data: bytes, area: WorkArea,
+                progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Build the preflight report for raw G-code bytes"""
+        step = progress or (lambda fraction: None)
+        tokens = tokenize(data)
+        step(0.2)
+        report = validate(tokens, area, step)
+        logger.info(f"🧪 Preflight: {report['error_count']} errors, {report['warning_count']} warnings")
+        return report
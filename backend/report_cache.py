@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Analysis Report Cache
+LRU of file analysis reports keyed by content hash and analysis settings
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def read_and_hash(path: Path, progress: Optional[Callable[[float], None]] = None) -> Tuple[bytes, str]:
+    """Read a file in chunks, returning its bytes and SHA-256 hex digest"""
+    size = max(path.stat().st_size, 1)
+    digest = hashlib.sha256()
+    chunks = []
+    done = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            chunks.append(chunk)
+            done += len(chunk)
+            if progress:
+                progress(min(done / size, 1.0))
+    return b"".join(chunks), digest.hexdigest()
+
+
+class ReportCache:
+    """Base class for analyses whose result depends only on file content and settings"""
+
+    max_entries = 16
+
+    def __init__(self, max_entries: Optional[int] = None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, Hashable], Dict[str, Any]]" = OrderedDict()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def compute(self, data: bytes, settings: Hashable,
+                progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Run the analysis; implemented by subclasses
+
+        `progress(fraction)` is called between stages and may raise to abandon the run (e.g. a cancelled task).
+        """
+        raise NotImplementedError
+
+    def known_digest(self, path: Path) -> Optional[str]:
+        """Content hash of a file seen before, if it has not changed since"""
+        stat = path.stat()
+        return self._digests.get((str(path), stat.st_size, stat.st_mtime_ns))
+
+    def remember_digest(self, path: Path, digest: str):
+        """Record the content hash of a file at its current size and mtime"""
+        stat = path.stat()
+        self._digests[(str(path), stat.st_size, stat.st_mtime_ns)] = digest
+
+    def lookup(self, digest: str, settings: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a cached report, marking it as recently used"""
+        key = (digest, settings)
+        with self._lock:
+            report = self._cache.get(key)
+            if report is not None:
+                self._cache.move_to_end(key)
+                return {**report, "cached": True}
+        return None
+
+    def lookup_file(self, path: Path, settings: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a cached report for an unchanged file without reading it"""
+        digest = self.known_digest(path)
+        return self.lookup(digest, settings) if digest else None
+
+    def store(self, digest: str, settings: Hashable, report: Dict[str, Any]):
+        """Add a report, evicting the least recently used ones"""
+        with self._lock:
+            self._cache[(digest, settings)] = report
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def check_file(self, path: Path, settings: Hashable) -> Dict[str, Any]:
+        """Return the report for a file, computing it in this process on a cache miss"""
+        cached = self.lookup_file(path, settings)
+        if cached is not None:
+            return cached
+
+        data, digest = read_and_hash(path)
+        self.remember_digest(path, digest)
+        cached = self.lookup(digest, settings)
+        if cached is not None:
+            return cached
+
+        report = self.compute(data, settings)
+        report["file_hash"] = digest
+        self.store(digest, settings, report)
+        return {**report, "cached": False}
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Maslow Serial Mux
+Shares a machine's serial stream with local tools over a Unix domain socket while the backend owns the port
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+from log_pipeline import TX
+
+logger = logging.getLogger(__name__)
+
+ACK_TIMEOUT = 30.0   # seconds before an injected line that never got ok/error stops blocking the queue
+MAX_LINE = 256       # longer injected lines are refused rather than buffered without end
+MUX_ERROR = "error:mux"  # ends the reply to a line the mux refused, after a [MUX:...] reason line
+
+# Non-blocking send where the platform has it; a client that can't keep up is dropped, never waited for
+SEND_FLAGS = getattr(socket, "MSG_DONTWAIT", 0)
+
+
+class MuxClient:
+    """One connected tool"""
+
+    def __init__(self, sock: socket.socket, name: str):
+        self.sock = sock
+        self.name = name
+        self.closed = False
+        self.waiting = 0  # lines queued or in flight; while > 0 only this client's own replies reach it
+
+    def send(self, data: bytes) -> bool:
+        """Queue bytes in the socket buffer without blocking; False if the client is gone or too slow"""
+        if self.closed:
+            return False
+        try:
+            return self.sock.send(data, SEND_FLAGS) == len(data)
+        except OSError:
+            return False
+
+    def reply(self, *lines: str) -> bool:
+        return self.send("".join(line + "\r\n" for line in lines).encode())
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class SerialMux:
+    """Fans every line read from the controller out to local clients and arbitrates what they write
+
+    Injected lines are written one at a time, each after the previous one was acknowledged, and their
+    output and `ok`/`error` go to the client that sent them. Idle clients (taps) also see every other
+    line except acknowledgements, so nobody mistakes another tool's reply for its own. Status reports go
+    to everyone. Realtime bytes (`?`, `!`, `~`, Ctrl-X, jog cancel) are written at once.
+    """
+
+    def __init__(self, path: Optional[str], write_line: Callable[[str], None],
+                 write_realtime: Callable[[str], None], notify: Callable[[dict], None],
+                 busy: Callable[[], Optional[str]], realtime_commands: Iterable[str]):
+        self.path = path
+        self.write_line = write_line
+        self.write_realtime = write_realtime
+        self.notify = notify
+        self.busy = busy  # reason injected lines are refused right now, or None
+        self.realtime = frozenset(c.encode("latin-1") for c in realtime_commands)
+
+        self.clients: List[MuxClient] = []
+        self._queue: Deque[Tuple[MuxClient, str]] = deque()
+        self._inflight: Optional[Tuple[MuxClient, str, float]] = None
+        self._lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+        self._counter = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        """Listen on the socket path (owner-only); a no-op when disabled or unsupported"""
+        if not self.path or not hasattr(socket, "AF_UNIX") or self._server is not None:
+            return
+        self._remove_stale_socket()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.path)
+            os.chmod(self.path, 0o600)  # anyone who can connect can move the machine
+            server.listen()
+        except OSError as e:
+            server.close()
+            logger.error(f"❌ Serial mux could not listen on {self.path}: {e}")
+            return
+        self._server = server
+        threading.Thread(target=self._accept_loop, args=(server,), name="maslow-mux", daemon=True).start()
+        logger.info(f"🔀 Serial mux listening on {self.path}")
+
+    def stop(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.close()
+        with self._lock:
+            clients, self.clients = self.clients, []
+            self._queue.clear()
+            self._inflight = None
+        for client in clients:
+            client.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def publish(self, line: str):
+        """Fan a line read from the controller out to every client (called from the reader thread)"""
+        if not self.clients:
+            return
+        data = (line + "\r\n").encode()
+        owner = self._inflight[0] if self._inflight is not None else None
+        everyone = line.startswith("<")
+        targets = [c for c in list(self.clients) if everyone or c is owner or c.waiting == 0]
+        slow = [client for client in targets if not client.send(data)]
+        for client in slow:
+            logger.warning(f"🐌 Dropping mux client {client.name}: not reading fast enough")
+            self._drop(client)
+        if self._inflight is not None:
+            self._pump()  # expires a line that never got its ack
+
+    def on_ack(self, response: str) -> bool:
+        """Route an `ok`/`error` to the client whose line it answers; returns True if it was one"""
+        with self._lock:
+            if self._inflight is None:
+                return False
+            client, _, _ = self._inflight
+            self._inflight = None
+            client.waiting -= 1
+        client.reply(response)
+        self._pump()
+        return True
+
+    def reset(self, reason: str):
+        """The connection went away: answer everything queued or in flight"""
+        with self._lock:
+            waiting = list(self._queue)
+            if self._inflight is not None:
+                waiting.insert(0, self._inflight[:2])
+            self._queue.clear()
+            self._inflight = None
+            for client, _ in waiting:
+                client.waiting -= 1
+        for client, _ in waiting:
+            client.reply(f"[MUX:{reason}]", MUX_ERROR)
+
+    def describe(self) -> dict:
+        return {"path": self.path if self.is_running else None, "clients": [c.name for c in self.clients]}
+
+    def _remove_stale_socket(self):
+        """A socket file left by a crashed backend would block bind; one that still answers is refused"""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            logger.warning(f"⚠️ {self.path} is in use by another process")
+        finally:
+            probe.close()
+
+    def _accept_loop(self, server: socket.socket):
+        while self._server is server:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._counter += 1
+                client = MuxClient(sock, f"mux-{self._counter}")
+                self.clients.append(client)
+            logger.info(f"🔀 Mux client {client.name} connected ({len(self.clients)} total)")
+            threading.Thread(target=self._client_loop, args=(client,), name=f"maslow-{client.name}",
+                             daemon=True).start()
+
+    def _client_loop(self, client: MuxClient):
+        buffer = b""
+        try:
+            while not client.closed:
+                data = client.sock.recv(4096)
+                if not data:
+                    break
+                for byte in (data[i:i + 1] for i in range(len(data))):
+                    if byte in self.realtime:
+                        # Realtime bytes act immediately, even in the middle of a line, as on the controller
+                        try:
+                            self.write_realtime(byte.decode("latin-1"))
+                        except Exception as e:
+                            logger.debug(f"Mux realtime byte from {client.name} not sent: {e}")
+                    elif byte == b"\n":
+                        line = buffer.decode("utf-8", errors="ignore").strip()
+                        buffer = b""
+                        if line:
+                            self._inject(client, line)
+                    else:
+                        buffer += byte
+                        if len(buffer) > MAX_LINE:
+                            buffer = b""
+                            client.reply("[MUX:Line too long]", MUX_ERROR)
+        except OSError:
+            pass
+        except Exception as e:
+            logger.error(f"💥 Mux client {client.name} failed: {e}")
+        self._drop(client)
+
+    def _inject(self, client: MuxClient, line: str):
+        reason = self.busy()
+        if reason:
+            client.reply(f"[MUX:{reason}]", MUX_ERROR)
+            return
+        with self._lock:
+            client.waiting += 1
+            self._queue.append((client, line))
+        self._pump()
+
+    def _pump(self):
+        """Write the next queued line once nothing injected is waiting for its ack"""
+        while True:
+            with self._lock:
+                if self._inflight is not None:
+                    client, line, sent_at = self._inflight
+                    if time.monotonic() - sent_at < ACK_TIMEOUT:
+                        return
+                    logger.warning(f"⏰ Mux line from {client.name} never acknowledged: {line}")
+                    self._inflight = None
+                    client.waiting -= 1
+                while self._queue and self._queue[0][0].closed:
+                    self._queue.popleft()
+                if not self._queue:
+                    return
+                client, line = self._queue.popleft()
+                self._inflight = (client, line, time.monotonic())
+                try:
+                    self.write_line(line)
+                except Exception as e:
+                    self._inflight = None
+                    client.waiting -= 1
+                    client.reply(f"[MUX:{e}]", MUX_ERROR)
+                    continue
+            logger.info("Sent command: %s (%s)", line, client.name, extra=TX)
+            self.notify({"type": "command_sent", "command": line, "source": client.name, "timestamp": time.time()})
+            return
+
+    def _drop(self, client: MuxClient):
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+            else:
+                return
+        client.close()
+        logger.info(f"🔀 Mux client {client.name} disconnected ({len(self.clients)} left)")
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Maslow Serial Worker
+Runs serial I/O and job streaming in a child process so web-side load can't delay `ok` handling
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from job_streamer import JobStreamer
+from shm_ring import ShmRing, SnapshotSlot
+from transport import LineAssembler, Transport, open_transport
+
+logger = logging.getLogger(__name__)
+
+RING_CAPACITY = 4 * 1024 * 1024  # worker -> web events; dropped (and counted) if the web side falls behind
+SNAPSHOT_SIZE = 256 * 1024
+CALL_TIMEOUT = 5.0               # seconds to wait for the worker to answer a control call
+WORKER_NICENESS = -5             # best effort; needs privileges, ignored otherwise
+
+# Event tags, the first byte of each ring record
+EVENT_RX = b"r"      # a line received from the controller
+EVENT_NOTIFY = b"n"  # a JSON message for WebSocket clients (job progress)
+EVENT_LOST = b"l"    # the port failed; payload is the reason
+
+# Control calls the worker accepts over its pipe
+WORKER_OPS = {"open", "close", "write", "job_start", "job_pause", "job_resume", "job_stop", "job_fail", "job_progress"}
+
+
+class SerialEngine:
+    """Serial port, reader thread and job streamer; the part that runs inside the worker process"""
+
+    def __init__(self, emit: Callable[[bytes, bytes], None], publish: Callable[[Dict[str, Any]], None]):
+        self.emit = emit
+        self.publish = publish
+        self.port: Optional[Transport] = None
+        self.write_lock = threading.Lock()
+        self.streamer = JobStreamer(self.write_line, self.write_realtime, self._notify)
+        self.rx_lines = 0
+        self.tx_bytes = 0
+        self._reader: Optional[threading.Thread] = None
+
+    def open(self, device: str, baud_rate: int, record_to: Optional[str] = None):
+        """Open the port and start reading it"""
+        self.close()
+        port = open_transport(device, baud_rate, record_to=record_to)
+        port.reset_input_buffer()
+        port.reset_output_buffer()
+        self.port = port
+        self._reader = threading.Thread(target=self._read, args=(port,), daemon=True)
+        self._reader.start()
+        self._publish()
+
+    def close(self):
+        """Close the port; the reader notices and exits"""
+        port, self.port = self.port, None
+        if port:
+            try:
+                port.close()
+            except Exception:
+                pass
+        self._publish()
+
+    def write(self, data: bytes):
+        if self.port is None:
+            raise Exception("Not connected to Maslow")
+        with self.write_lock:
+            self.port.write(data)
+            self.tx_bytes += len(data)
+
+    def write_line(self, line: str):
+        self.write((line + "\n").encode())
+
+    def write_realtime(self, command: str):
+        self.write(command.encode("latin-1"))
+
+    def job_start(self, path: str) -> Dict[str, Any]:
+        self.streamer.start(Path(path))
+        return self.streamer.progress()
+
+    def job_pause(self) -> Dict[str, Any]:
+        self.streamer.pause()
+        return self.streamer.progress()
+
+    def job_resume(self) -> Dict[str, Any]:
+        self.streamer.resume()
+        return self.streamer.progress()
+
+    def job_stop(self) -> Dict[str, Any]:
+        self.streamer.stop()
+        return self.streamer.progress()
+
+    def job_fail(self, reason: str) -> Dict[str, Any]:
+        self.streamer.fail(reason)
+        return self.streamer.progress()
+
+    def job_progress(self) -> Dict[str, Any]:
+        return self.streamer.progress()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything the web side reads without a round trip"""
+        return {
+            "connected": self.port is not None,
+            "job": self.streamer.progress(),
+            "buffer_fill": self.streamer.buffer_fill,
+            "rx_lines": self.rx_lines,
+            "tx_bytes": self.tx_bytes,
+            "timestamp": time.time(),
+        }
+
+    def _publish(self):
+        self.publish(self.snapshot())
+
+    def _notify(self, message: Dict[str, Any]):
+        self._publish()
+        self.emit(EVENT_NOTIFY, json.dumps(message).encode())
+
+    def _read(self, port: Transport):
+        """Read lines, acknowledge job lines right here, and forward everything to the web side"""
+        lines = LineAssembler()
+        while self.port is port:
+            try:
+                chunk = port.read(port.in_waiting or 1)
+            except Exception as e:
+                if self.port is port:
+                    self.port = None
+                    self.streamer.fail(f"Connection lost: {e}")
+                    self.emit(EVENT_LOST, f"Serial read failed: {e}".encode())
+                break
+            if not chunk:
+                continue
+            for line in lines.feed(chunk):
+                self.rx_lines += 1
+                if line == b"ok" or line.startswith(b"error"):
+                    self.streamer.on_response(line.decode("utf-8", errors="ignore"))
+                elif not line.startswith(b"[VER:") and (b"fluidnc" in line.lower() or line.lower().startswith(b"grbl")):
+                    # Banner: the controller reset and dropped the job's lines; end it before anything else is written
+                    self.streamer.fail("Controller reset")
+                self.emit(EVENT_RX, line)
+
+
+def _worker_main(conn, doorbell, ring_name: str, snapshot_name: str):
+    """Worker process entry point: serve control calls until told to stop or the web process goes away"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the web process decides when we stop
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+    ring = ShmRing.attach(ring_name)
+    slot = SnapshotSlot.attach(snapshot_name)
+    bell = doorbell.fileno()
+    os.set_blocking(bell, False)
+
+    def emit(tag: bytes, payload: bytes):
+        ring.put(tag + payload)
+        # Wake the web side without ever blocking on it (a shared lock could stall us behind a busy web process)
+        try:
+            os.write(bell, b"\0")
+        except BlockingIOError:
+            pass
+
+    engine = SerialEngine(emit, lambda snapshot: slot.publish(json.dumps(snapshot).encode()))
+    while True:
+        try:
+            op, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if op == "shutdown":
+            break
+        try:
+            if op not in WORKER_OPS:
+                raise Exception(f"Unknown serial worker call: {op}")
+            conn.send(("ok", getattr(engine, op)(*args)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    engine.close()
+    ring.close()
+    slot.close()
+
+
+class SerialWorker:
+    """Web-side handle: spawns the worker, makes control calls and reads its events and snapshot"""
+
+    def __init__(self, name: str = "maslow-serial-worker"):
+        self.name = name
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._ring: Optional[ShmRing] = None
+        self._slot: Optional[SnapshotSlot] = None
+        self._doorbell = None
+        self._call_lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Spawn the worker process (no-op if it is running)"""
+        if self.is_alive():
+            return
+        self.shutdown()
+        self._ring = ShmRing.create(RING_CAPACITY)
+        self._slot = SnapshotSlot.create(SNAPSHOT_SIZE)
+        self._doorbell, child_bell = self._context.Pipe(duplex=False)
+        os.set_blocking(self._doorbell.fileno(), False)
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_worker_main, name=self.name, daemon=True,
+            args=(child_conn, child_bell, self._ring.name, self._slot.name),
+        )
+        self._process.start()
+        child_conn.close()
+        child_bell.close()
+        logger.info(f"🧵 Serial worker process {self.name} started (pid {self._process.pid})")
+
+    def shutdown(self):
+        """Stop the worker and release the shared memory"""
+        if self._process is not None:
+            try:
+                with self._call_lock:
+                    self._conn.send(("shutdown", ()))
+            except Exception:
+                pass
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        for resource in (self._conn, self._doorbell, self._ring, self._slot):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception:
+                    pass
+        self._conn = self._doorbell = self._ring = self._slot = None
+
+    def call(self, op: str, *args) -> Any:
+        """Run a control call in the worker and return its result"""
+        if not self.is_alive():
+            raise Exception("Serial worker is not running")
+        with self._call_lock:
+            self._conn.send((op, args))
+            if not self._conn.poll(CALL_TIMEOUT):
+                raise Exception(f"Serial worker did not answer {op}")
+            status, result = self._conn.recv()
+        if status == "error":
+            raise Exception(result)
+        return result
+
+    def next_event(self, timeout: float) -> Optional[Tuple[bytes, bytes]]:
+        """Next (tag, payload) from the worker, waiting up to `timeout` seconds"""
+        ring = self._ring
+        if ring is None:
+            time.sleep(timeout)
+            return None
+        record = ring.get()
+        if record is None:
+            # The doorbell is rung after each record is published, so draining it first can't lose a wakeup
+            if not self._doorbell.poll(timeout):
+                return None
+            try:
+                os.read(self._doorbell.fileno(), 65536)
+            except BlockingIOError:
+                pass
+            record = ring.get()
+            if record is None:
+                return None
+        return record[:1], record[1:]
+
+    def discard_events(self):
+        """Forget events left over from a previous connection"""
+        if self._ring is not None:
+            self._ring.discard()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest state the worker published"""
+        payload = self._slot.read() if self._slot is not None else None
+        return json.loads(payload) if payload else {}
+
+    @property
+    def dropped_events(self) -> int:
+        return self._ring.dropped if self._ring is not None else 0
+
+
+class WorkerPort:
+    """Stands in for the transport in the web process; writes go to the worker over the control pipe"""
+
+    in_waiting = 0
+
+    def __init__(self, worker: SerialWorker):
+        self.worker = worker
+        self.is_open = True
+
+    def write(self, data: bytes) -> int:
+        self.worker.call("write", data)
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+        self.worker.call("close")
+
+
+class WorkerJobStreamer:
+    """JobStreamer interface backed by the streamer running in the worker"""
+
+    def __init__(self, worker: SerialWorker):
+        self.worker = worker
+
+    @property
+    def state(self) -> str:
+        return self.progress()["state"]
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in ("running", "paused")
+
+    @property
+    def buffer_fill(self) -> float:
+        return self.worker.snapshot().get("buffer_fill", 0.0)
+
+    def start(self, gcode_file: Path):
+        self.worker.call("job_start", str(gcode_file))
+
+    def pause(self):
+        self.worker.call("job_pause")
+
+    def resume(self):
+        self.worker.call("job_resume")
+
+    def stop(self):
+        self.worker.call("job_stop")
+
+    def fail(self, reason: str):
+        try:
+            self.worker.call("job_fail", reason)
+        except Exception:
+            pass  # a dead worker has no job to fail
+
+    def on_response(self, response: str) -> bool:
+        """Job lines are acknowledged inside the worker"""
+        return False
+
+    def progress(self) -> Dict[str, Any]:
+        job = self.worker.snapshot().get("job")
+        if job is None:
+            return {"state": "idle", "filename": None, "total_lines": 0, "sent_lines": 0,
+                    "acknowledged_lines": 0, "percent": 0.0, "elapsed": None, "errors": []}
+        return job
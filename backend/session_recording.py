@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Maslow Session Recording
+Captures every byte sent to and received from a controller, and plays recorded sessions back as a fake port
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import parse_qs
+
+from transport import BufferedTransport, Transport
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, one JSON header line, then records of
+#   direction (b"T" host->controller, b"R" controller->host), microseconds since the previous record (uint32),
+#   payload length (uint16), payload
+MAGIC = b"MSLREC1\n"
+RECORD = struct.Struct("<cIH")
+TX, RX = b"T", b"R"
+MAX_DELTA = 0xFFFFFFFF       # longer gaps are split with empty records (~71 minutes each)
+MAX_PAYLOAD = 0xFFFF
+FLUSH_INTERVAL = 0.5         # seconds between flushes, so a crash loses at most this much
+SYNC_TIMEOUT = 5.0           # seconds a synced replay waits for the host before playing on anyway
+SESSION_SUFFIX = ".mslrec"
+NEWLINE = b"\n"
+
+
+class Record(NamedTuple):
+    time: float      # seconds since the recording started
+    direction: bytes  # TX or RX
+    data: bytes
+
+
+class Session(NamedTuple):
+    header: dict
+    records: List[Record]
+
+    @property
+    def duration(self) -> float:
+        return self.records[-1].time if self.records else 0.0
+
+
+class SessionRecorder:
+    """Appends timestamped TX/RX chunks to a session file; safe to call from the reader and writer threads"""
+
+    def __init__(self, path: Path, port: str = "", baud_rate: int = 0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._lock = threading.Lock()
+        self._started = self._last = time.monotonic()
+        self._flushed = self._started
+        header = {"port": port, "baud_rate": baud_rate, "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self._file.write(MAGIC + json.dumps(header).encode() + b"\n")
+
+    def record(self, direction: bytes, data: bytes):
+        with self._lock:
+            if self._file.closed:
+                return
+            now = time.monotonic()
+            delta = int((now - self._last) * 1_000_000)
+            self._last = now
+            while delta > MAX_DELTA:
+                self._file.write(RECORD.pack(direction, MAX_DELTA, 0))
+                delta -= MAX_DELTA
+            for offset in range(0, max(len(data), 1), MAX_PAYLOAD):
+                chunk = data[offset:offset + MAX_PAYLOAD]
+                self._file.write(RECORD.pack(direction, delta, len(chunk)) + chunk)
+                delta = 0
+            if now - self._flushed >= FLUSH_INTERVAL:
+                self._file.flush()
+                self._flushed = now
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                logger.info(f"📼 Session recorded to {self.path} ({time.monotonic() - self._started:.1f}s)")
+
+
+def read_session(path: Path) -> Session:
+    """Load a session file written by SessionRecorder"""
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session recording")
+    header_end = data.index(b"\n", len(MAGIC))
+    header = json.loads(data[len(MAGIC):header_end])
+    records: List[Record] = []
+    offset, elapsed = header_end + 1, 0
+    while offset + RECORD.size <= len(data):
+        direction, delta, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        elapsed += delta
+        if length:
+            records.append(Record(elapsed / 1_000_000, direction, data[offset:offset + length]))
+        offset += length
+    return Session(header, records)
+
+
+class RecordingTransport(Transport):
+    """Wraps another transport and records everything that goes through it"""
+
+    def __init__(self, inner: Transport, recorder: SessionRecorder):
+        self.inner = inner
+        self.recorder = recorder
+        self.name = inner.name
+
+    @property
+    def in_waiting(self) -> int:
+        return self.inner.in_waiting
+
+    def read(self, size: int = 1) -> bytes:
+        data = self.inner.read(size)
+        if data:
+            self.recorder.record(RX, data)
+        return data
+
+    def write(self, data: bytes) -> int:
+        written = self.inner.write(data)
+        self.recorder.record(TX, data)
+        return written
+
+    def reset_input_buffer(self):
+        self.inner.reset_input_buffer()
+
+    def reset_output_buffer(self):
+        self.inner.reset_output_buffer()
+
+    def close(self):
+        try:
+            self.inner.close()
+        finally:
+            self.recorder.close()
+
+
+class SessionPlayer:
+    """Delivers a session's received bytes with their original timing, scaled by `speed` (0 = no waiting)
+
+    With `sync`, each received chunk also waits until the host has written as many lines as it had when the
+    chunk was recorded, so a replay at any speed answers the host in the same order as the machine did.
+    """
+
+    def __init__(self, session: Session, deliver: Callable[[bytes], None], speed: float = 1.0,
+                 sync: bool = False, on_finished: Optional[Callable[[], None]] = None):
+        self.session = session
+        self.deliver = deliver
+        self.speed = speed
+        self.sync = sync
+        self.on_finished = on_finished
+        self.host_lines = 0
+        self.stalls = 0  # synced chunks played after SYNC_TIMEOUT because the host never sent their line
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._play, name="maslow-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def host_wrote(self, data: bytes):
+        lines = data.count(NEWLINE)
+        if lines:
+            with self._condition:
+                self.host_lines += lines
+                self._condition.notify_all()
+
+    def _play(self):
+        started = time.monotonic()
+        recorded_lines = 0
+        for record in self.session.records:
+            if record.direction == TX:
+                recorded_lines += record.data.count(NEWLINE)
+                continue
+            with self._condition:
+                if self.speed > 0:
+                    due = started + record.time / self.speed
+                    while not self._stopped and time.monotonic() < due:
+                        self._condition.wait(due - time.monotonic())
+                if self.sync and not self._condition.wait_for(
+                        lambda: self._stopped or self.host_lines >= recorded_lines, SYNC_TIMEOUT):
+                    self.stalls += 1
+                    self.host_lines = recorded_lines  # the host went its own way; sync from here on
+                if self._stopped:
+                    return
+            self.deliver(record.data)
+        logger.info(f"📼 Replay finished after {time.monotonic() - started:.2f}s ({self.stalls} sync stalls)")
+        if self.on_finished:
+            self.on_finished()
+
+
+def options_from_query(query: str) -> dict:
+    """`speed=2&sync=1&end=close` from a replay:// URL; `speed=max` plays without waiting"""
+    values = {key: items[-1] for key, items in parse_qs(query).items()}
+    speed = values.get("speed", "1")
+    return {
+        "speed": 0.0 if speed == "max" else float(speed),
+        "sync": values.get("sync", "0") not in ("0", "false", "no"),
+        "close_at_end": values.get("end") == "close",
+    }
+
+
+class ReplayTransport(BufferedTransport):
+    """A recorded session as a port, e.g. `replay://fixtures/sessions/job.mslrec?speed=max&sync=1`
+
+    What the host writes is kept in `sent`; by default the port stays open and quiet once the session ends.
+    """
+
+    def __init__(self, path: str, query: str = ""):
+        super().__init__(f"replay://{path}")
+        options = options_from_query(query)
+        self.sent = bytearray()
+        on_finished = (lambda: self._ended("Replay finished")) if options["close_at_end"] else None
+        self.player = SessionPlayer(read_session(Path(path)), self._feed, options["speed"], options["sync"],
+                                    on_finished)
+        self.player.start()
+
+    def write(self, data: bytes) -> int:
+        self._check_open()
+        self.sent += data
+        self.player.host_wrote(data)
+        return len(data)
+
+    def close(self):
+        super().close()
+        self.player.stop()
+
+
+def serve_pty(player_for: Callable[[Callable[[bytes], None]], SessionPlayer]) -> str:
+    """Play a session on a pty pair; returns the device to point the backend or another tool at"""
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)  # no echo, no line discipline: bytes arrive exactly as recorded
+    player = player_for(lambda data: os.write(master, data))
+
+    def read():
+        while True:
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                return
+            player.host_wrote(data)
+
+    threading.Thread(target=read, name="replay-pty", daemon=True).start()
+    player.start()
+    return os.ttyname(slave)
+
+
+def describe(session: Session) -> str:
+    tx = [record for record in session.records if record.direction == TX]
+    rx = [record for record in session.records if record.direction == RX]
+
+    def totals(records: List[Record]) -> str:
+        data = b"".join(record.data for record in records)
+        return f"{len(data)} bytes / {data.count(NEWLINE)} lines"
+
+    return (f"{session.header.get('port') or 'unknown port'} @ {session.header.get('started')}: "
+            f"{session.duration:.2f}s, {len(session.records)} records, TX {totals(tx)}, RX {totals(rx)}")
+
+
+def dump(session: Session):
+    """One line per record: time, direction and the bytes as text (realtime bytes escaped)"""
+    for record in session.records:
+        text = record.data.decode("latin-1").encode("unicode_escape").decode()
+        print(f"{record.time:10.6f} {'TX' if record.direction == TX else 'RX'} {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded controller sessions or play them on a pty")
+    parser.add_argument("command", choices=["info", "dump", "play"])
+    parser.add_argument("sessions", type=Path, nargs="+", help="Session files (one for dump and play)")
+    parser.add_argument("--speed", default="1", help="Playback speed for play: 1 = as recorded, 10, or max")
+    parser.add_argument("--sync", action="store_true", help="Hold each reply until the host sent its command")
+    args = parser.parse_args()
+    if args.command != "info" and len(args.sessions) > 1:
+        parser.error(f"{args.command} takes one session")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "info":
+        for path in args.sessions:
+            print(f"{path.name}: {describe(read_session(path))}")
+        return
+    session = read_session(args.sessions[0])
+    if args.command == "dump":
+        dump(session)
+    else:
+        options = options_from_query(f"speed={args.speed}")
+        finished = threading.Event()
+        device = serve_pty(lambda deliver: SessionPlayer(session, deliver, options["speed"], args.sync,
+                                                        finished.set))
+        logger.info(f"📼 Replaying {args.sessions[0].name} on {device}")
+        logger.info(f"   MASLOW_SERIAL_PORT={device}")
+        try:
+            finished.wait()
+            time.sleep(1.0)  # let the host drain the last replies
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
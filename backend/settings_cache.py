@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Maslow Settings Cache
+Typed copy of the controller's settings, built from `$$`/`$S` dumps and kept current as settings are written
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# `$100=80.000`, `$Report/Interval=50`, `$/axes/x/steps_per_mm=80`
+SETTING_LINE = re.compile(r"^\$([^=\s$][^=\s]*)=(.*)$")
+INT_VALUE = re.compile(r"^[+-]?\d+$")
+FLOAT_VALUE = re.compile(r"^[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?$")
+
+# `$name=value` commands that are actions rather than settings
+NOT_SETTINGS = re.compile(r"^(J|ESP444|Bye|SLP|H[XYZABC]*)$", re.IGNORECASE)
+
+# Dumps requested on connect and by a full refresh: GRBL numeric settings, then FluidNC named settings
+DUMP_COMMANDS = ["$$", "$S"]
+
+
+def setting_queries(key: str) -> List[str]:
+    """Commands that ask the controller for one setting, most likely spelling first"""
+    key = key.lstrip("$")
+    queries = [f"${key}"]
+    if "/" in key and not key.startswith("/"):
+        queries.append(f"$/{key}")
+    return queries
+
+
+def parse_setting_value(text: str) -> Any:
+    """Best-effort typed value: int, float, bool, or the raw string"""
+    text = text.strip()
+    if INT_VALUE.match(text):
+        return int(text)
+    if FLOAT_VALUE.match(text):
+        return float(text)
+    lowered = text.lower()
+    if lowered in ("true", "on", "yes"):
+        return True
+    if lowered in ("false", "off", "no"):
+        return False
+    return text
+
+
+def parse_setting_line(line: str) -> Optional[Tuple[str, Any]]:
+    """(key, value) for a `$key=value` line, else None"""
+    match = SETTING_LINE.match(line.strip())
+    if not match:
+        return None
+    return match.group(1), parse_setting_value(match.group(2))
+
+
+class SettingsCache:
+    """Settings by name; lookups ignore case like FluidNC does"""
+
+    def __init__(self):
+        self.settings: Dict[str, Any] = {}
+        self.loaded_at: Optional[float] = None  # last full dump
+        self.updated_at: Optional[float] = None
+        self._keys: Dict[str, str] = {}  # lowercased -> key as the controller spells it
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            known = self._keys.get(key.lower())
+            if known is not None and known != key:
+                del self.settings[known]
+            self._keys[key.lower()] = key
+            self.settings[key] = value
+            self.updated_at = time.time()
+
+    def update_from_line(self, line: str) -> bool:
+        """Record a `$key=value` line read from the controller; returns True if it was one"""
+        parsed = parse_setting_line(line)
+        if parsed is None:
+            return False
+        self.set(*parsed)
+        return True
+
+    def record_write(self, command: str, response: Optional[str]):
+        """Keep the cache current after `$key=value` was sent and acknowledged"""
+        if response != "ok":
+            return
+        parsed = parse_setting_line(command)
+        if parsed is None or NOT_SETTINGS.match(parsed[0]):
+            return
+        if parsed[0].upper() == "RST":
+            self.clear()  # settings were reset to defaults; the next refresh reloads them
+        else:
+            self.set(*parsed)
+
+    def get(self, key: str) -> Tuple[Optional[str], Any]:
+        """(key as stored, value), or (None, None) if the setting is unknown"""
+        key = key.lstrip("$").lower()
+        with self._lock:
+            # Config-tree items are spelled `/axes/x/...`; accept them without the leading slash too
+            known = self._keys.get(key) or self._keys.get("/" + key)
+            return (known, self.settings[known]) if known is not None else (None, None)
+
+    def mark_loaded(self):
+        self.loaded_at = time.time()
+
+    def clear(self):
+        """Forget everything, e.g. after connecting to a (possibly different) controller"""
+        with self._lock:
+            self.settings.clear()
+            self._keys.clear()
+            self.loaded_at = self.updated_at = None
+
+    def as_dict(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        """Snapshot of the settings, optionally only keys starting with `prefix`"""
+        with self._lock:
+            if prefix is None:
+                return dict(self.settings)
+            prefix = prefix.lstrip("$").lower()
+            return {k: v for k, v in self.settings.items() if k.lower().startswith(prefix)}
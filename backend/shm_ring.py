@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Ring Buffer
+Single-producer/single-consumer record ring and a latest-value snapshot slot over multiprocessing.shared_memory
+"""
+
+import struct
+import sys
+from multiprocessing import shared_memory
+from typing import Optional
+
+INDEX = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+WRAP = 0xFFFFFFFF  # record length marking "continue at the start of the buffer"
+
+# Ring header: write position (producer), read position (consumer), dropped records (producer)
+WRITE_AT, READ_AT, DROPPED_AT = 0, 8, 16
+RING_HEADER = 24
+
+# Snapshot header: sequence number (odd while a write is in progress), payload length
+SEQ_AT, SNAPSHOT_LENGTH_AT = 0, 8
+SNAPSHOT_HEADER = 12
+SNAPSHOT_READ_RETRIES = 100
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment; only the creating process tracks (and unlinks) it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class ShmRing:
+    """Lock-free ring of variable-length records; the producer never blocks, it drops when full
+
+    Positions are ever-increasing byte counts, each written by one side only, so no lock is needed.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.capacity = shm.size - RING_HEADER
+        self._buf = shm.buf
+
+    @classmethod
+    def create(cls, capacity: int) -> "ShmRing":
+        shm = shared_memory.SharedMemory(create=True, size=RING_HEADER + capacity)
+        shm.buf[:RING_HEADER] = bytes(RING_HEADER)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def dropped(self) -> int:
+        return INDEX.unpack_from(self._buf, DROPPED_AT)[0]
+
+    def empty(self) -> bool:
+        return INDEX.unpack_from(self._buf, WRITE_AT)[0] == INDEX.unpack_from(self._buf, READ_AT)[0]
+
+    def put(self, payload: bytes) -> bool:
+        """Append a record (producer side); returns False and counts a drop if there is no room"""
+        buf = self._buf
+        write = INDEX.unpack_from(buf, WRITE_AT)[0]
+        read = INDEX.unpack_from(buf, READ_AT)[0]
+        size = LENGTH.size + len(payload)
+        offset = write % self.capacity
+        pad = self.capacity - offset if offset + size > self.capacity else 0
+
+        if size > self.capacity or (write - read) + pad + size > self.capacity:
+            INDEX.pack_into(buf, DROPPED_AT, INDEX.unpack_from(buf, DROPPED_AT)[0] + 1)
+            return False
+
+        if pad:
+            if pad >= LENGTH.size:
+                LENGTH.pack_into(buf, RING_HEADER + offset, WRAP)
+            offset = 0
+        start = RING_HEADER + offset
+        LENGTH.pack_into(buf, start, len(payload))
+        buf[start + LENGTH.size:start + size] = payload
+        # Publish only after the record is complete
+        INDEX.pack_into(buf, WRITE_AT, write + pad + size)
+        return True
+
+    def get(self) -> Optional[bytes]:
+        """Pop the oldest record (consumer side), or None if the ring is empty"""
+        buf = self._buf
+        write = INDEX.unpack_from(buf, WRITE_AT)[0]
+        read = INDEX.unpack_from(buf, READ_AT)[0]
+        if read == write:
+            return None
+
+        offset = read % self.capacity
+        remaining = self.capacity - offset
+        if remaining < LENGTH.size or LENGTH.unpack_from(buf, RING_HEADER + offset)[0] == WRAP:
+            read += remaining
+            offset = 0
+        start = RING_HEADER + offset
+        length = LENGTH.unpack_from(buf, start)[0]
+        payload = bytes(buf[start + LENGTH.size:start + LENGTH.size + length])
+        INDEX.pack_into(buf, READ_AT, read + LENGTH.size + length)
+        return payload
+
+    def discard(self):
+        """Drop everything currently queued (consumer side)"""
+        INDEX.pack_into(self._buf, READ_AT, INDEX.unpack_from(self._buf, WRITE_AT)[0])
+
+    def close(self):
+        """Detach, and remove the segment if this process created it"""
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SnapshotSlot:
+    """Latest-value slot guarded by a sequence counter (seqlock); readers retry while a write is in progress"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.capacity = shm.size - SNAPSHOT_HEADER
+        self._buf = shm.buf
+
+    @classmethod
+    def create(cls, capacity: int) -> "SnapshotSlot":
+        shm = shared_memory.SharedMemory(create=True, size=SNAPSHOT_HEADER + capacity)
+        shm.buf[:SNAPSHOT_HEADER] = bytes(SNAPSHOT_HEADER)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SnapshotSlot":
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def publish(self, payload: bytes):
+        """Replace the snapshot (single writer)"""
+        if len(payload) > self.capacity:
+            raise ValueError(f"Snapshot of {len(payload)} bytes exceeds slot size {self.capacity}")
+        buf = self._buf
+        seq = INDEX.unpack_from(buf, SEQ_AT)[0]
+        INDEX.pack_into(buf, SEQ_AT, seq + 1)
+        LENGTH.pack_into(buf, SNAPSHOT_LENGTH_AT, len(payload))
+        buf[SNAPSHOT_HEADER:SNAPSHOT_HEADER + len(payload)] = payload
+        INDEX.pack_into(buf, SEQ_AT, seq + 2)
+
+    def read(self) -> Optional[bytes]:
+        """Consistent copy of the latest snapshot, or None if nothing was published yet"""
+        buf = self._buf
+        for _ in range(SNAPSHOT_READ_RETRIES):
+            before = INDEX.unpack_from(buf, SEQ_AT)[0]
+            if before == 0:
+                return None
+            if before % 2:
+                continue
+            length = LENGTH.unpack_from(buf, SNAPSHOT_LENGTH_AT)[0]
+            payload = bytes(buf[SNAPSHOT_HEADER:SNAPSHOT_HEADER + min(length, self.capacity)])
+            if INDEX.unpack_from(buf, SEQ_AT)[0] == before:
+                return payload
+        return None
+
+    def close(self):
+        """Detach, and remove the segment if this process created it"""
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Maslow Transports
+Byte pipes to a controller: a serial device, FluidNC's telnet port, or an in-process loopback
+"""
+
+import asyncio
+import logging
+import re
+import socket
+import threading
+from typing import Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+TELNET_PORT = 23
+READ_TIMEOUT = 0.05     # seconds a read waits for data; keeps readers responsive to shutdown
+CONNECT_TIMEOUT = 5.0   # seconds to open a TCP connection
+
+# IAC negotiation a telnet server may send before the controller's own output
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe][\x00-\xff]|\xff[\xf0-\xfa]")
+
+# Realtime bytes the loopback controller answers without waiting for a newline
+LOOPBACK_REALTIME = frozenset(b"?!~\x18\x85")
+LOOPBACK_BANNER = "Grbl 3.7 [FluidNC v3.7.8 (loopback) '$' for help]"
+
+
+def is_url(port: str) -> bool:
+    """tcp://, telnet://, loop://, sim:// and replay:// ports are opened here; anything else is a serial device"""
+    return "://" in port
+
+
+def open_transport(port: str, baud_rate: int, connect_timeout: float = CONNECT_TIMEOUT,
+                   record_to: Optional[str] = None) -> "Transport":
+    """Open a serial device, `tcp://host:port` / `telnet://host[:port]`, `loop://`, `sim://?options` or
+    `replay://session?options`; with `record_to`, everything sent and received is recorded to that file"""
+    transport = _open(port, baud_rate, connect_timeout)
+    if record_to:
+        from session_recording import RecordingTransport, SessionRecorder  # only needed when recording
+        transport = RecordingTransport(transport, SessionRecorder(record_to, port, baud_rate))
+    return transport
+
+
+def _open(port: str, baud_rate: int, connect_timeout: float) -> "Transport":
+    if not is_url(port):
+        return SerialTransport(port, baud_rate)
+    url = urlsplit(port)
+    if url.scheme in ("tcp", "telnet"):
+        if not url.hostname:
+            raise ValueError(f"No host in {port}")
+        return TcpTransport(url.hostname, url.port or TELNET_PORT, connect_timeout)
+    if url.scheme == "loop":
+        return LoopbackTransport()
+    if url.scheme == "sim":
+        return SimulatorTransport(url.query)
+    if url.scheme == "replay":
+        from session_recording import ReplayTransport  # only needed when replaying
+        return ReplayTransport(url.netloc + url.path, url.query)
+    raise ValueError(f"Unsupported port URL: {port}")
+
+
+class LineAssembler:
+    """Splits received bytes into stripped, non-empty lines; a partial line waits for the next chunk"""
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self.buffer += chunk
+        if b"\n" not in self.buffer:
+            return []
+        *lines, self.buffer = self.buffer.split(b"\n")
+        return [line for line in (raw.strip() for raw in lines) if line]
+
+
+class Transport:
+    """What the reader, the writers and the job streamer use; the subset of pyserial they always called
+
+    `read` waits at most READ_TIMEOUT and returns b"" when nothing arrived; it raises once the
+    connection is gone, which the reader turns into a lost connection.
+    """
+
+    name = "transport"
+
+    @property
+    def in_waiting(self) -> int:
+        return 0
+
+    def read(self, size: int = 1) -> bytes:
+        raise NotImplementedError
+
+    def write(self, data: bytes) -> int:
+        raise NotImplementedError
+
+    def readline(self) -> bytes:
+        """Bytes up to and including a newline, or whatever arrived before a read timed out"""
+        line = b""
+        while not line.endswith(b"\n"):
+            byte = self.read(1)
+            if not byte:
+                break
+            line += byte
+        return line
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SerialTransport(Transport):
+    """A local serial device (USB CDC, CP210x, CH340, ...)"""
+
+    def __init__(self, device: str, baud_rate: int):
+        self.name = device
+        self.port = serial.Serial(device, baud_rate, timeout=READ_TIMEOUT)
+
+    @property
+    def in_waiting(self) -> int:
+        return self.port.in_waiting
+
+    def read(self, size: int = 1) -> bytes:
+        return self.port.read(size)
+
+    def write(self, data: bytes) -> int:
+        return self.port.write(data)
+
+    def reset_input_buffer(self):
+        self.port.reset_input_buffer()
+
+    def reset_output_buffer(self):
+        self.port.reset_output_buffer()
+
+    def close(self):
+        self.port.close()
+
+
+class BufferedTransport(Transport):
+    """Received bytes are pushed in by someone else (an event loop, a simulated controller)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._received = bytearray()
+        self._condition = threading.Condition()
+        self._closed: Optional[str] = None  # why the connection ended, once it has
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._received)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._condition:
+            if not self._received and self._closed is None:
+                self._condition.wait(READ_TIMEOUT)
+            if not self._received and self._closed is not None:
+                raise ConnectionError(self._closed)
+            data = bytes(self._received[:size])
+            del self._received[:size]
+            return data
+
+    def reset_input_buffer(self):
+        with self._condition:
+            self._received.clear()
+
+    def close(self):
+        self._ended("Port closed")
+
+    def _feed(self, data: bytes):
+        with self._condition:
+            self._received += data
+            self._condition.notify_all()
+
+    def _ended(self, reason: str):
+        with self._condition:
+            if self._closed is None:
+                self._closed = reason
+            self._condition.notify_all()
+
+    def _check_open(self):
+        if self._closed is not None:
+            raise ConnectionError(self._closed)
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """The loop all TCP transports share, on its own thread so web-side load never delays an `ok`"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="maslow-transport", daemon=True).start()
+        return _loop
+
+
+class TcpTransport(BufferedTransport):
+    """FluidNC's telnet server (raw TCP, port 23) or a serial-to-network bridge, over asyncio streams"""
+
+    def __init__(self, host: str, port: int = TELNET_PORT, connect_timeout: float = CONNECT_TIMEOUT):
+        super().__init__(f"tcp://{host}:{port}")
+        self._loop = _event_loop()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        future = asyncio.run_coroutine_threadsafe(self._connect(host, port), self._loop)
+        try:
+            future.result(connect_timeout)
+        except Exception as e:
+            future.cancel()
+            raise ConnectionError(f"Could not connect to {self.name}: {e or 'timed out'}") from e
+
+    def write(self, data: bytes) -> int:
+        self._check_open()
+        # Writes are queued on the loop in call order, so lines and realtime bytes keep their order
+        self._loop.call_soon_threadsafe(self._writer.write, data)
+        return len(data)
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._loop.call_soon_threadsafe(self._writer.close)
+
+    async def _connect(self, host: str, port: int):
+        reader, self._writer = await asyncio.open_connection(host, port)
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # realtime bytes can't wait for Nagle
+        self._loop.create_task(self._receive(reader))
+
+    async def _receive(self, reader: asyncio.StreamReader):
+        reason = "Connection closed by the controller"
+        try:
+            while self._closed is None:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                self._feed(TELNET_COMMAND.sub(b"", data))
+        except OSError as e:
+            reason = f"Connection failed: {e}"
+        self._ended(reason)
+        self._writer.close()
+
+
+Responder = Callable[[str], Iterable[str]]
+
+
+def loopback_controller(command: str) -> List[str]:
+    """Just enough of FluidNC for the backend to connect and stream: every line is accepted"""
+    if command == "?":
+        return ["<Idle|MPos:0.000,0.000,0.000|FS:0,0>"]
+    if command == "\x18":
+        return [LOOPBACK_BANNER]
+    if command in ("!", "~", "\x85"):
+        return []
+    if command.upper() == "$I":
+        return ["[VER:3.7 FluidNC v3.7.8 (loopback):]", "ok"]
+    return ["ok"]
+
+
+class LoopbackTransport(BufferedTransport):
+    """An in-process controller: each written line (or realtime byte) is answered by `responder`
+
+    The responder runs on the writer's thread, so it should answer at once rather than sleep.
+    """
+
+    def __init__(self, responder: Responder = loopback_controller):
+        super().__init__("loop://")
+        self.responder = responder
+        self._line = b""
+
+    def write(self, data: bytes) -> int:
+        self._check_open()
+        for value in data:
+            if value in LOOPBACK_REALTIME:
+                self._answer(chr(value))
+            elif value == 0x0A:
+                line, self._line = self._line.decode("utf-8", errors="ignore").strip(), b""
+                if line:
+                    self._answer(line)
+            else:
+                self._line += bytes((value,))
+        return len(data)
+
+    def _answer(self, command: str):
+        replies = "".join(f"{line}\r\n" for line in self.responder(command))
+        if replies:
+            self._feed(replies.encode())
+
+
+class SimulatorTransport(BufferedTransport):
+    """An in-process FluidNC simulator (see fluidnc_sim.py), e.g. `sim://?speedup=10&baud=115200`"""
+
+    def __init__(self, query: str = ""):
+        from fluidnc_sim import FluidNCSimulator, options_from_query  # only needed when simulating
+        super().__init__(f"sim://?{query}" if query else "sim://")
+        self.simulator = FluidNCSimulator(**options_from_query(query))
+        self.channel = self.simulator.attach(self._feed, "transport")
+        self.simulator.start()
+
+    def write(self, data: bytes) -> int:
+        self._check_open()
+        self.channel.receive(data)
+        return len(data)
+
+    def close(self):
+        super().close()
+        self.simulator.stop()
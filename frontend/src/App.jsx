@@ -13,7 +13,8 @@ import { AlertTriangle, X } from 'lucide-react'
 import useWebSocket from './hooks/useWebSocket'
 import useMaslowAPI from './hooks/useMaslowAPI'
 
-const WS_URL = 'ws://localhost:8003/ws'
+// Same origin as the page: the backend in production, Vite's /ws proxy in development
+const WS_URL = `${window.location.protocol === 'https:' ? 'wss' : 'ws'}://${window.location.host}/ws`
 
 function App() {
   // WebSocket connection
@@ -136,6 +137,26 @@ function App() {
     }
   }, [api, machineStatus.connected])
 
+  const handleJogStart = useCallback(async (axes, feedRate, hold = null) => {
+    if (!machineStatus.connected) return null
+    
+    try {
+      return await api.startJog(axes, feedRate, hold)
+    } catch (err) {
+      setError(`Jog failed: ${err.message}`)
+      console.error('Jog error:', err)
+      return null
+    }
+  }, [api, machineStatus.connected])
+
+  const handleJogStop = useCallback(async () => {
+    try {
+      await api.stopJog()
+    } catch (err) {
+      console.error('Jog stop error:', err)
+    }
+  }, [api])
+
   const handleHome = useCallback(async (axis = 'ALL') => {
     if (!machineStatus.connected) {
       setError('Machine not connected')
@@ -296,6 +317,8 @@ function App() {
           {/* Manual Jog Controls */}
           <JogControls
             onJog={handleJog}
+            onJogStart={handleJogStart}
+            onJogStop={handleJogStop}
             onHome={handleHome}
             onSetOrigin={handleSetOrigin}
             disabled={!machineStatus.connected}
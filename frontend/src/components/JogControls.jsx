@@ -1,12 +1,31 @@
-import React, { useState } from 'react'
+import React, { useState, useRef, useEffect, useCallback } from 'react'
 import { ChevronUp, ChevronDown, ChevronLeft, ChevronRight, Home, Target } from 'lucide-react'
 import './JogControls.css'
 
-const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
+const CONTINUOUS = 'continuous'
+const KEEPALIVE_INTERVAL = 200 // ms; the server releases a held jog after 600 ms without one
+
+// Arrow keys jog X/Y (two at once for diagonals), Page Up/Down jog Z, while the jog panel has focus
+const KEY_JOGS = {
+  ArrowUp: ['Y', 1],
+  ArrowDown: ['Y', -1],
+  ArrowLeft: ['X', -1],
+  ArrowRight: ['X', 1],
+  PageUp: ['Z', 1],
+  PageDown: ['Z', -1]
+}
+const EDITABLE = 'input, textarea, select, [contenteditable]:not([contenteditable="false"])'
+
+const JogControls = ({ onJog, onJogStart, onJogStop, onHome, onSetOrigin, disabled = false }) => {
   const [selectedDistance, setSelectedDistance] = useState(10)
   const [feedRate, setFeedRate] = useState(1000)
+  const held = useRef(new Map()) // button or key -> [axis, direction]
+  const keepalive = useRef(null)
+  const requests = useRef(Promise.resolve()) // start/stop calls in order, so a slow start can't land after a stop
+  const generation = useRef(0) // bumped on every change of what is held; stale start replies are ignored
   
   const distances = [0.1, 1, 10, 100]
+  const continuous = selectedDistance === CONTINUOUS
 
   const handleJog = (axis, direction) => {
     if (disabled) return
@@ -15,6 +34,101 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
     onJog(axis, distance, feedRate)
   }
 
+  // Continuous jogging: the sum of everything held is sent now and repeated as a keepalive
+  const heldAxes = () => {
+    const axes = {}
+    held.current.forEach(([axis, direction]) => {
+      axes[axis] = (axes[axis] || 0) + direction
+    })
+    Object.keys(axes).forEach(axis => { if (!axes[axis]) delete axes[axis] })
+    return axes
+  }
+
+  const updateHeld = useCallback(() => {
+    const axes = heldAxes()
+    const current = ++generation.current
+    clearInterval(keepalive.current)
+    keepalive.current = null
+    if (Object.keys(axes).length === 0) {
+      requests.current = requests.current.then(() => onJogStop())
+      return
+    }
+    requests.current = requests.current.then(async () => {
+      const result = await onJogStart(axes, feedRate)
+      const hold = result?.jog?.hold
+      if (current !== generation.current || hold == null) return
+      // Keepalives name their hold: once /jog/stop released it, one still on its way is ignored
+      keepalive.current = setInterval(() => onJogStart(axes, feedRate, hold), KEEPALIVE_INTERVAL)
+    })
+  }, [onJogStart, onJogStop, feedRate])
+
+  const press = (source, axis, direction) => {
+    if (disabled) return
+    if (!continuous) {
+      handleJog(axis, direction)
+      return
+    }
+    held.current.set(source, [axis, direction])
+    updateHeld()
+  }
+
+  const release = (source) => {
+    if (!held.current.delete(source)) return
+    updateHeld()
+  }
+
+  const releaseAll = useCallback(() => {
+    if (held.current.size === 0) return
+    held.current.clear()
+    updateHeld()
+  }, [updateHeld])
+
+  const jogButtonProps = (source, axis, direction) => ({
+    onPointerDown: (e) => {
+      e.currentTarget.setPointerCapture?.(e.pointerId)
+      press(source, axis, direction)
+    },
+    onPointerUp: () => release(source),
+    onPointerCancel: () => release(source),
+    onLostPointerCapture: () => release(source)
+  })
+
+  // Keys only jog while focus is in the panel (and not in one of its inputs); releases are caught anywhere
+  const handleKeyDown = (e) => {
+    const jog = KEY_JOGS[e.key]
+    if (!jog || disabled || e.target.closest?.(EDITABLE)) return
+    e.preventDefault()
+    if (e.repeat) return // held keys are kept alive by the interval, not by key repeat
+    press(e.key, ...jog)
+  }
+
+  const handleBlur = (e) => {
+    if (!e.currentTarget.contains(e.relatedTarget)) releaseAll()
+  }
+
+  useEffect(() => {
+    const onKeyUp = (e) => {
+      if (KEY_JOGS[e.key]) release(e.key)
+    }
+    window.addEventListener('keyup', onKeyUp)
+    window.addEventListener('blur', releaseAll)
+    return () => {
+      window.removeEventListener('keyup', onKeyUp)
+      window.removeEventListener('blur', releaseAll)
+    }
+  })
+
+  // Never leave a jog running when the controls go away or get disabled
+  useEffect(() => {
+    if (disabled) releaseAll()
+  }, [disabled, releaseAll])
+
+  useEffect(() => () => {
+    generation.current++
+    clearInterval(keepalive.current)
+    if (held.current.size > 0) requests.current.then(() => onJogStop())
+  }, [])
+
   const handleXYHome = () => {
     if (disabled) return
     onHome('XY')
@@ -36,7 +150,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
   }
 
   return (
-    <div className="jog-controls">
+    <div className="jog-controls" tabIndex={0} onKeyDown={handleKeyDown} onBlur={handleBlur}>
       <div className="control-sections">
         {/* XY Axis Section */}
         <div className="axis-section xy-section">
@@ -48,7 +162,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
               <div className="jog-spacer"></div>
               <button 
                 className="jog-btn xy-btn"
-                onMouseDown={() => handleJog('Y', 1)}
+                {...jogButtonProps('Y+', 'Y', 1)}
                 disabled={disabled}
               >
                 <ChevronUp size={28} />
@@ -58,7 +172,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
 
               <button 
                 className="jog-btn xy-btn"
-                onMouseDown={() => handleJog('X', -1)}
+                {...jogButtonProps('X-', 'X', -1)}
                 disabled={disabled}
               >
                 <ChevronLeft size={28} />
@@ -74,7 +188,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
               </button>
               <button 
                 className="jog-btn xy-btn"
-                onMouseDown={() => handleJog('X', 1)}
+                {...jogButtonProps('X+', 'X', 1)}
                 disabled={disabled}
               >
                 <ChevronRight size={28} />
@@ -84,7 +198,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
               <div className="jog-spacer"></div>
               <button 
                 className="jog-btn xy-btn"
-                onMouseDown={() => handleJog('Y', -1)}
+                {...jogButtonProps('Y-', 'Y', -1)}
                 disabled={disabled}
               >
                 <ChevronDown size={28} />
@@ -112,7 +226,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
             <div className="z-jog-buttons">
               <button 
                 className="jog-btn z-btn"
-                onMouseDown={() => handleJog('Z', 1)}
+                {...jogButtonProps('Z+', 'Z', 1)}
                 disabled={disabled}
               >
                 <ChevronUp size={28} />
@@ -120,7 +234,7 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
               </button>
               <button 
                 className="jog-btn z-btn"
-                onMouseDown={() => handleJog('Z', -1)}
+                {...jogButtonProps('Z-', 'Z', -1)}
                 disabled={disabled}
               >
                 <ChevronDown size={28} />
@@ -165,6 +279,14 @@ const JogControls = ({ onJog, onHome, onSetOrigin, disabled = false }) => {
         <div className="distance-controls">
           <label>JOG DISTANCE</label>
           <div className="distance-buttons">
+            <button
+              className={`distance-btn ${continuous ? 'active' : ''}`}
+              onClick={() => setSelectedDistance(CONTINUOUS)}
+              disabled={disabled}
+              title="Jog while a button or arrow key is held"
+            >
+              HOLD
+            </button>
             {distances.map(distance => (
               <button
                 key={distance}
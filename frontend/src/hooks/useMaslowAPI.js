@@ -55,6 +55,16 @@ const useMaslowAPI = () => {
     })
   }, [apiCall])
 
+  // Continuous jogging: startJog begins a hold, repeating it with the returned hold id keeps it alive,
+  // stopJog releases it (and makes any keepalive still on its way a no-op)
+  const startJog = useCallback((axes, feedRate = 1000, hold = null) => {
+    return apiCall('/jog/start', {
+      method: 'POST',
+      body: JSON.stringify({ axes, feed_rate: feedRate, hold })
+    })
+  }, [apiCall])
+  const stopJog = useCallback(() => apiCall('/jog/stop', { method: 'POST' }), [apiCall])
+
   const homeAll = useCallback(() => apiCall('/home', { method: 'POST' }), [apiCall])
   const homeXY = useCallback(() => apiCall('/home/xy', { method: 'POST' }), [apiCall])
   const homeZ = useCallback(() => apiCall('/home/z', { method: 'POST' }), [apiCall])
@@ -107,6 +117,8 @@ const useMaslowAPI = () => {
     getStatus,
     sendCommand,
     jogAxis,
+    startJog,
+    stopJog,
     homeAll,
     homeXY,
     homeZ,
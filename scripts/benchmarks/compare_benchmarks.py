@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark Comparison
+Compares e2e_benchmark.py results with a stored baseline and flags regressions
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+BASELINE_FILE = SCRIPT_DIR / "baseline.json"
+THRESHOLD = 0.2  # relative change tolerated before a metric counts as regressed; latencies are noisy
+
+
+def change(baseline: float, current: float) -> Optional[float]:
+    """Relative change, or None when the baseline is zero"""
+    return None if baseline == 0 else (current - baseline) / abs(baseline)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float) -> List[Tuple[str, Dict[str, Any], Dict[str, Any], Optional[float], str]]:
+    """(name, baseline, current, relative change, verdict) for every metric in either report"""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        old, new = baseline.get(name), current.get(name)
+        if old is None or new is None or old["value"] is None or new["value"] is None:
+            rows.append((name, old or {}, new or {}, None, "missing"))
+            continue
+        delta = change(old["value"], new["value"])
+        worse = new["value"] < old["value"] if new["better"] == "higher" else new["value"] > old["value"]
+        if delta is None:
+            verdict = "regressed" if worse else "ok"  # anything above a zero baseline (e.g. starvation) counts
+        elif worse and abs(delta) > threshold:
+            verdict = "regressed"
+        elif not worse and abs(delta) > threshold:
+            verdict = "improved"
+        else:
+            verdict = "ok"
+        rows.append((name, old, new, delta, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument("results", type=Path, help="JSON written by e2e_benchmark.py --output")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help=f"default {BASELINE_FILE.name}")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Tolerated relative change (0.2 = 20%%)")
+    parser.add_argument("--update", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    current = json.loads(args.results.read_text())
+    if args.update:
+        shutil.copyfile(args.results, args.baseline)
+        print(f"📌 Baseline updated from {args.results} (commit {current.get('commit')})")
+        return
+    if not args.baseline.exists():
+        sys.exit(f"❌ No baseline at {args.baseline}; create one with --update")
+    baseline = json.loads(args.baseline.read_text())
+
+    print(f"📊 {args.results.name} (commit {current.get('commit')}) vs baseline (commit {baseline.get('commit')}), "
+          f"±{args.threshold:.0%} tolerated")
+    if baseline.get("host") != current.get("host"):
+        print(f"⚠️ Different hosts: {baseline.get('host')} vs {current.get('host')}")
+    rows = compare(baseline["metrics"], current["metrics"], args.threshold)
+    marks = {"ok": "  ", "improved": "✅", "regressed": "❌", "missing": "❔"}
+    for name, old, new, delta, verdict in rows:
+        shown = "" if delta is None else f"{delta:+.1%}"
+        print(f"{marks[verdict]} {name:<40} {old.get('value', '-')!s:>12} → {new.get('value', '-')!s:<12} "
+              f"{new.get('unit', old.get('unit', '')):<8} {shown}")
+
+    regressions = [row[0] for row in rows if row[4] == "regressed"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
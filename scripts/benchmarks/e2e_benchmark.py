@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+End-to-end Benchmark
+Runs the backend against the simulated controller and records streaming, latency, parser, upload and startup figures
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+REPO_DIR = SCRIPT_DIR.parent.parent
+BACKEND_DIR = REPO_DIR / "backend"
+GCODE_DIR = REPO_DIR / "gcode_files"
+sys.path.insert(0, str(BACKEND_DIR))
+
+START_TIMEOUT = 30.0   # seconds for the server to answer and the controller to be ready
+JOB_TIMEOUT = 120.0
+HIGHER, LOWER = "higher", "lower"  # which direction is better, for compare_benchmarks.py
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def metric(value: Optional[float], unit: str, better: str) -> Dict[str, Any]:
+    return {"value": None if value is None else round(value, 4), "unit": unit, "better": better}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Server:
+    """The backend in a child process, driving an in-process simulated controller (sim://)"""
+
+    def __init__(self, speedup: float, log_file: Path):
+        self.port = free_port()
+        self.speedup = speedup
+        self.log_file = log_file
+        self.process: Optional[subprocess.Popen] = None
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def start(self) -> Dict[str, float]:
+        """Launch and wait until the API answers and then until the controller is ready; returns both times"""
+        env = {**os.environ, "MASLOW_SERIAL_PORT": f"sim://?speedup={self.speedup:g}", "MASLOW_MUX_DIR": ""}
+        began = time.perf_counter()
+        with open(self.log_file, "ab") as log:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "maslow_serial_server:app", "--port", str(self.port),
+                 "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        times = {}
+        deadline = began + START_TIMEOUT
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited during startup; see {self.log_file}")
+            try:
+                connection = self.get("/api/connection")
+            except OSError:
+                time.sleep(0.01)
+                continue
+            times.setdefault("http", time.perf_counter() - began)
+            if connection.get("ready"):
+                times["ready"] = time.perf_counter() - began
+                return times
+            time.sleep(0.01)
+        raise RuntimeError(f"Server not ready after {START_TIMEOUT:.0f}s; see {self.log_file}")
+
+    def stop(self):
+        if self.connection is not None:
+            self.connection.close()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Any:
+        """JSON request over one kept-alive connection, so latencies don't include a TCP handshake"""
+        for attempt in (0, 1):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=JOB_TIMEOUT)
+            try:
+                self.connection.request(method, path, body=body, headers=headers or {})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path} -> {response.status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def get(self, path: str) -> Any:
+        return self.request("GET", path)
+
+    def post(self, path: str, payload: Any) -> Any:
+        return self.request("POST", path, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+    def upload(self, name: str, data: bytes) -> Any:
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{name}\"\r\n"
+                f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        return self.request("POST", "/api/files/upload", body,
+                            {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+    def memory(self) -> Dict[str, Optional[float]]:
+        """Resident and peak resident memory (MB) of the server process; Linux only"""
+        values: Dict[str, Optional[float]] = {"rss": None, "peak": None}
+        try:
+            for line in Path(f"/proc/{self.process.pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    values["rss"] = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    values["peak"] = int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return values
+
+    def simulator_stats(self) -> Dict[str, int]:
+        """Counters from the simulated controller (`$Sim/Stats`)"""
+        result = self.post("/api/batch", {"commands": ["$Sim/Stats"]})["results"][0]
+        line = next(l for l in result["output"] if l.startswith("[SIM:"))
+        return {key: int(value) for key, value in (item.split("=") for item in line[5:-1].split(","))}
+
+
+def run_job(server: Server, name: str, lines: List[str]) -> Dict[str, Any]:
+    """Upload and stream a job; returns its final status"""
+    server.upload(name, "".join(line + "\n" for line in lines).encode())
+    try:
+        job = server.post("/api/jobs/start", {"filename": name, "override_preflight": True})["job"]
+        deadline = time.monotonic() + JOB_TIMEOUT
+        while job["state"] in ("running", "paused") and time.monotonic() < deadline:
+            time.sleep(0.02)
+            job = server.get("/api/jobs/status")["job"]
+        if job["state"] != "completed":
+            raise RuntimeError(f"Job {name} ended {job['state']}: {job['errors'][:3]}")
+        return job
+    finally:
+        (GCODE_DIR / name).unlink(missing_ok=True)
+
+
+def bench_cold_start(args, log_file: Path) -> Dict[str, Any]:
+    """Process launch to first API answer, and to a ready controller"""
+    http_times, ready_times = [], []
+    for _ in range(args.repeat):
+        server = Server(args.speedup, log_file)
+        try:
+            times = server.start()
+        finally:
+            server.stop()
+        http_times.append(times["http"])
+        ready_times.append(times["ready"])
+    return {
+        "cold_start.http_s": metric(statistics.median(http_times), "s", LOWER),
+        "cold_start.ready_s": metric(statistics.median(ready_times), "s", LOWER),
+    }
+
+
+def bench_stream(server: Server, args) -> Dict[str, Any]:
+    """Throughput with zero-length moves (the host is the only limit), then real motion and planner starvation
+
+    The motion job's moves each take 1 ms of simulated machine time, so a host that keeps the planner
+    fed streams about 1000 lines/s with no starvation.
+    """
+    results = {}
+    throughput = run_job(server, "bench_throughput.nc", ["G1 X0 Y0 F3000"] * args.lines)
+    results["stream.throughput_lines_per_s"] = metric(throughput["acknowledged_lines"] / throughput["elapsed"],
+                                                      "lines/s", HIGHER)
+
+    feed = 3000.0
+    step = feed / 60.0 * 0.001 * args.speedup  # mm covered in 1 ms of real time
+    motion = [f"G1 X{(i % 2) * step:.4f} F{feed:g}" for i in range(args.lines)]
+    before = server.simulator_stats()
+    job = run_job(server, "bench_motion.nc", motion)
+    time.sleep(0.05 + 16 * 0.001)  # let the planner drain so the final underrun is counted
+    after = server.simulator_stats()
+    results["stream.motion_lines_per_s"] = metric(job["acknowledged_lines"] / job["elapsed"], "lines/s", HIGHER)
+    # The planner running dry once, at the end of the job, is expected; every other time it starved
+    results["stream.starvation_events"] = metric(max(after["underruns"] - before["underruns"] - 1, 0), "events", LOWER)
+    results["stream.rx_overflows"] = metric(after["rx_overflows"] - before["rx_overflows"], "bytes", LOWER)
+    return results
+
+
+def bench_roundtrip(server: Server, args) -> Dict[str, Any]:
+    """HTTP request to `ok` and back, and the part of it spent on the wire to the controller"""
+    http_ms, serial_ms = [], []
+    for _ in range(args.roundtrips):
+        began = time.perf_counter()
+        result = server.post("/api/batch", {"commands": ["$G"]})["results"][0]
+        http_ms.append((time.perf_counter() - began) * 1000)
+        serial_ms.append(result["ms"])
+    return {
+        "roundtrip.http_p50_ms": metric(percentile(http_ms, 0.5), "ms", LOWER),
+        "roundtrip.http_p95_ms": metric(percentile(http_ms, 0.95), "ms", LOWER),
+        "roundtrip.serial_p50_ms": metric(percentile(serial_ms, 0.5), "ms", LOWER),
+    }
+
+
+async def collect_status_latency(url: str, clients: int, duration: float) -> List[float]:
+    """Connect `clients` WebSockets and time each status report from the reader thread to the client"""
+    import websockets  # only this benchmark needs it
+
+    latencies: List[float] = []
+
+    async def client():
+        async with websockets.connect(url, max_queue=None) as ws:
+            deadline = time.monotonic() + duration
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), remaining)
+                except asyncio.TimeoutError:
+                    return
+                message = json.loads(raw)
+                if message.get("type") == "serial_response" and message.get("data", "").startswith("<"):
+                    latencies.append((time.time() - message["timestamp"]) * 1000)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+
+def bench_status_latency(server: Server, args) -> Dict[str, Any]:
+    """Status report to browser, with 1, 10 and 100 WebSocket clients (auto-reports every 50 ms)"""
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("   (skipped: pip install websockets)")
+        return {}
+    server.post("/api/batch", {"commands": ["$Report/Interval=50"]})
+    results = {}
+    for clients in args.clients:
+        latencies = asyncio.run(collect_status_latency(f"ws://127.0.0.1:{server.port}/ws", clients, args.duration))
+        results[f"status_latency.clients_{clients}.p50_ms"] = metric(percentile(latencies, 0.5), "ms", LOWER)
+        results[f"status_latency.clients_{clients}.p95_ms"] = metric(percentile(latencies, 0.95), "ms", LOWER)
+    return results
+
+
+def bench_upload(server: Server, args) -> Dict[str, Any]:
+    """Upload a large file: throughput, and how much the server's memory grows for it"""
+    line = b"G1 X123.456 Y-78.901 Z-1.000 F1500\n"
+    data = line * (args.upload_mb * 1024 * 1024 // len(line))
+    before = server.memory()
+    began = time.perf_counter()
+    try:
+        server.upload("bench_upload.nc", data)
+        elapsed = time.perf_counter() - began
+        time.sleep(1.0)  # the upload also queues a background preflight of the file
+        after = server.memory()
+    finally:
+        (GCODE_DIR / "bench_upload.nc").unlink(missing_ok=True)
+    growth = after["peak"] - before["rss"] if after["peak"] is not None and before["rss"] is not None else None
+    return {
+        "upload.mb_per_s": metric(len(data) / 1024 / 1024 / elapsed, "MB/s", HIGHER),
+        "upload.peak_rss_growth_mb": metric(growth, "MB", LOWER),
+        "upload.rss_after_mb": metric(after["rss"], "MB", LOWER),
+    }
+
+
+def bench_parser(args) -> Dict[str, Any]:
+    """In-process: tokenizing and preflight-checking a large file"""
+    from gcode_tokens import tokenize
+    from preflight import WorkArea, validate
+
+    data = "".join(f"G1 X{i % 400 - 200}.{i % 1000:03d} Y{i % 300 - 150}.5 F1500 (move {i})\n"
+                   for i in range(args.parser_lines)).encode()
+    area = WorkArea.from_config({})
+    tokenize_s, validate_s = [], []
+    for _ in range(args.repeat):
+        began = time.perf_counter()
+        tokens = tokenize(data)
+        tokenize_s.append(time.perf_counter() - began)
+        began = time.perf_counter()
+        validate(tokens, area)
+        validate_s.append(time.perf_counter() - began)
+    return {
+        "parser.tokenize_mb_per_s": metric(len(data) / 1024 / 1024 / statistics.median(tokenize_s), "MB/s", HIGHER),
+        "parser.preflight_lines_per_s": metric(args.parser_lines / statistics.median(validate_s), "lines/s", HIGHER),
+    }
+
+
+BENCHMARKS = ["cold_start", "stream", "roundtrip", "status_latency", "upload", "parser"]
+SERVER_BENCHMARKS: Dict[str, Callable[[Server, Any], Dict[str, Any]]] = {
+    "stream": bench_stream,
+    "roundtrip": bench_roundtrip,
+    "status_latency": bench_status_latency,
+    "upload": bench_upload,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run just these benchmarks")
+    parser.add_argument("--output", type=Path, help="Write results here as JSON (default: print only)")
+    parser.add_argument("--speedup", type=float, default=20.0, help="Simulated machine speed vs real time")
+    parser.add_argument("--lines", type=int, default=5000, help="Lines per streamed job")
+    parser.add_argument("--roundtrips", type=int, default=200, help="Commands timed for round-trip latency")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100], help="WebSocket client counts")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of status reports per client count")
+    parser.add_argument("--upload-mb", type=int, default=50, help="Size of the uploaded file")
+    parser.add_argument("--parser-lines", type=int, default=200000, help="Lines in the parser benchmark file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs for cold start and parser; the median is kept")
+    args = parser.parse_args()
+    selected = args.only or BENCHMARKS
+
+    metrics: Dict[str, Any] = {}
+    server: Optional[Server] = None
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "server.log"
+        try:
+            for name in BENCHMARKS:
+                if name not in selected:
+                    continue
+                print(f"⏱️  {name}...", flush=True)
+                began = time.perf_counter()
+                if name == "cold_start":
+                    results = bench_cold_start(args, log_file)
+                elif name == "parser":
+                    results = bench_parser(args)
+                else:
+                    if server is None:
+                        server = Server(args.speedup, log_file)
+                        server.start()
+                    results = SERVER_BENCHMARKS[name](server, args)
+                metrics.update(results)
+                for key, value in results.items():
+                    shown = "-" if value["value"] is None else f"{value['value']:g}"
+                    print(f"   {key:<40} {shown:>12} {value['unit']}")
+                print(f"   ({time.perf_counter() - began:.1f}s)")
+        finally:
+            if server is not None:
+                server.stop()
+
+    report = {
+        "version": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "only")},
+        "metrics": metrics,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Serial Worker Benchmark
+Streams a job to a simulated controller with and without web-side load, in-process vs worker process
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import tty
+from collections import deque
+from pathlib import Path
+
+import yaml
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+BACKEND_DIR = SCRIPT_DIR.parent.parent / "backend"
+CONFIG_FILE = SCRIPT_DIR.parent.parent / "config" / "maslow.yaml"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from serial_worker import SerialEngine, SerialWorker  # noqa: E402
+
+BAUD_RATE = 115200
+
+
+def simulate_controller(conn, line_time):
+    """Fake FluidNC on a pty: answers `ok` to each line after `line_time` seconds of 'planning'"""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    conn.send(os.ttyname(slave))
+    buffer = b""
+    while True:
+        try:
+            buffer += os.read(master, 4096)
+        except OSError:
+            return
+        while buffer[:1] in (b"?", b"!", b"~", b"\x18"):
+            if buffer[:1] == b"?":
+                os.write(master, b"<Idle|MPos:0.000,0.000,0.000|FS:0,0>\r\n")
+            buffer = buffer[1:]
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            time.sleep(line_time)
+            os.write(master, b"ok\r\n")
+
+
+def web_load(stop, config_text):
+    """What the web process does all day: JSON encoding, YAML parsing and garbage"""
+    status = {"connected": True, "status": "Run", "position": {"x": 1.0, "y": 2.0, "z": 3.0},
+              "feed_rate": 1000.0, "spindle_speed": 0.0, "history": list(range(200))}
+    while not stop.is_set():
+        json.loads(json.dumps([status] * 20))
+        yaml.safe_load(config_text)
+        [dict(a=i, b=str(i)) for i in range(2000)]
+
+
+def consume_events(next_event, stop):
+    """Web-side consumer: decode each event like the WebSocket broadcaster would"""
+    while not stop.is_set():
+        event = next_event()
+        if event is not None:
+            json.dumps({"type": "serial_response", "data": event[1].decode(errors="ignore"), "timestamp": time.time()})
+
+
+def run_once(mode, device, gcode_file, load_threads, config_text):
+    """Stream one job and return lines per second"""
+    stop = threading.Event()
+    events = deque()
+
+    if mode == "thread":
+        engine = SerialEngine(lambda tag, payload: events.append((tag, payload)), lambda snapshot: None)
+        engine.open(device, BAUD_RATE)
+        next_event = lambda: events.popleft() if events else time.sleep(0.001)
+        start = lambda: engine.job_start(str(gcode_file))
+        progress = engine.job_progress
+    else:
+        worker = SerialWorker()
+        worker.start()
+        worker.call("open", device, BAUD_RATE)
+        next_event = lambda: worker.next_event(0.05)
+        start = lambda: worker.call("job_start", str(gcode_file))
+        progress = lambda: worker.call("job_progress")
+
+    threads = [threading.Thread(target=consume_events, args=(next_event, stop), daemon=True)]
+    threads += [threading.Thread(target=web_load, args=(stop, config_text), daemon=True) for _ in range(load_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+
+    began = time.perf_counter()
+    job = start()
+    while job["state"] in ("running", "paused"):
+        time.sleep(0.01)
+        job = progress()
+    elapsed = time.perf_counter() - began
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if mode == "thread":
+        engine.close()
+    else:
+        worker.shutdown()
+    if job["state"] != "completed":
+        raise RuntimeError(f"Job ended {job['state']}: {job['errors'][:3]}")
+    return job["acknowledged_lines"] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument("--lines", type=int, default=5000, help="G-code lines per job")
+    parser.add_argument("--line-time", type=float, default=0.0002, help="simulated controller time per line (s)")
+    parser.add_argument("--load-threads", type=int, default=4, help="web-side load threads")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported")
+    args = parser.parse_args()
+
+    config_text = CONFIG_FILE.read_text()
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe()
+    simulator = context.Process(target=simulate_controller, args=(child_conn, args.line_time), daemon=True)
+    simulator.start()
+    device = parent_conn.recv()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gcode_file = Path(tmp) / "bench.gcode"
+        gcode_file.write_text("".join(f"G1 X{i % 100}.123 Y{i % 37}.456 F1500\n" for i in range(args.lines)))
+
+        print(f"📊 {args.lines} lines, {args.line_time * 1e6:.0f} µs/line controller, "
+              f"{args.load_threads} load threads, {os.cpu_count()} CPUs")
+        print(f"{'mode':<8} {'idle (lines/s)':>15} {'loaded (lines/s)':>17} {'loaded/idle':>12}")
+        for mode in ("thread", "process"):
+            results = []
+            for load in (0, args.load_threads):
+                runs = sorted(run_once(mode, device, gcode_file, load, config_text) for _ in range(args.repeat))
+                results.append(runs[len(runs) // 2])
+            print(f"{mode:<8} {results[0]:>15.0f} {results[1]:>17.0f} {results[1] / results[0]:>11.0%}")
+
+    simulator.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+WebSocket Load Generator
+Opens many dashboard WebSocket clients against a simulator-backed backend and finds where status latency turns up
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from e2e_benchmark import Server, git_commit, percentile
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+CLIENT_KINDS = ("watch", "poll", "slow")
+DEFAULT_MIX = "watch=80,poll=15,slow=5"
+REPORT_INTERVAL = 50       # ms between the controller's auto-reports during the run
+CONNECT_CONCURRENCY = 50   # handshakes in flight at once while a step ramps up
+KNEE_FACTOR = 2.0          # a step whose p95 is this many times the first step's is past the knee
+DROPPED_PATTERN = re.compile(r"^maslow_websocket_dropped_messages_total\{[^}]*\} (\S+)$", re.M)
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class ClientResult:
+    kind: str
+    latencies: List[float] = field(default_factory=list)  # ms, server timestamp to receipt
+    pings: List[float] = field(default_factory=list)      # ms, ping to pong
+    messages: int = 0
+    status_reports: int = 0
+    connected: bool = False
+    disconnected: bool = False  # the server closed (or broke) the connection during the run
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """`watch=80,poll=15,slow=5` -> fractions of the client population"""
+    weights = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in CLIENT_KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown client kind {kind!r}; use {', '.join(CLIENT_KINDS)}")
+        weights[kind.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("Client mix weights must add up to more than zero")
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def assign_kinds(clients: int, mix: Dict[str, float]) -> List[str]:
+    """Spread the kinds over `clients` by largest remainder, so small steps still get their slow readers"""
+    counts = {kind: int(clients * share) for kind, share in mix.items()}
+    leftover = sorted(mix, key=lambda kind: clients * mix[kind] - counts[kind], reverse=True)
+    for kind in leftover[:clients - sum(counts.values())]:
+        counts[kind] += 1
+    return [kind for kind, count in counts.items() for _ in range(count)]
+
+
+class ProcessSampler:
+    """CPU seconds and resident memory of the server process, from /proc (Linux only)"""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+
+    def cpu_seconds(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+
+    def rss_mb(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+
+def dropped_messages(base_url: str) -> Optional[float]:
+    """The server's count of messages it failed to deliver, from /metrics"""
+    try:
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    return sum(float(value) for value in DROPPED_PATTERN.findall(text))
+
+
+async def run_client(url: str, kind: str, result: ClientResult, args, connect: asyncio.Semaphore,
+                     ready: asyncio.Event, stop: asyncio.Event):
+    """One dashboard: reads everything, pings on a cadence; pollers also ask for status, slow readers lag"""
+    # A slow reader gets a one-message queue so the library stops reading and TCP backs up onto the server,
+    # as a phone on bad Wi-Fi does; everyone else buffers freely so only the server's pace is measured.
+    max_queue = 1 if kind == "slow" else None
+    try:
+        async with connect:
+            ws = await websockets.connect(url, max_queue=max_queue, ping_interval=None, open_timeout=30)
+    except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+        return
+    result.connected = True
+    pings: List[float] = []
+
+    async def sender():
+        next_ping = next_poll = time.monotonic()
+        while not stop.is_set():
+            now = time.monotonic()
+            if now >= next_ping:
+                pings.append(time.perf_counter())
+                await ws.send(json.dumps({"type": "ping"}))
+                next_ping = now + args.ping_interval
+            if kind == "poll" and now >= next_poll:
+                await ws.send(json.dumps({"type": "request_status"}))
+                next_poll = now + args.poll_interval
+            await asyncio.sleep(min(next_ping, next_poll) - time.monotonic() if kind == "poll"
+                                else next_ping - time.monotonic())
+
+    sending = asyncio.create_task(sender())
+    try:
+        while not stop.is_set():
+            receiving = asyncio.create_task(ws.recv())
+            stopping = asyncio.create_task(stop.wait())
+            done, _ = await asyncio.wait({receiving, stopping}, return_when=asyncio.FIRST_COMPLETED)
+            if receiving not in done:
+                receiving.cancel()
+                break
+            stopping.cancel()
+            message = json.loads(receiving.result())
+            ping_ms = (time.perf_counter() - pings.pop(0)) * 1000 if message.get("type") == "pong" and pings else None
+            if not ready.is_set():
+                continue  # still ramping up; only the measured window counts
+            result.messages += 1
+            if ping_ms is not None:
+                result.pings.append(ping_ms)
+            elif message.get("type") == "serial_response" and message.get("data", "").startswith("<"):
+                result.status_reports += 1
+                result.latencies.append((time.time() - message["timestamp"]) * 1000)
+            if kind == "slow":
+                await asyncio.sleep(args.slow_delay / 1000)
+    except websockets.exceptions.ConnectionClosed:
+        result.disconnected = not stop.is_set()
+    finally:
+        sending.cancel()
+        await ws.close()
+
+
+async def run_step(url: str, clients: int, args) -> List[ClientResult]:
+    """Connect `clients` dashboards, measure for `args.duration` seconds once all are up, then disconnect"""
+    connect = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    ready, stop = asyncio.Event(), asyncio.Event()
+    results = [ClientResult(kind) for kind in assign_kinds(clients, args.mix)]
+    tasks = [asyncio.create_task(run_client(url, result.kind, result, args, connect, ready, stop))
+             for result in results]
+    while not all(result.connected or task.done() for result, task in zip(results, tasks)):
+        await asyncio.sleep(0.05)  # every client is up, or gave up on its handshake
+    await asyncio.sleep(args.settle)
+    ready.set()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+
+def summarize(clients: int, results: List[ClientResult], args, cpu: Optional[float], rss: Optional[float],
+              dropped: Optional[float], generator_cpu: float) -> Dict[str, Any]:
+    """One row of the latency curve; slow readers' own latency is reported apart from everyone else's"""
+    def latencies(slow: bool) -> List[float]:
+        return [value for result in results if (result.kind == "slow") == slow for value in result.latencies]
+
+    fast = latencies(False)
+    expected = args.duration * 1000 / REPORT_INTERVAL
+    def r(value: Optional[float], digits: int = 1) -> Optional[float]:
+        return None if value is None else round(value, digits)
+    return {
+        "clients": clients,
+        "connected": sum(result.connected for result in results),
+        "kinds": {kind: sum(result.kind == kind for result in results) for kind in CLIENT_KINDS},
+        "latency_p50_ms": r(percentile(fast, 0.5)),
+        "latency_p95_ms": r(percentile(fast, 0.95)),
+        "latency_p99_ms": r(percentile(fast, 0.99)),
+        "latency_max_ms": r(max(fast, default=None)),
+        "slow_latency_p95_ms": r(percentile(latencies(True), 0.95)),
+        "ping_p95_ms": r(percentile([value for result in results for value in result.pings], 0.95)),
+        "messages_per_s": r(sum(result.messages for result in results) / args.duration),
+        # Reports a client should have seen in the window but didn't (late ones arrive after it closes)
+        "missed_reports": sum(max(0, round(expected) - result.status_reports)
+                              for result in results if result.connected),
+        "disconnects": sum(result.disconnected for result in results),
+        "server_dropped": None if dropped is None else int(dropped),
+        "server_cpu_percent": r(cpu),
+        "server_rss_mb": r(rss),
+        "generator_cpu_percent": r(generator_cpu),
+    }
+
+
+def find_knee(steps: List[Dict[str, Any]], factor: float) -> Optional[int]:
+    """The largest client count served before p95 latency grew `factor` times the first step's"""
+    measured = [step for step in steps if step["latency_p95_ms"] is not None]
+    if not measured:
+        return None
+    limit = measured[0]["latency_p95_ms"] * factor
+    knee = measured[0]["clients"]
+    for step in measured:
+        if step["latency_p95_ms"] > limit or step["disconnects"]:
+            return knee
+        knee = step["clients"]
+    return None  # never turned up within the tested range
+
+
+def post_json(base_url: str, path: str, payload: Any) -> Any:
+    request = urllib.request.Request(f"{base_url}{path}", json.dumps(payload).encode(),
+                                     {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 25, 50, 100, 200, 400],
+                        help="Client counts to step through")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds measured per step")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds after connecting before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Client kinds and weights (default {DEFAULT_MIX}): watch only pings, "
+                             "poll also sends request_status, slow reads each message late")
+    parser.add_argument("--ping-interval", type=float, default=2.0, help="Seconds between pings (the dashboard uses 30)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between request_status polls")
+    parser.add_argument("--slow-delay", type=float, default=200.0, help="Milliseconds a slow reader takes per message")
+    parser.add_argument("--path", default="/ws", help="WebSocket path, e.g. /ws/machines/left")
+    parser.add_argument("--url", help="Load an already running backend (http://host:port) instead of starting one")
+    parser.add_argument("--pid", type=int, help="Server process to sample CPU/RSS from, with --url")
+    parser.add_argument("--speedup", type=float, default=20.0, help="Simulated machine speed vs real time")
+    parser.add_argument("--knee-factor", type=float, default=KNEE_FACTOR,
+                        help="p95 growth over the first step that counts as lag")
+    parser.add_argument("--output", type=Path, help="Write the curve here as JSON")
+    args = parser.parse_args()
+    if websockets is None:
+        raise SystemExit("❌ pip install websockets")
+
+    server: Optional[Server] = None
+    log_file = Path(os.devnull)
+    try:
+        if args.url:
+            base_url, pid = args.url.rstrip("/"), args.pid
+        else:
+            server = Server(args.speedup, log_file)
+            print("🚀 Starting backend against the simulator...", flush=True)
+            server.start()
+            base_url, pid = f"http://127.0.0.1:{server.port}", server.process.pid
+        ws_url = base_url.replace("http", "ws", 1) + args.path
+        post_json(base_url, "/api/batch", {"commands": [f"$Report/Interval={REPORT_INTERVAL}"]})
+        sampler = ProcessSampler(pid)
+
+        print(f"{'clients':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'ping95':>7} {'msg/s':>8} "
+              f"{'missed':>7} {'disc':>5} {'drop':>5} {'cpu%':>6} {'rss':>6} {'gen%':>5}")
+        steps = []
+        for clients in args.clients:
+            cpu_before, dropped_before = sampler.cpu_seconds(), dropped_messages(base_url)
+            wall_before, own_before = time.perf_counter(), time.process_time()
+            results = asyncio.run(run_step(ws_url, clients, args))
+            wall = time.perf_counter() - wall_before
+            cpu_after, dropped_after = sampler.cpu_seconds(), dropped_messages(base_url)
+            cpu = None if cpu_before is None or cpu_after is None else (cpu_after - cpu_before) / wall * 100
+            dropped = None if dropped_before is None or dropped_after is None else dropped_after - dropped_before
+            generator_cpu = (time.process_time() - own_before) / wall * 100
+            step = summarize(clients, results, args, cpu, sampler.rss_mb(), dropped, generator_cpu)
+            steps.append(step)
+            shown = {key: "-" if value is None else value for key, value in step.items()}
+            print(f"{clients:>7} {shown['latency_p50_ms']:>7} {shown['latency_p95_ms']:>7} "
+                  f"{shown['latency_p99_ms']:>7} {shown['latency_max_ms']:>7} {shown['ping_p95_ms']:>7} "
+                  f"{shown['messages_per_s']:>8} {shown['missed_reports']:>7} {shown['disconnects']:>5} "
+                  f"{shown['server_dropped']:>5} {shown['server_cpu_percent']:>6} {shown['server_rss_mb']:>6} "
+                  f"{shown['generator_cpu_percent']:>5}", flush=True)
+            if step["connected"] < clients:
+                print(f"⚠️ Only {step['connected']}/{clients} clients connected")
+            if generator_cpu > 90:
+                print("⚠️ The load generator itself is CPU-bound; latency past this point is partly its own")
+    finally:
+        if server is not None:
+            server.stop()
+
+    knee = find_knee(steps, args.knee_factor)
+    if knee is None:
+        print(f"\n✅ No knee up to {args.clients[-1]} clients (p95 stayed under {args.knee_factor:g}x the first step)")
+    else:
+        print(f"\n📈 Knee at about {knee} clients: beyond that p95 status latency grows past "
+              f"{args.knee_factor:g}x the {args.clients[0]}-client baseline")
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("output", "url", "pid")}
+        report = {
+            "version": 1,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "config": config,
+            "knee_clients": knee,
+            "steps": steps,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,56 +3,50 @@
 Auto Scan - Run diagnostic commands automatically
 """
 
-import serial
+import argparse
+import sys
 import time
+from pathlib import Path
 
-def send_command(ser, command, wait_time=3):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    responses = []
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
-            responses.append(line)
-    
-    return responses
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_response  # noqa: E402
+
+COMMANDS = [
+    ("Unlock/Reset", "$X"),
+    ("All Settings", "$$"),
+    ("WiFi Status", "$ESP420"),
+    ("Network Scan", "$ESP410"),
+    ("Current Status", "?"),
+    ("SSID Check", "$Sta/SSID"),
+    ("WiFi Mode", "$WiFi/Mode"),
+]
 
-def auto_scan(port="/dev/cu.usbmodem12201", baudrate=115200):
-    """Run all diagnostic commands automatically"""
+def auto_scan(client):
+    """Run all diagnostic commands, pipelined; each one ends on its own ok/error"""
     print("🔧 Auto Diagnostic Scan")
     print("=" * 50)
     
+    started = time.monotonic()
+    responses = client.send_many([cmd for _, cmd in COMMANDS])
+    
+    for (description, _), response in zip(COMMANDS, responses):
+        print(f"\n{'='*20} {description} {'='*20}")
+        print(f"📤 Sending: {response.command}")
+        print_response(response)
+    
+    print(f"\n✅ Diagnostic scan completed in {time.monotonic() - started:.1f}s!")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run diagnostic commands automatically")
+    add_connection_args(parser)
+    args = parser.parse_args()
+    
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
-        
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
-        
-        commands = [
-            ("Unlock/Reset", "$X"),
-            ("All Settings", "$$"),
-            ("WiFi Status", "$ESP420"),
-            ("Network Scan", "$ESP410"),
-            ("Current Status", "?"),
-            ("SSID Check", "$Sta/SSID"),
-            ("WiFi Mode", "$WiFi/Mode"),
-        ]
-        
-        for description, cmd in commands:
-            print(f"\n{'='*20} {description} {'='*20}")
-            send_command(ser, cmd)
-        
-        ser.close()
-        print("\n✅ Diagnostic scan completed!")
-        
+        with connect_from_args(args, on_line=None) as client:
+            auto_scan(client)
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    auto_scan() 
\ No newline at end of file
+    main()
@@ -4,52 +4,47 @@ Optimize Flash Settings
 Adjust settings for better performance and less log spam
 """
 
-import serial
-import time
+import argparse
+import sys
+from pathlib import Path
 
-def send_command(ser, command, wait_time=2):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_response  # noqa: E402
 
-def optimize_settings(port="/dev/cu.usbmodem12201", baudrate=115200):
+OPTIMIZATIONS = [
+    ("Reduce log spam", "$Message/Level=Info"),
+    ("Allow web during motion", "$HTTP/BlockDuringMotion=OFF"),
+]
+
+def optimize_settings(client):
     """Optimize flash settings for better performance"""
     print("🔧 Optimizing Flash Settings...")
     
+    responses = client.send_many([command for _, command in OPTIMIZATIONS])
+    for (description, _), response in zip(OPTIMIZATIONS, responses):
+        print(f"\n🔧 {description}...")
+        print(f"📤 Sending: {response.command}")
+        print_response(response)
+    
+    print("\n📊 Checking current settings...")
+    for response in client.send_many(["$Message/Level", "$HTTP/BlockDuringMotion"]):
+        print(f"📤 Sending: {response.command}")
+        print_response(response)
+    
+    print("\n💾 Settings updated! They'll take effect on next restart.")
+    print("\n✅ Optimization completed!")
+
+def main():
+    parser = argparse.ArgumentParser(description="Adjust settings for better performance and less log spam")
+    add_connection_args(parser)
+    args = parser.parse_args()
+    
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
-        
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
-        
-        optimizations = [
-            ("Reduce log spam", "$Message/Level=Info"),
-            ("Allow web during motion", "$HTTP/BlockDuringMotion=OFF"),
-        ]
-        
-        for description, command in optimizations:
-            print(f"\n🔧 {description}...")
-            send_command(ser, command)
-        
-        print("\n📊 Checking current settings...")
-        send_command(ser, "$Message/Level")
-        send_command(ser, "$HTTP/BlockDuringMotion")
-        
-        print("\n💾 Settings updated! They'll take effect on next restart.")
-        
-        ser.close()
-        print("\n✅ Optimization completed!")
-        
+        with connect_from_args(args, on_line=None) as client:
+            optimize_settings(client)
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    optimize_settings() 
\ No newline at end of file
+    main()
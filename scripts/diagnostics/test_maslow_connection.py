@@ -1,145 +1,326 @@
 #!/usr/bin/env python3
 """
 Maslow CNC Connection Tester
-Tests various connection methods to the Maslow router
+Tests every connection method to the Maslow router at once, or sweeps a subnet to find it
 """
 
+import argparse
+import asyncio
+import ipaddress
+import re
 import socket
-import requests
-import time
-import subprocess
+import ssl
 import sys
-from urllib.parse import urlparse
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import is_ack  # noqa: E402
+from maslow_client.clients import TELNET_COMMAND, TELNET_PORT  # noqa: E402
+
+DEFAULT_IP = "192.168.50.143"
+COMMON_PORTS = [80, 443, 23, 8080, 3000, 8000]
+HTTP_PORT = 80
+
+TIMEOUT = 3.0             # seconds per probe when testing one device; every probe runs at once
+DISCOVERY_TIMEOUT = 0.5   # seconds per probe in a sweep; a LAN device answers in a few ms
+DISCOVERY_CONCURRENCY = 128  # hosts probed at once (two sockets each)
+MAX_RESPONSE = 64 * 1024  # bytes of an HTTP response kept; enough for the page title
+
+# What FluidNC (and the Maslow build of it) put in `$I`, banners and the WebUI page
+DEVICE_PATTERN = re.compile(r"FluidNC|Maslow|ESP3D|Grbl", re.IGNORECASE)
+TITLE_PATTERN = re.compile(r"<title>\s*(.*?)\s*</title>", re.IGNORECASE | re.DOTALL)
+
+
+def _insecure_context():
+    """The controller's certificate (if it ever serves HTTPS) is self-signed; we only want to know it answers"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
 
-def ping_test(ip):
-    """Test basic ping connectivity"""
-    print(f"🔍 Testing ping to {ip}...")
+
+async def ping_test(ip, timeout=TIMEOUT):
+    """Ping without blocking the other probes; returns (ok, summary)"""
     try:
-        result = subprocess.run(['ping', '-c', '3', ip], 
-                              capture_output=True, text=True, timeout=15)
-        if result.returncode == 0:
-            print("✅ Ping successful!")
-            print(f"   Output: {result.stdout.split('---')[1].strip()}")
-            return True
-        else:
-            print("❌ Ping failed")
-            return False
-    except Exception as e:
-        print(f"❌ Ping error: {e}")
+        process = await asyncio.create_subprocess_exec(
+            'ping', '-c', '3', '-i', '0.2', '-W', '1', ip,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    except OSError as e:
+        return False, f"ping unavailable: {e}"
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout + 2)
+    except asyncio.TimeoutError:
+        process.kill()
+        return False, "no reply"
+    output = output.decode(errors='ignore')
+    summary = output.split('---')[-1].strip() if '---' in output else output.strip()
+    return process.returncode == 0, summary
+
+
+async def port_open(ip, port, timeout=TIMEOUT):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
         return False
+    writer.close()
+    return True
+
+
+async def port_scan(ip, ports, timeout=TIMEOUT):
+    """All ports at once; returns {port: open}"""
+    results = await asyncio.gather(*(port_open(ip, port, timeout) for port in ports))
+    return dict(zip(ports, results))
 
-def port_scan(ip, ports):
-    """Test if specific ports are open"""
-    print(f"\n🔍 Testing ports on {ip}...")
-    open_ports = []
-    
-    for port in ports:
+
+async def http_get(host, port=HTTP_PORT, path="/", tls=False, timeout=TIMEOUT):
+    """Minimal HTTP/1.0 GET; returns (status, headers, text)
+
+    FluidNC serves its WebUI as index.html.gz, so a gzip body is inflated (as far as it was read).
+    """
+    async def fetch():
+        reader, writer = await asyncio.open_connection(host, port, ssl=_insecure_context() if tls else None)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            result = sock.connect_ex((ip, port))
-            if result == 0:
-                print(f"✅ Port {port} is OPEN")
-                open_ports.append(port)
-            else:
-                print(f"❌ Port {port} is CLOSED")
-            sock.close()
-        except Exception as e:
-            print(f"❌ Port {port} error: {e}")
-    
-    return open_ports
-
-def http_test(ip, timeout=10):
-    """Test HTTP connection with various methods"""
-    print(f"\n🔍 Testing HTTP connection to {ip}...")
-    
-    urls_to_test = [
-        f"http://{ip}",
-        f"http://{ip}/",
-        f"http://{ip}:80",
-        f"http://{ip}/index.html",
-        f"https://{ip}",  # Just in case it's HTTPS
-    ]
-    
-    for url in urls_to_test:
-        print(f"   Trying: {url}")
+            writer.write((f"GET {path} HTTP/1.0\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n"
+                          f"Connection: close\r\n\r\n").encode())
+            await writer.drain()
+            raw = b""
+            while len(raw) < MAX_RESPONSE:
+                chunk = await reader.read(MAX_RESPONSE - len(raw))
+                if not chunk:
+                    break
+                raw += chunk
+            return raw
+        finally:
+            writer.close()
+
+    raw = await asyncio.wait_for(fetch(), timeout)
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        raise ValueError(f"Not an HTTP response: {lines[0][:40]!r}")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('content-encoding') == 'gzip':
         try:
-            response = requests.get(url, timeout=timeout)
-            print(f"   ✅ SUCCESS! Status: {response.status_code}")
-            print(f"   Content-Type: {response.headers.get('content-type', 'Unknown')}")
-            print(f"   Content-Length: {len(response.content)} bytes")
-            if response.text:
-                preview = response.text[:200].replace('\n', ' ')
-                print(f"   Preview: {preview}...")
-            return True
-        except requests.exceptions.Timeout:
-            print(f"   ⏰ Timeout after {timeout}s")
-        except requests.exceptions.ConnectionError:
-            print(f"   ❌ Connection refused/failed")
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-    
-    return False
-
-def telnet_test(ip, port=23):
-    """Test Telnet connection (port 23)"""
-    print(f"\n🔍 Testing Telnet connection to {ip}:{port}...")
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+        except zlib.error:
+            pass
+    return status, headers, body.decode('utf-8', errors='ignore')
+
+
+async def http_probe(url_host, port, path, tls, timeout):
+    """One URL; returns a dict describing what came back (or why nothing did)"""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        result = sock.connect_ex((ip, port))
-        if result == 0:
-            print("✅ Telnet port is open!")
-            # Try to read initial response
-            try:
-                sock.settimeout(2)
-                data = sock.recv(1024).decode('utf-8', errors='ignore')
-                if data:
-                    print(f"   Initial response: {data.strip()}")
-            except:
-                print("   (No initial response)")
-            sock.close()
-            return True
-        else:
-            print("❌ Telnet port is closed")
-            sock.close()
-            return False
+        status, headers, text = await http_get(url_host, port, path, tls, timeout)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"Timeout after {timeout}s"}
+    except (OSError, ssl.SSLError) as e:
+        return {"ok": False, "error": f"Connection refused/failed ({e.__class__.__name__})"}
     except Exception as e:
-        print(f"❌ Telnet error: {e}")
-        return False
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "status": status, "headers": headers, "text": text}
 
-def main():
-    ip = "192.168.50.143"
-    
+
+async def http_test(ip, http_port=HTTP_PORT, timeout=TIMEOUT):
+    """Every URL at once; returns [(url, result)] in the order tried"""
+    base = f"http://{ip}" if http_port == HTTP_PORT else f"http://{ip}:{http_port}"
+    urls_to_test = [
+        (f"{base}/", http_port, "/", False),
+        (f"{base}/index.html", http_port, "/index.html", False),
+        (f"http://{ip}:8080/", 8080, "/", False),
+        (f"https://{ip}/", 443, "/", True),  # Just in case it's HTTPS
+    ]
+    results = await asyncio.gather(*(http_probe(ip, port, path, tls, timeout)
+                                     for _, port, path, tls in urls_to_test))
+    return [(url, result) for (url, *_), result in zip(urls_to_test, results)]
+
+
+async def telnet_probe(ip, port=TELNET_PORT, timeout=TIMEOUT):
+    """Connect and ask for build info; returns the lines received, or None if the port is closed
+
+    FluidNC's telnet server sends nothing on connect, so `$I` is what makes it identify itself.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    lines = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        writer.write(b"$I\n")
+        await writer.drain()
+        while True:
+            raw = await asyncio.wait_for(reader.readline(), max(deadline - loop.time(), 0))
+            if not raw:
+                break
+            line = TELNET_COMMAND.sub(b"", raw).decode('utf-8', errors='ignore').strip()
+            if is_ack(line):
+                break
+            if line:
+                lines.append(line)
+    except (OSError, ValueError, asyncio.TimeoutError):
+        pass  # a silent or chatty server still counts as an open port
+    finally:
+        writer.close()
+    return lines
+
+
+def identify(*texts):
+    """First FluidNC/Maslow marker found in the given text, or None"""
+    for text in texts:
+        match = DEVICE_PATTERN.search(text or "")
+        if match:
+            return match.group(0)
+    return None
+
+
+def page_title(text):
+    match = TITLE_PATTERN.search(text or "")
+    return match.group(1) if match else None
+
+
+async def probe_host(ip, http_port=HTTP_PORT, telnet_port=TELNET_PORT, timeout=DISCOVERY_TIMEOUT):
+    """HTTP and telnet at once; returns a description if either answered, else None"""
+    http, telnet = await asyncio.gather(http_probe(ip, http_port, "/", False, timeout),
+                                        telnet_probe(ip, telnet_port, timeout))
+    if not http["ok"] and telnet is None:
+        return None
+    found = {"ip": ip, "http": None, "telnet": None, "device": None}
+    if http["ok"]:
+        found["http"] = page_title(http["text"]) or f"HTTP {http['status']}"
+        found["device"] = identify(http["headers"].get("server"), page_title(http["text"]), http["text"])
+    if telnet is not None:
+        info = next((line for line in telnet if DEVICE_PATTERN.search(line)), None)
+        found["telnet"] = info or (telnet[0] if telnet else "open")
+        found["device"] = found["device"] or identify(info)
+    return found
+
+
+def local_network():
+    """The /24 this machine sits on (no packet is sent: connecting a UDP socket only picks a route)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("10.255.255.255", 1))
+        address = sock.getsockname()[0]
+    except OSError:
+        address = "127.0.0.1"
+    finally:
+        sock.close()
+    return ipaddress.ip_network(f"{address}/24", strict=False)
+
+
+async def discover(network, http_port=HTTP_PORT, telnet_port=TELNET_PORT, timeout=DISCOVERY_TIMEOUT,
+                   concurrency=DISCOVERY_CONCURRENCY):
+    """Probe every host in the network, `concurrency` at a time; returns what answered, in address order"""
+    limit = asyncio.Semaphore(concurrency)
+    hosts = list(network.hosts()) or [network.network_address]  # a /32 has no "hosts"
+
+    async def bounded(ip):
+        async with limit:
+            return await probe_host(str(ip), http_port, telnet_port, timeout)
+
+    results = await asyncio.gather(*(bounded(ip) for ip in hosts))
+    return [found for found in results if found is not None]
+
+
+async def run_discovery(args):
+    network = local_network() if args.discover == "auto" else ipaddress.ip_network(args.discover, strict=False)
+    hosts = max(network.num_addresses - 2, 1)
+    print(f"📡 Sweeping {network} ({hosts} hosts, {args.concurrency} at a time, "
+          f"HTTP :{args.http_port}, telnet :{args.telnet_port})...")
+    started = time.monotonic()
+    found = await discover(network, args.http_port, args.telnet_port, args.timeout or DISCOVERY_TIMEOUT,
+                           args.concurrency)
+    elapsed = time.monotonic() - started
+
+    devices = [f for f in found if f["device"]]
+    for f in found:
+        mark = "✅" if f["device"] else "❔"
+        print(f"{mark} {f['ip']:<15}  device: {f['device'] or '-':<8}  "
+              f"http: {f['http'] or '-'}  telnet: {f['telnet'] or '-'}")
+    print(f"\n📋 {len(devices)} Maslow/FluidNC device(s), {len(found) - len(devices)} other host(s) "
+          f"answering, in {elapsed:.1f}s")
+    if devices:
+        print(f"   Test one with: {Path(__file__).name} {devices[0]['ip']}")
+    return bool(devices)
+
+
+async def run_tests(args):
+    ip = args.ip
+    timeout = args.timeout or TIMEOUT
     print("=" * 60)
     print("🔧 MASLOW CNC CONNECTION TESTER")
     print("=" * 60)
     print(f"Target IP: {ip}")
     print(f"Test time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
-    
+
+    # Everything at once: a dead device costs one timeout, not one per probe
+    started = time.monotonic()
+    (ping_success, ping_summary), ports, urls, telnet = await asyncio.gather(
+        ping_test(ip, timeout),
+        port_scan(ip, COMMON_PORTS, timeout),
+        http_test(ip, args.http_port, timeout),
+        telnet_probe(ip, args.telnet_port, timeout))
+    elapsed = time.monotonic() - started
+
     # Test 1: Basic ping
-    ping_success = ping_test(ip)
-    
+    print(f"🔍 Ping to {ip}...")
+    print(f"{'✅ Ping successful!' if ping_success else '❌ Ping failed'}")
+    if ping_summary:
+        print(f"   Output: {ping_summary}")
+
     # Test 2: Port scan
-    common_ports = [80, 443, 23, 8080, 3000, 8000]
-    open_ports = port_scan(ip, common_ports)
-    
+    print(f"\n🔍 Ports on {ip}...")
+    for port, is_open in ports.items():
+        print(f"{'✅' if is_open else '❌'} Port {port} is {'OPEN' if is_open else 'CLOSED'}")
+    open_ports = [port for port, is_open in ports.items() if is_open]
+
     # Test 3: HTTP connection
-    http_success = http_test(ip)
-    
+    print(f"\n🔍 HTTP connection to {ip}...")
+    http_success = False
+    for url, result in urls:
+        print(f"   Trying: {url}")
+        if not result["ok"]:
+            print(f"   ❌ {result['error']}")
+            continue
+        http_success = True
+        print(f"   ✅ SUCCESS! Status: {result['status']}")
+        print(f"   Content-Type: {result['headers'].get('content-type', 'Unknown')}")
+        print(f"   Content-Length: {len(result['text'])} characters")
+        if result["text"]:
+            preview = result["text"][:200].replace('\n', ' ')
+            print(f"   Preview: {preview}...")
+
     # Test 4: Telnet
-    telnet_success = telnet_test(ip)
-    
+    print(f"\n🔍 Telnet connection to {ip}:{args.telnet_port}...")
+    telnet_success = telnet is not None
+    if not telnet_success:
+        print("❌ Telnet port is closed")
+    else:
+        print("✅ Telnet port is open!")
+        for line in telnet:
+            print(f"   Build info: {line}")
+        if not telnet:
+            print("   (No answer to $I)")
+
     # Summary
     print("\n" + "=" * 60)
-    print("📋 SUMMARY")
+    print(f"📋 SUMMARY ({elapsed:.1f}s)")
     print("=" * 60)
     print(f"Ping:    {'✅ Working' if ping_success else '❌ Failed'}")
     print(f"HTTP:    {'✅ Working' if http_success else '❌ Failed'}")
     print(f"Telnet:  {'✅ Working' if telnet_success else '❌ Failed'}")
     print(f"Open ports: {open_ports if open_ports else 'None detected'}")
-    
+
     if not http_success and ping_success:
         print("\n🤔 TROUBLESHOOTING SUGGESTIONS:")
         print("• Device responds to ping but HTTP doesn't work")
@@ -148,11 +329,34 @@ def main():
         print("• Check if it's still in AP mode (look for 'maslow' WiFi)")
         if telnet_success:
             print("• Try connecting via Telnet for diagnostics")
-    elif not ping_success:
+    elif not ping_success and not open_ports and not telnet_success:
         print("\n🤔 TROUBLESHOOTING SUGGESTIONS:")
         print("• Device not responding - check power and WiFi connection")
-        print("• Verify IP address is correct")
+        print("• Verify IP address is correct, or find it with --discover")
         print("• Check if device created its own 'maslow' hotspot")
+    return http_success or telnet_success
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the connection to a Maslow, or find one on the network")
+    parser.add_argument("ip", nargs="?", default=DEFAULT_IP, help=f"Device to test (default {DEFAULT_IP})")
+    parser.add_argument("--discover", nargs="?", const="auto", metavar="CIDR",
+                        help="Sweep a network for FluidNC/Maslow devices (default: this machine's /24)")
+    parser.add_argument("--http-port", type=int, default=HTTP_PORT, help="HTTP port")
+    parser.add_argument("--telnet-port", type=int, default=TELNET_PORT, help="Telnet port")
+    parser.add_argument("--timeout", type=float,
+                        help=f"Seconds per probe (default {TIMEOUT:g}, {DISCOVERY_TIMEOUT:g} while discovering)")
+    parser.add_argument("--concurrency", type=int, default=DISCOVERY_CONCURRENCY,
+                        help="Hosts probed at once while discovering")
+    args = parser.parse_args()
+
+    try:
+        ok = asyncio.run(run_discovery(args) if args.discover else run_tests(args))
+    except KeyboardInterrupt:
+        ok = False
+    except ValueError as e:
+        parser.error(str(e))
+    sys.exit(0 if ok else 1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
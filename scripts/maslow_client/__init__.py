@@ -0,0 +1,9 @@
+"""
+Maslow Client
+Shared connection code for the scripts: commands return as soon as the controller has answered
+"""
+
+from .cli import (DEFAULT_SERIAL_PORT, add_connection_args, connect, connect_from_args, mux_path, print_line,
+                  print_response, restart_controller)
+from .clients import ApiClient, MaslowClient, SerialClient, TcpClient, UnixClient
+from .protocol import BANNER_PATTERN, REALTIME_COMMANDS, Response, default_timeout, is_ack, is_status_report
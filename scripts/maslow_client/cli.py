@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Maslow Client Command Line
+Connection options shared by the scripts: --port for serial, --host for telnet, --api for a running backend
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Optional
+
+from .clients import (BAUD_RATE, READY_TIMEOUT, TELNET_PORT, ApiClient, LineCallback, MaslowClient, SerialClient,
+                      TcpClient, UnixClient)
+from .protocol import BANNER_PATTERN, Response
+
+DEFAULT_SERIAL_PORT = "/dev/cu.usbmodem12201"
+DEFAULT_MACHINE = "default"
+BOOT_TIMEOUT = 20.0        # seconds for a restart to print its banner and answer again
+RESTART_ACK_TIMEOUT = 2.0  # the controller may reboot before acknowledging $ESP444=RESTART
+RECONNECT_INTERVAL = 0.5   # seconds between attempts when the port vanished during a restart
+
+
+def print_line(line: str):
+    """Default line callback: show everything the controller sends as it arrives"""
+    print(f"📥 {line}")
+
+
+def mux_path(machine_id: Optional[str] = None) -> str:
+    """Where a running backend shares a machine's serial stream (same MASLOW_MUX_DIR as the backend)"""
+    directory = os.getenv("MASLOW_MUX_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"maslow-{machine_id or DEFAULT_MACHINE}.sock")
+
+
+def print_response(response: Response):
+    """Show a finished command: its output, then how it ended and how long that took"""
+    for line in response.lines:
+        print(f"📥 {line}")
+    elapsed = f" ({response.elapsed * 1000:.0f} ms)" if response.elapsed is not None else ""
+    print(f"{'📥' if response.ok else '⚠️ '} {response.result}{elapsed}")
+
+
+def add_connection_args(parser: argparse.ArgumentParser, default_host: Optional[str] = None):
+    group = parser.add_argument_group("connection")
+    group.add_argument("--port", default=DEFAULT_SERIAL_PORT, help="serial port (default: %(default)s)")
+    group.add_argument("--baud", type=int, default=BAUD_RATE, help="serial baud rate (default: %(default)s)")
+    group.add_argument("--host", default=default_host, help="connect over telnet to this address instead of serial")
+    group.add_argument("--tcp-port", type=int, default=TELNET_PORT, help="telnet port (default: %(default)s)")
+    group.add_argument("--api", metavar="URL", help="go through a running backend, e.g. http://localhost:8003")
+    group.add_argument("--mux", metavar="PATH",
+                       help="the backend's shared serial socket (default: used automatically when the backend is "
+                            "running and no --port/--host/--api is given)")
+    group.add_argument("--no-mux", action="store_true", help="open the serial port even if the backend is running")
+    group.add_argument("--machine", help="machine id on the backend (with --api or the mux)")
+    group.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT,
+                       help="seconds to wait for the firmware to answer (default: %(default)s)")
+
+
+def connect(port: Optional[str] = None, baudrate: int = BAUD_RATE, host: Optional[str] = None,
+            tcp_port: int = TELNET_PORT, api: Optional[str] = None, machine_id: Optional[str] = None,
+            on_line: Optional[LineCallback] = print_line, ready_timeout: Optional[float] = READY_TIMEOUT,
+            mux: Optional[str] = None) -> MaslowClient:
+    """Open whichever connection was asked for (API, telnet, mux socket, then serial) and wait until it answers"""
+    if api:
+        client = ApiClient(api, machine_id, on_line=on_line)
+    elif host:
+        client = TcpClient(host, tcp_port, on_line=on_line)
+    elif mux:
+        client = UnixClient(mux, on_line=on_line)
+    else:
+        client = SerialClient(port or DEFAULT_SERIAL_PORT, baudrate, on_line=on_line)
+    if ready_timeout and not client.wait_ready(ready_timeout):
+        client.close()
+        raise ConnectionError(f"No answer from the controller within {ready_timeout:g}s")
+    return client
+
+
+def connect_from_args(args: argparse.Namespace, on_line: Optional[LineCallback] = print_line) -> MaslowClient:
+    mux = args.mux
+    if mux is None and not (args.no_mux or args.api or args.host) and args.port == DEFAULT_SERIAL_PORT \
+            and os.path.exists(mux_path(args.machine)):
+        # The backend holds the port; share its stream instead of fighting over the device
+        mux = mux_path(args.machine)
+        print(f"🔀 Backend is running; sharing its connection via {mux}")
+    return connect(args.port, args.baud, args.host, args.tcp_port, args.api, args.machine, on_line,
+                   args.ready_timeout, mux)
+
+
+def restart_controller(client: MaslowClient, args: argparse.Namespace, on_line: Optional[LineCallback] = print_line,
+                       boot_timeout: float = BOOT_TIMEOUT) -> MaslowClient:
+    """Send `$ESP444=RESTART` and return once the firmware answers again
+
+    Boards on native USB drop the port while rebooting; the client returned is then a new connection.
+    """
+    mark = client.line_count
+    client.send("$ESP444=RESTART", timeout=RESTART_ACK_TIMEOUT)
+    deadline = time.monotonic() + boot_timeout
+    if isinstance(client, ApiClient):
+        # The backend notices the reboot and reconnects by itself
+        if not client.wait_ready(boot_timeout):
+            raise TimeoutError(f"Controller did not come back within {boot_timeout:g}s")
+        return client
+    
+    if client.wait_for_line(BANNER_PATTERN, boot_timeout, since=mark) is not None:
+        if client.wait_ready(max(deadline - time.monotonic(), READY_TIMEOUT)):
+            return client
+    elif client.error is None:
+        raise TimeoutError(f"Controller did not restart within {boot_timeout:g}s")
+    
+    print(f"🔌 Connection dropped during restart ({client.error}); reconnecting...")
+    client.close()
+    while time.monotonic() < deadline:
+        try:
+            return connect_from_args(args, on_line)
+        except Exception:
+            time.sleep(RECONNECT_INTERVAL)
+    raise TimeoutError(f"Could not reconnect within {boot_timeout:g}s")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Maslow Clients
+Serial, TCP/telnet and backend-API connections that return as soon as the controller has answered
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple, Union
+
+from .protocol import (RESULT_SENT, RESULT_TIMEOUT, RX_BUFFER_SIZE, Response, default_timeout, encode_command,
+                       expects_reply, expects_status, is_ack, is_status_report)
+
+BAUD_RATE = 115200
+TELNET_PORT = 23
+READ_TIMEOUT = 0.05     # seconds; how long the reader blocks before checking for close
+READY_TIMEOUT = 5.0     # seconds to wait for the firmware to answer after connecting
+READY_PROBE = 0.25      # seconds between `?` probes while waiting
+HISTORY_SIZE = 1000     # recent lines kept for wait_for_line
+
+# IAC negotiation a telnet server may send before the controller's own output
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe][\x00-\xff]|\xff[\xf0-\xfa]")
+
+LineCallback = Callable[[str], None]
+LinePattern = Union[str, Callable[[str], bool]]
+
+
+def _matcher(pattern: LinePattern) -> Callable[[str], bool]:
+    if callable(pattern):
+        return pattern
+    regex = re.compile(pattern)
+    return lambda line: regex.search(line) is not None
+
+
+class MaslowClient:
+    """Base client: a reader thread splits incoming bytes into lines and hands each to the command it answers
+
+    Subclasses provide `_read` (bytes, or b"" after READ_TIMEOUT), `_write` and `_close`.
+    """
+
+    def __init__(self, on_line: Optional[LineCallback] = None):
+        self.on_line = on_line  # called with every line read, e.g. to print it
+        self.history: Deque[str] = deque(maxlen=HISTORY_SIZE)
+        self.line_count = 0  # lines read so far; history[-1] is line number line_count - 1
+        self.error: Optional[str] = None
+
+        self._pending: Deque[Tuple[Response, int, float]] = deque()  # (response, bytes, deadline) awaiting ok/error
+        self._status_waiters: Deque[Tuple[Response, float]] = deque()  # `?` awaiting a report
+        self._inflight_bytes = 0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._reader: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start_reader(self):
+        self._reader = threading.Thread(target=self._read_loop, name="maslow-client-reader", daemon=True)
+        self._reader.start()
+
+    def _read(self) -> bytes:
+        raise NotImplementedError
+
+    def _write(self, data: bytes):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def _read_loop(self):
+        buffer = b""
+        while not self._closed:
+            try:
+                data = self._read()
+            except Exception as e:
+                if not self._closed:
+                    self._fail(str(e))
+                return
+            if not data:
+                continue
+            buffer += data
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                line = raw.decode("utf-8", errors="ignore").strip()
+                if line:
+                    self._handle_line(line)
+
+    def _handle_line(self, line: str):
+        with self._condition:
+            self.history.append(line)
+            self.line_count += 1
+            if is_status_report(line) and self._status_waiters:
+                self._status_waiters.popleft()[0].finish(line)
+            elif is_ack(line) and self._pending:
+                response, size, _ = self._pending.popleft()
+                self._inflight_bytes -= size
+                response.finish(line)
+            elif self._pending and not is_status_report(line):
+                self._pending[0][0].lines.append(line)
+            self._condition.notify_all()
+        if self.on_line:
+            self.on_line(line)
+
+    def _fail(self, reason: str):
+        """The connection broke: every waiting command ends now instead of at its timeout"""
+        with self._condition:
+            self.error = reason
+            for response, _, _ in self._pending:
+                response.finish(f"closed: {reason}")
+            for response, _ in self._status_waiters:
+                response.finish(f"closed: {reason}")
+            self._pending.clear()
+            self._status_waiters.clear()
+            self._inflight_bytes = 0
+            self._condition.notify_all()
+
+    def _expire(self, now: float):
+        """Time out commands past their deadline so later replies go to later commands"""
+        while self._pending and self._pending[0][2] <= now:
+            response, size, _ = self._pending.popleft()
+            self._inflight_bytes -= size
+            response.finish(RESULT_TIMEOUT)
+        while self._status_waiters and self._status_waiters[0][1] <= now:
+            self._status_waiters.popleft()[0].finish(RESULT_TIMEOUT)
+
+    def _next_deadline(self) -> Optional[float]:
+        deadlines = [entry[1] for entry in self._status_waiters]
+        if self._pending:
+            deadlines.append(self._pending[0][2])
+        return min(deadlines) if deadlines else None
+
+    def _wait(self):
+        """Wait (holding the condition) for the next reply or the oldest deadline"""
+        deadline = self._next_deadline()
+        self._condition.wait(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._expire(time.monotonic())
+
+    def send_many(self, commands: List[str], timeout: Optional[float] = None) -> List[Response]:
+        """Pipeline commands under character counting; returns one Response per command, in order
+
+        A command that never answers times out after `timeout` (or its default) without holding up the rest.
+        """
+        if self.error:
+            raise ConnectionError(self.error)
+        responses = []
+        for command in commands:
+            data = encode_command(command)
+            response = Response(command)
+            responses.append(response)
+            # Held across queueing and writing so replies arrive in the order commands were queued
+            with self._write_lock:
+                with self._condition:
+                    if expects_reply(command) and not expects_status(command):
+                        # Room in the controller's RX buffer: anything queued plus this line must fit
+                        while self._pending and self._inflight_bytes + len(data) > RX_BUFFER_SIZE and not self.error:
+                            self._wait()
+                    if self.error:
+                        response.finish(f"closed: {self.error}")
+                        continue
+                    response.sent_at = time.monotonic()
+                    deadline = response.sent_at + (timeout or default_timeout(command))
+                    if expects_status(command):
+                        self._status_waiters.append((response, deadline))
+                    elif expects_reply(command):
+                        self._pending.append((response, len(data), deadline))
+                        self._inflight_bytes += len(data)
+                self._write(data)
+            if not expects_reply(command):
+                response.finish(RESULT_SENT)
+        with self._condition:
+            while any(response.result is None for response in responses):
+                self._wait()
+        return responses
+
+    def send(self, command: str, timeout: Optional[float] = None) -> Response:
+        """Send one command and return when its reply has ended"""
+        return self.send_many([command], timeout)[0]
+
+    def wait_for_line(self, pattern: LinePattern, timeout: float, since: Optional[int] = None) -> Optional[str]:
+        """First line matching `pattern` read after line number `since` (default: from now), or None"""
+        matches = _matcher(pattern)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            index = self.line_count if since is None else since
+            while True:
+                first = self.line_count - len(self.history)
+                for line in list(self.history)[max(index - first, 0):]:
+                    if matches(line):
+                        return line
+                index = self.line_count
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.error:
+                    return None
+                self._condition.wait(remaining)
+
+    def wait_closed(self, timeout: Optional[float] = None) -> bool:
+        """Block until the connection breaks (True) or `timeout` passes (False)"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.error is not None, timeout)
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        """Probe with `?` until the firmware answers; returns False if it never did"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.error:
+            if self.send("?", timeout=min(READY_PROBE, max(deadline - time.monotonic(), 0.01))).ok:
+                return True
+        return False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._close()
+        finally:
+            if self._reader is not None and self._reader is not threading.current_thread():
+                self._reader.join(timeout=1.0)
+
+
+class SerialClient(MaslowClient):
+    """USB serial connection"""
+
+    def __init__(self, port: str, baudrate: int = BAUD_RATE, on_line: Optional[LineCallback] = None):
+        super().__init__(on_line)
+        import serial  # pyserial is only needed for serial connections
+        self.port_name = port
+        self.port = serial.Serial(port, baudrate, timeout=READ_TIMEOUT)
+        self.port.reset_input_buffer()
+        self._start_reader()
+
+    def _read(self) -> bytes:
+        return self.port.read(max(1, self.port.in_waiting))
+
+    def _write(self, data: bytes):
+        self.port.write(data)
+
+    def _close(self):
+        self.port.close()
+
+
+class TcpClient(MaslowClient):
+    """FluidNC's telnet server (raw TCP, port 23)"""
+
+    def __init__(self, host: str, port: int = TELNET_PORT, connect_timeout: float = 5.0,
+                 on_line: Optional[LineCallback] = None):
+        super().__init__(on_line)
+        self.address = (host, port)
+        self.sock = socket.create_connection(self.address, timeout=connect_timeout)
+        self.sock.settimeout(READ_TIMEOUT)
+        self._start_reader()
+
+    def _read(self) -> bytes:
+        try:
+            data = self.sock.recv(4096)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise ConnectionError("Connection closed by the controller")
+        return TELNET_COMMAND.sub(b"", data)
+
+    def _write(self, data: bytes):
+        self.sock.sendall(data)
+
+    def _close(self):
+        self.sock.close()
+
+
+class UnixClient(TcpClient):
+    """The backend's shared machine stream (serial mux socket): no need to stop the backend first"""
+
+    def __init__(self, path: str, connect_timeout: float = 5.0, on_line: Optional[LineCallback] = None):
+        MaslowClient.__init__(self, on_line)
+        self.address = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(connect_timeout)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.sock.settimeout(READ_TIMEOUT)
+        self._start_reader()
+
+
+class ApiClient(MaslowClient):
+    """A running backend: commands go through its pipelined /api/batch endpoint, other output via its WebSocket"""
+
+    def __init__(self, base_url: str = "http://localhost:8003", machine_id: Optional[str] = None,
+                 on_line: Optional[LineCallback] = None):
+        super().__init__(on_line)
+        root = base_url.rstrip("/")
+        self.base_url = root + "/api" + (f"/machines/{machine_id}" if machine_id else "")
+        self.ws_url = re.sub(r"^http", "ws", root) + (f"/ws/machines/{machine_id}" if machine_id else "/ws")
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None, timeout: float = 30.0) -> dict:
+        data = None if payload is None else json.dumps(payload).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as reply:
+                return json.loads(reply.read())
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read()).get("detail")
+            except ValueError:
+                detail = None
+            raise Exception(detail or f"HTTP {e.code}") from None
+
+    def _status_line(self) -> str:
+        status = self._request("GET", "/status")
+        position = status.get("position", {})
+        return "<{}|MPos:{:.3f},{:.3f},{:.3f}>".format(
+            status.get("status", "Unknown"), position.get("x", 0.0), position.get("y", 0.0), position.get("z", 0.0))
+
+    def _emit(self, line: str):
+        self.history.append(line)
+        self.line_count += 1
+        if self.on_line:
+            self.on_line(line)
+
+    def send_many(self, commands: List[str], timeout: Optional[float] = None) -> List[Response]:
+        """Consecutive commands go out as one batch; `?` is answered from /status"""
+        responses = []
+        batch: List[str] = []
+
+        def flush():
+            if not batch:
+                return
+            limit = timeout or max(default_timeout(command) for command in batch)
+            started = time.monotonic()
+            reply = self._request("POST", "/batch", {"commands": batch, "stop_on_error": False, "timeout": limit},
+                                  timeout=limit + 10.0)
+            for result in reply["results"]:
+                response = Response(result["command"], list(result["output"]), sent_at=started)
+                for line in response.lines:
+                    self._emit(line)
+                if result["response"] not in (RESULT_SENT, "skipped", RESULT_TIMEOUT):
+                    self._emit(result["response"])
+                response.finish(result["response"])
+                if result["ms"] is not None:
+                    response.finished_at = started + result["ms"] / 1000
+                responses.append(response)
+            batch.clear()
+
+        for command in commands:
+            if expects_status(command):
+                flush()
+                response = Response(command)
+                line = self._status_line()
+                self._emit(line)
+                response.finish(line)
+                responses.append(response)
+            else:
+                batch.append(command)
+        flush()
+        return responses
+
+    def wait_for_line(self, pattern: LinePattern, timeout: float, since: Optional[int] = None) -> Optional[str]:
+        """First line matching `pattern`: replies already read after `since`, then the controller's output as
+        the backend broadcasts it (output from before the call that no reply carried is not seen)"""
+        if since is not None:
+            found = super().wait_for_line(pattern, 0, since)
+            if found is not None:
+                return found
+        from websockets.sync.client import connect as ws_connect  # only needed to watch unsolicited output
+        matches = _matcher(pattern)
+        deadline = time.monotonic() + timeout
+        with ws_connect(self.ws_url, open_timeout=max(timeout, 1.0)) as ws:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    message = json.loads(ws.recv(timeout=remaining))
+                except TimeoutError:
+                    return None
+                line = message.get("data", "") if message.get("type") == "serial_response" else ""
+                if not line or is_status_report(line):
+                    continue
+                self._emit(line)
+                if matches(line):
+                    return line
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        """True once the backend reports the controller connected"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._request("GET", "/status").get("connected"):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(READY_PROBE)
+
+    def _close(self):
+        pass
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Maslow Client Protocol
+What ends a reply: `ok`/`error:N` for lines, a `<...>` report for `?`, nothing for other realtime bytes
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+BANNER_PATTERN = r"^Grbl |FluidNC"  # printed once the firmware has (re)started
+RX_BUFFER_SIZE = 127  # FluidNC's serial RX buffer; pipelined lines never overfill it
+REALTIME_COMMANDS = {"?", "!", "~", "\x18", "\x85"}
+
+DEFAULT_TIMEOUT = 10.0  # seconds; only reached when the controller never answers
+# Commands that legitimately take a while before their `ok`
+SLOW_COMMANDS = {
+    "$ESP410": 20.0,  # WiFi network scan
+    "$H": 120.0,      # homing answers once the machine has stopped moving
+}
+
+RESULT_OK = "ok"
+RESULT_SENT = "sent"        # realtime byte that gets no reply
+RESULT_TIMEOUT = "timeout"
+
+
+def is_ack(line: str) -> bool:
+    return line == "ok" or line.startswith("error")
+
+
+def is_status_report(line: str) -> bool:
+    return line.startswith("<") and line.endswith(">")
+
+
+def expects_status(command: str) -> bool:
+    """`?` is answered by a status report instead of `ok`"""
+    return command == "?"
+
+
+def expects_reply(command: str) -> bool:
+    return command not in REALTIME_COMMANDS or expects_status(command)
+
+
+def default_timeout(command: str) -> float:
+    upper = command.upper()
+    for prefix, timeout in SLOW_COMMANDS.items():
+        if upper.startswith(prefix.upper()):
+            return timeout
+    return DEFAULT_TIMEOUT
+
+
+def encode_command(command: str) -> bytes:
+    """Realtime bytes go out alone (latin-1 keeps 0x85 a single byte); everything else is a line"""
+    if command in REALTIME_COMMANDS:
+        return command.encode("latin-1")
+    return (command + "\n").encode()
+
+
+@dataclass
+class Response:
+    """Everything the controller sent back for one command"""
+    command: str
+    lines: List[str] = field(default_factory=list)  # output lines, without the terminating `ok`/`error`
+    result: Optional[str] = None  # ok, error:N, sent, timeout (a status report for `?`)
+    sent_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.result == RESULT_OK or self.result == RESULT_SENT or (
+            self.result is not None and is_status_report(self.result))
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """Seconds from write to terminator"""
+        return None if self.finished_at is None else self.finished_at - self.sent_at
+
+    def finish(self, result: str):
+        self.result = result
+        self.finished_at = time.monotonic()
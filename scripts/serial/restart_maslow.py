@@ -4,59 +4,45 @@ Restart Maslow via Serial
 Send restart command and monitor the boot process
 """
 
-import serial
+import argparse
+import sys
 import time
+from pathlib import Path
 
-def send_command(ser, command, wait_time=2):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_response, restart_controller  # noqa: E402
+
+def print_boot_line(line):
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] {line}")
 
-def restart_maslow(port="/dev/cu.usbmodem12201", baudrate=115200):
-    """Restart the Maslow and monitor boot process"""
+def restart_maslow(args):
+    """Restart the Maslow and monitor boot process until it answers again"""
     print("🔄 Restarting Maslow...")
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
+        client = connect_from_args(args, on_line=None)
+        client.on_line = print_boot_line
         
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
-        
-        # Send restart command
+        # Boot messages are printed as they arrive; returns once the firmware answers again
         print("📤 Sending restart command...")
-        send_command(ser, "$ESP444=RESTART")
-        
-        # Wait for restart
-        print("\n⏳ Waiting for restart...")
-        time.sleep(3)
-        
-        # Monitor boot messages for 10 seconds
-        print("👀 Monitoring boot process...")
-        start_time = time.time()
-        while time.time() - start_time < 10:
-            if ser.in_waiting > 0:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    timestamp = time.strftime("%H:%M:%S")
-                    print(f"[{timestamp}] {line}")
+        started = time.monotonic()
+        client = restart_controller(client, args, on_line=print_boot_line)
+        print(f"\n⏱️  Back up after {time.monotonic() - started:.1f}s")
         
         # Check final status
         print("\n📊 Final status check...")
-        send_command(ser, "$ESP420", wait_time=3)
+        client.on_line = None
+        print_response(client.send("$ESP420"))
         
-        ser.close()
+        client.close()
         print("\n✅ Restart completed!")
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    restart_maslow() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Restart the Maslow and monitor the boot process")
+    add_connection_args(parser)
+    restart_maslow(parser.parse_args())
@@ -4,66 +4,49 @@ Maslow Serial Connection Tool
 Connect via USB serial to diagnose and interact with Maslow
 """
 
-import serial
-import time
-import threading
+import argparse
+import sys
+from pathlib import Path
 
-def serial_session(port="/dev/cu.usbmodem12201", baudrate=115200):
-    """Interactive serial session with the Maslow"""
-    print(f"🔗 Connecting to Maslow via {port} at {baudrate} baud...")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_line  # noqa: E402
+
+COMMANDS = [
+    "$I",           # Get build info
+    "$$",           # Get all settings
+    "?",            # Get status
+    "$ESP420",      # Get WiFi status (FluidNC command)
+    "$Localfs/List" # List files (FluidNC command)
+]
+
+def serial_session(args):
+    """Serial session with the Maslow: every line is printed as it arrives"""
+    print(f"🔗 Connecting to Maslow via {args.port} at {args.baud} baud...")
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=1)
-        time.sleep(2)  # Let connection settle
+        client = connect_from_args(args, on_line=None)
+        client.on_line = print_line
         print("✅ Connected!")
         
-        # Clear any existing data
-        ser.flushInput()
-        ser.flushOutput()
-        
-        # Function to read responses continuously
-        def read_responses():
-            while True:
-                try:
-                    if ser.in_waiting > 0:
-                        data = ser.readline().decode('utf-8', errors='ignore').strip()
-                        if data:
-                            print(f"📥 {data}")
-                except:
-                    break
-        
-        # Start reading responses in background
-        reader_thread = threading.Thread(target=read_responses, daemon=True)
-        reader_thread.start()
-        
-        time.sleep(2)  # Let initial messages come through
-        
-        # Send diagnostic commands
-        commands = [
-            "$I",           # Get build info
-            "$$",           # Get all settings  
-            "?",            # Get status
-            "$ESP420",      # Get WiFi status (FluidNC command)
-            "$Localfs/List" # List files (FluidNC command)
-        ]
-        
-        for cmd in commands:
+        for cmd in COMMANDS:
             print(f"📤 Sending: {cmd}")
-            ser.write((cmd + "\n").encode())
-            time.sleep(3)  # Wait for response
+        client.send_many(COMMANDS)
         
-        # Keep connection open to see all responses
-        print("⏳ Waiting for more responses...")
-        time.sleep(10)
+        # Keep connection open to see unsolicited messages
+        if args.listen:
+            print(f"⏳ Listening for {args.listen:g}s more...")
+            client.wait_closed(args.listen)
         
-        ser.close()
+        client.close()
         print("🔌 Serial connection closed")
         
-    except serial.SerialException as e:
-        print(f"❌ Serial Error: {e}")
-        print("💡 Try: sudo chmod 666 /dev/cu.usbmodem12201")
     except Exception as e:
         print(f"❌ Error: {e}")
+        print(f"💡 Try: sudo chmod 666 {args.port}")
 
 if __name__ == "__main__":
-    serial_session() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Send diagnostic commands and print every reply")
+    add_connection_args(parser)
+    parser.add_argument("--listen", type=float, default=0, help="seconds to keep printing messages afterwards")
+    serial_session(parser.parse_args())
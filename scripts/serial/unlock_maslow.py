@@ -4,49 +4,46 @@ Unlock Maslow from Alarm State
 Send $X command to clear alarm and enable full functionality
 """
 
-import serial
-import time
+import argparse
+import sys
+from pathlib import Path
 
-def unlock_maslow(port="/dev/cu.usbmodem12201", baudrate=115200):
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args  # noqa: E402
+
+def unlock_maslow(args):
     """Send unlock command to clear alarm state"""
     print(f"🔗 Connecting to unlock Maslow...")
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
+        client = connect_from_args(args, on_line=None)
         print("✅ Connected!")
         
-        # Clear any existing data
-        ser.flushInput()
-        ser.flushOutput()
-        
         # Send unlock command
         print("📤 Sending unlock command: $X")
-        ser.write("$X\n".encode())
-        time.sleep(2)
-        
-        # Read response
-        response = ser.readline().decode('utf-8', errors='ignore').strip()
-        print(f"📥 Response: {response}")
+        response = client.send("$X")
+        print(f"📥 Response: {response.result}")
         
         # Check status after unlock
         print("📤 Checking status: ?")
-        ser.write("?\n".encode())
-        time.sleep(2)
-        
-        status = ser.readline().decode('utf-8', errors='ignore').strip()
-        print(f"📥 Status: {status}")
+        status = client.send("?")
+        print(f"📥 Status: {status.result}")
         
-        if "Alarm" not in status:
+        if not status.ok:
+            print("⚠️  No status report received.")
+        elif "Alarm" not in status.result:
             print("✅ Alarm cleared! Machine should be ready.")
         else:
             print("⚠️  Still in alarm state. May need homing or other action.")
         
-        ser.close()
+        client.close()
         print("🔌 Connection closed")
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    unlock_maslow() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Clear the alarm state with $X")
+    add_connection_args(parser)
+    unlock_maslow(parser.parse_args())
@@ -4,52 +4,45 @@ Watch Maslow Serial Output Continuously
 Monitor for WiFi connection messages and status changes
 """
 
-import serial
-import time
-import signal
+import argparse
 import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def signal_handler(sig, frame):
-    print('\n🛑 Stopping serial monitor...')
-    sys.exit(0)
+from maslow_client import add_connection_args, connect_from_args  # noqa: E402
 
-signal.signal(signal.SIGINT, signal_handler)
+def print_timestamped(line):
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] {line}")
 
-def watch_serial(port="/dev/cu.usbmodem12201", baudrate=115200):
+def watch_serial(args):
     """Continuously monitor serial output"""
-    print(f"🔍 Monitoring Maslow serial output at {port}...")
+    print(f"🔍 Monitoring Maslow serial output at {args.host or args.port}...")
     print("Press Ctrl+C to stop")
     print("-" * 60)
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=1)
-        time.sleep(2)
-        
-        # Clear any existing data
-        ser.flushInput()
-        ser.flushOutput()
-        
-        while True:
-            try:
-                if ser.in_waiting > 0:
-                    data = ser.readline().decode('utf-8', errors='ignore').strip()
-                    if data:
-                        timestamp = time.strftime("%H:%M:%S")
-                        print(f"[{timestamp}] {data}")
-                else:
-                    time.sleep(0.1)  # Small delay to prevent busy waiting
-                    
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print(f"⚠️  Error reading: {e}")
-                time.sleep(1)
+        # Lines are printed by the client's reader thread as they arrive; nothing to poll
+        client = connect_from_args(args, on_line=print_timestamped)
+        try:
+            if client.wait_closed():
+                print(f"⚠️  Connection lost: {client.error}")
+        except KeyboardInterrupt:
+            print('\n🛑 Stopping serial monitor...')
         
-        ser.close()
+        client.close()
         print("🔌 Serial connection closed")
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    watch_serial() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Print everything the controller sends")
+    add_connection_args(parser)
+    parser.set_defaults(ready_timeout=0)  # watch a controller even while it is still booting
+    args = parser.parse_args()
+    if args.api:
+        parser.error("watching needs a serial or telnet connection")
+    watch_serial(args)
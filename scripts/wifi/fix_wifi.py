@@ -3,52 +3,51 @@
 Fix WiFi SSID and Restart Connection
 """
 
-import serial
-import time
+import argparse
+import sys
+from pathlib import Path
 
-def send_command(ser, command, wait_time=2):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_line, print_response  # noqa: E402
+
+DEFAULT_SSID = "bluecastleinn2"
+WIFI_TIMEOUT = 15.0  # seconds for the station to connect (or give up)
+WIFI_RESULT = r"Connected|IP is|[Ff]ail"
 
-def fix_wifi(port="/dev/cu.usbmodem12201", baudrate=115200):
+def fix_wifi(args):
     """Fix the WiFi SSID and restart connection"""
     print("🔧 Fixing WiFi SSID...")
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
-        
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
-        
-        # Set correct SSID
-        send_command(ser, "$Sta/SSID=bluecastleinn2")
+        client = connect_from_args(args, on_line=None)
         
-        # Check if it's set correctly
-        send_command(ser, "$Sta/SSID")
+        # Set correct SSID, then check it's set correctly
+        for response in client.send_many([f"$Sta/SSID={args.ssid}", "$Sta/SSID"]):
+            print(f"📤 Sending: {response.command}")
+            print_response(response)
         
         # Restart WiFi connection
         print("\n🔄 Restarting WiFi connection...")
-        send_command(ser, "$ESP444")  # WiFi restart command
+        client.on_line = print_line
+        mark = client.line_count
+        client.send("$ESP444")  # WiFi restart command
         
-        # Wait a bit and check status
-        time.sleep(5)
+        # Wait for the station to report the outcome rather than a fixed delay
+        if client.wait_for_line(WIFI_RESULT, WIFI_TIMEOUT, since=mark) is None:
+            print(f"⏳ No WiFi result after {WIFI_TIMEOUT:g}s")
+        client.on_line = None
         print("\n📊 Checking connection status...")
-        send_command(ser, "$ESP420", wait_time=3)
+        print_response(client.send("$ESP420"))
         
-        ser.close()
+        client.close()
         print("\n✅ WiFi fix completed!")
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    fix_wifi() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fix the WiFi SSID and restart the connection")
+    add_connection_args(parser)
+    parser.add_argument("--ssid", default=DEFAULT_SSID, help="network name (default: %(default)s)")
+    fix_wifi(parser.parse_args())
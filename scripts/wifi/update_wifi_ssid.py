@@ -3,54 +3,54 @@
 Update WiFi SSID to new 2.4GHz network
 """
 
-import serial
-import time
+import argparse
+import sys
+from pathlib import Path
 
-def send_command(ser, command, wait_time=3):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import (add_connection_args, connect_from_args, print_line, print_response,  # noqa: E402
+                           restart_controller)
+
+DEFAULT_SSID = "bluecastleinn2_2.4"
+WIFI_TIMEOUT = 15.0  # seconds after boot for the station to connect (or give up)
+WIFI_RESULT = r"Connected|IP is|[Ff]ail"
 
-def update_wifi_ssid(port="/dev/cu.usbmodem12201", baudrate=115200):
+STEPS = [
+    ("1️⃣ Setting new SSID...", "$Sta/SSID={ssid}"),
+    ("2️⃣ Verifying SSID...", "$Sta/SSID"),
+    ("3️⃣ Checking password is still set...", "$Sta/Password"),
+    ("4️⃣ Scanning for the new network...", "$ESP410"),
+]
+
+def update_wifi_ssid(args):
     """Update WiFi SSID to the new 2.4GHz network"""
-    print("🔧 Updating WiFi SSID to bluecastleinn2_2.4...")
+    print(f"🔧 Updating WiFi SSID to {args.ssid}...")
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
-        
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
+        client = connect_from_args(args, on_line=None)
         
-        print("1️⃣ Setting new SSID...")
-        send_command(ser, "$Sta/SSID=bluecastleinn2_2.4")
-        
-        print("\n2️⃣ Verifying SSID...")
-        send_command(ser, "$Sta/SSID")
-        
-        print("\n3️⃣ Checking password is still set...")
-        send_command(ser, "$Sta/Password")
-        
-        print("\n4️⃣ Scanning for the new network...")
-        send_command(ser, "$ESP410", wait_time=5)
+        responses = client.send_many([command.format(ssid=args.ssid) for _, command in STEPS])
+        for (description, _), response in zip(STEPS, responses):
+            print(f"\n{description}")
+            print(f"📤 Sending: {response.command}")
+            print_response(response)
         
         print("\n5️⃣ Attempting to connect...")
-        send_command(ser, "$ESP444=RESTART")
-        
         print("\n⏳ Waiting for restart and connection...")
-        time.sleep(8)
+        client.on_line = print_line
+        before, mark = client, client.line_count
+        client = restart_controller(client, args, on_line=print_line)
+        # The station may already have connected while booting; a new connection only has post-boot lines
+        since = mark if client is before else 0
+        if client.wait_for_line(WIFI_RESULT, WIFI_TIMEOUT, since=since) is None:
+            print(f"⏳ No WiFi result after {WIFI_TIMEOUT:g}s")
+        client.on_line = None
         
         print("\n6️⃣ Checking final status...")
-        send_command(ser, "$ESP420", wait_time=4)
+        print_response(client.send("$ESP420"))
         
-        ser.close()
+        client.close()
         print("\n✅ WiFi SSID update completed!")
         print("🌐 Your Maslow should now connect to the 2.4GHz network only!")
         
@@ -58,4 +58,7 @@ def update_wifi_ssid(port="/dev/cu.usbmodem12201", baudrate=115200):
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    update_wifi_ssid() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Point the Maslow at a new WiFi network and restart it")
+    add_connection_args(parser)
+    parser.add_argument("--ssid", default=DEFAULT_SSID, help="network name (default: %(default)s)")
+    update_wifi_ssid(parser.parse_args())
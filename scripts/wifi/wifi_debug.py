@@ -4,48 +4,34 @@ WiFi Debug via Serial
 Send commands to check and configure WiFi settings
 """
 
-import serial
-import time
+import argparse
+import sys
+from pathlib import Path
 
-def send_command(ser, command, wait_time=2):
-    """Send a command and read the response"""
-    print(f"📤 Sending: {command}")
-    ser.write((command + "\n").encode())
-    time.sleep(wait_time)
-    
-    responses = []
-    while ser.in_waiting > 0:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(f"📥 {line}")
-            responses.append(line)
-    
-    return responses
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maslow_client import add_connection_args, connect_from_args, print_response  # noqa: E402
 
-def wifi_debug(port="/dev/cu.usbmodem12201", baudrate=115200):
+# Check current WiFi settings
+COMMANDS = [
+    "$ESP420",                    # WiFi status
+    "$Sta/SSID",                 # Check current SSID
+    "$Sta/Password",             # Check current password (will show as set/unset)
+    "$WiFi/Mode",                # Check WiFi mode
+    "$ESP410",                   # List available networks
+]
+
+def wifi_debug(args):
     """Debug WiFi settings via serial"""
     print("🔧 WiFi Debug via Serial")
     print("=" * 50)
     
     try:
-        ser = serial.Serial(port, baudrate, timeout=2)
-        time.sleep(2)
-        
-        # Clear buffers
-        ser.flushInput()
-        ser.flushOutput()
-        
-        # Check current WiFi settings
-        commands = [
-            "$ESP420",                    # WiFi status
-            "$Sta/SSID",                 # Check current SSID
-            "$Sta/Password",             # Check current password (will show as set/unset)
-            "$WiFi/Mode",                # Check WiFi mode
-            "$ESP410",                   # List available networks
-        ]
+        client = connect_from_args(args, on_line=None)
         
-        for cmd in commands:
-            send_command(ser, cmd)
+        for response in client.send_many(COMMANDS):
+            print(f"📤 Sending: {response.command}")
+            print_response(response)
             print("-" * 30)
         
         # Interactive mode
@@ -65,15 +51,17 @@ def wifi_debug(port="/dev/cu.usbmodem12201", baudrate=115200):
                 if user_cmd.lower() in ['quit', 'exit', 'q']:
                     break
                 elif user_cmd:
-                    send_command(ser, user_cmd)
-            except KeyboardInterrupt:
+                    print_response(client.send(user_cmd))
+            except (KeyboardInterrupt, EOFError):
                 break
         
-        ser.close()
+        client.close()
         print("\n🔌 Serial connection closed")
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    wifi_debug() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check and configure WiFi settings interactively")
+    add_connection_args(parser)
+    wifi_debug(parser.parse_args())
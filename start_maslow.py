@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 """
 Maslow CNC Serial Interface Startup Script
-Launches both the FastAPI backend and Vite frontend
+Launches the FastAPI backend and the Vite frontend, or with --production the backend serving the built frontend
 """
 
+import argparse
+import importlib.util
+import json
+import re
 import subprocess
 import sys
 import os
 import time
+import urllib.request
 import webbrowser
 import signal
 import threading
@@ -17,13 +22,23 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).parent.absolute()
 BACKEND_DIR = SCRIPT_DIR / "backend"
 FRONTEND_DIR = SCRIPT_DIR / "frontend"
+FRONTEND_DIST = FRONTEND_DIR / "dist"
+BACKEND_PORT = 8003
+READY_TIMEOUT = 30.0   # seconds to wait for the backend to answer /api/status
+READY_POLL = 0.05      # seconds between readiness probes
+# Files a production build depends on; dist is rebuilt when any is newer than dist/index.html
+FRONTEND_SOURCES = ["src", "public", "index.html", "vite.config.js", "package.json"]
 
 class MaslowLauncher:
-    def __init__(self):
+    def __init__(self, production: bool = False, port: int = BACKEND_PORT, open_browser: bool = True):
+        self.production = production
+        self.port = port
+        self.should_open_browser = open_browser
         self.backend_process = None
         self.frontend_process = None
         self.running = True
         self.frontend_port = 3003  # Default port, will be updated from Vite output
+        self.launched_at = time.perf_counter()
         
     def check_dependencies(self):
         """Check if required dependencies are installed"""
@@ -40,6 +55,10 @@ class MaslowLauncher:
             print("Installing Python dependencies...")
             subprocess.run([sys.executable, "-m", "pip", "install", "-r", str(BACKEND_DIR / "requirements.txt")])
         
+        if self.production and not self.frontend_needs_build():
+            print("✅ Built frontend is up to date")
+            return
+        
         # Check if Node.js is available
         try:
             result = subprocess.run(["node", "--version"], capture_output=True, text=True)
@@ -59,54 +78,112 @@ class MaslowLauncher:
             print("✅ Frontend dependencies found")
     
     def find_serial_port(self):
-        """Find the Maslow serial port"""
-        import serial.tools.list_ports
-        
-        # Try the known port first
-        known_port = "/dev/cu.usbmodem12201"
-        if os.path.exists(known_port):
-            return known_port
+        """Find the most likely Maslow serial port, using the backend's discovery service"""
+        sys.path.insert(0, str(BACKEND_DIR))
+        from port_discovery import PortDiscovery
         
-        # Search for USB serial devices
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            if "usb" in port.device.lower() or "acm" in port.device.lower():
-                return port.device
+        # No probing here: the backend probes and connects itself, and opening the port twice could reset the board
+        return PortDiscovery(os.getenv("MASLOW_SERIAL_PORT")).best_candidate()
+    
+    def frontend_needs_build(self) -> bool:
+        """True when frontend/dist is missing or older than the sources it is built from"""
+        index = FRONTEND_DIST / "index.html"
+        if not index.exists():
+            return True
+        built = index.stat().st_mtime
+        for name in FRONTEND_SOURCES:
+            path = FRONTEND_DIR / name
+            files = path.rglob("*") if path.is_dir() else [path]
+            if any(f.is_file() and f.stat().st_mtime > built for f in files):
+                return True
+        return False
+    
+    def build_frontend(self):
+        """Build frontend/dist for the backend to serve, unless it is already current, and precompress it"""
+        if self.frontend_needs_build():
+            print("📦 Building frontend...")
+            started = time.perf_counter()
+            subprocess.run(["npm", "run", "build"], cwd=FRONTEND_DIR, check=True)
+            print(f"✅ Frontend built in {time.perf_counter() - started:.1f}s")
+        sys.path.insert(0, str(BACKEND_DIR))
+        from frontend_assets import precompress
         
-        return None
+        # .br/.gz variants the backend picks by Accept-Encoding; only missing or stale ones are written
+        counts = precompress(FRONTEND_DIST)
+        if counts["written"]:
+            print(f"🗜️ Precompressed {counts['written']} frontend assets")
+    
+    def backend_command(self):
+        """uvicorn with --reload for development; one process on uvloop/httptools (when installed) for production"""
+        cmd = [
+            sys.executable, "-m", "uvicorn", 
+            "maslow_serial_server:app",
+            "--host", "0.0.0.0",
+            "--port", str(self.port)
+        ]
+        if not self.production:
+            return cmd + ["--reload"]
+        has = lambda module: importlib.util.find_spec(module) is not None
+        return cmd + [
+            "--loop", "uvloop" if has("uvloop") else "asyncio",
+            "--http", "httptools" if has("httptools") else "h11",
+            "--no-access-log"
+        ]
+    
+    def wait_for_backend(self) -> bool:
+        """Poll /api/status until the backend answers, instead of sleeping a fixed time"""
+        url = f"http://127.0.0.1:{self.port}/api/status"
+        deadline = time.perf_counter() + READY_TIMEOUT
+        while time.perf_counter() < deadline:
+            if self.backend_process.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    json.load(response)
+                    return True
+            except OSError:
+                time.sleep(READY_POLL)
+        return False
+    
+    def measure_first_paint(self) -> float:
+        """Fetch index.html and the scripts and styles it loads, as a browser must before it can paint"""
+        base = f"http://127.0.0.1:{self.port}"
+        with urllib.request.urlopen(f"{base}/", timeout=5) as response:
+            html = response.read().decode("utf-8", errors="ignore")
+        for asset in re.findall(r'(?:src|href)="(/[^"]+\.(?:js|css))"', html):
+            with urllib.request.urlopen(f"{base}{asset}", timeout=5) as response:
+                response.read()
+        return time.perf_counter() - self.launched_at
     
     def start_backend(self):
         """Start the FastAPI backend server"""
         print("🚀 Starting backend server...")
         
-        # Find serial port
+        # Find serial port (the backend keeps watching and connects when the Maslow is plugged in)
         serial_port = self.find_serial_port()
         if serial_port:
-            print(f"📡 Found serial port: {serial_port}")
-            os.environ["MASLOW_SERIAL_PORT"] = serial_port
+            print(f"📡 Likely Maslow serial port: {serial_port}")
         else:
-            print("⚠️  No serial port found - backend will start without serial connection")
-        
-        # Start backend
-        cmd = [
-            sys.executable, "-m", "uvicorn", 
-            "maslow_serial_server:app",
-            "--host", "0.0.0.0",
-            "--port", "8003",
-            "--reload"
-        ]
+            print("⚠️  No serial port found - backend will connect when the Maslow is plugged in")
         
+        # Start backend; in production it also serves the built frontend
+        env = dict(os.environ)
+        if self.production:
+            env["MASLOW_FRONTEND_DIST"] = str(FRONTEND_DIST)
         self.backend_process = subprocess.Popen(
-            cmd,
+            self.backend_command(),
             cwd=BACKEND_DIR,
+            env=env,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             universal_newlines=True
         )
+        self.forward_output(self.backend_process, "BACKEND")
         
-        # Wait for backend to start
-        time.sleep(3)
-        print("✅ Backend server started on http://localhost:8003")
+        if not self.wait_for_backend():
+            raise RuntimeError("Backend did not become ready")
+        print(f"✅ Backend server ready on http://localhost:{self.port} "
+              f"after {time.perf_counter() - self.launched_at:.2f}s")
     
     def start_frontend(self):
         """Start the Vite frontend development server"""
@@ -134,7 +211,6 @@ class MaslowLauncher:
                 if "Local:" in line and "localhost:" in line:
                     try:
                         # Extract port from URL
-                        import re
                         match = re.search(r'localhost:(\d+)', line)
                         if match:
                             self.frontend_port = int(match.group(1))
@@ -153,34 +229,27 @@ class MaslowLauncher:
     def open_browser(self):
         """Open the interface in the default browser"""
         print("🌐 Opening browser...")
-        time.sleep(2)
+        if not self.production:
+            time.sleep(2)
         browser_url = f"http://localhost:{self.frontend_port}"
         print(f"🔗 Opening: {browser_url}")
         webbrowser.open(browser_url)
     
+    def forward_output(self, process, label):
+        """Print a child's output with a label, from the moment it starts so its pipe never fills"""
+        def forward():
+            for line in iter(process.stdout.readline, ''):
+                if self.running:
+                    print(f"[{label}] {line.strip()}")
+                else:
+                    break
+        
+        threading.Thread(target=forward, daemon=True).start()
+    
     def monitor_processes(self):
-        """Monitor backend and frontend processes"""
-        def monitor_backend():
-            if self.backend_process:
-                for line in iter(self.backend_process.stdout.readline, ''):
-                    if self.running:
-                        print(f"[BACKEND] {line.strip()}")
-                    else:
-                        break
-        
-        def monitor_frontend():
-            if self.frontend_process:
-                for line in iter(self.frontend_process.stdout.readline, ''):
-                    if self.running:
-                        print(f"[FRONTEND] {line.strip()}")
-                    else:
-                        break
-        
-        # Start monitoring threads
-        if self.backend_process:
-            threading.Thread(target=monitor_backend, daemon=True).start()
+        """Monitor the frontend process (the backend's output is forwarded from launch)"""
         if self.frontend_process:
-            threading.Thread(target=monitor_frontend, daemon=True).start()
+            self.forward_output(self.frontend_process, "FRONTEND")
     
     def signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -209,16 +278,24 @@ class MaslowLauncher:
         
         try:
             self.check_dependencies()
+            if self.production:
+                self.build_frontend()
+                self.launched_at = time.perf_counter()  # measure startup, not the build
             self.start_backend()
-            self.start_frontend()
-            self.open_browser()
+            if self.production:
+                self.frontend_port = self.port
+                print(f"⏱️ Startup to first paint: {self.measure_first_paint():.2f}s")
+            else:
+                self.start_frontend()
+            if self.should_open_browser:
+                self.open_browser()
             self.monitor_processes()
             
             print("\n" + "=" * 60)
             print("✅ Maslow interface is running!")
             print(f"🌐 Frontend: http://localhost:{self.frontend_port}")
-            print("🔧 Backend API: http://localhost:8003")
-            print("📡 WebSocket: ws://localhost:8003/ws")
+            print(f"🔧 Backend API: http://localhost:{self.port}")
+            print(f"📡 WebSocket: ws://localhost:{self.port}/ws")
             print("\nPress Ctrl+C to stop")
             print("=" * 60)
             
@@ -241,6 +318,16 @@ class MaslowLauncher:
             print(f"❌ Error: {e}")
             self.signal_handler(signal.SIGTERM, None)
 
+def main():
+    parser = argparse.ArgumentParser(description="Start the Maslow CNC serial interface")
+    parser.add_argument("--production", action="store_true",
+                        help="No reload or dev server: the backend serves the built frontend")
+    parser.add_argument("--port", type=int, default=BACKEND_PORT, help="Backend port")
+    parser.add_argument("--no-browser", action="store_true", help="Don't open a browser")
+    args = parser.parse_args()
+    
+    launcher = MaslowLauncher(production=args.production, port=args.port, open_browser=not args.no_browser)
+    launcher.run()
+
 if __name__ == "__main__":
-    launcher = MaslowLauncher()
-    launcher.run() 
\ No newline at end of file
+    main() 
\ No newline at end of file